@@ -3,31 +3,77 @@ Paaksathi AI - Crop Disease Detection Application
 Flask Backend Server
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file
+import time
+
+# Wall-clock start of the import, for the startup report
+_startup_started = time.perf_counter()
+
+from flask import Flask, Request, Response, render_template, request, jsonify, session, redirect, url_for, send_file, send_from_directory, g, has_app_context, has_request_context, stream_with_context
 from flask_cors import CORS
-from datetime import datetime
+import click
+from datetime import datetime, timedelta
 import os
+import sys
+import abc
+import shutil
+import gzip
+import mimetypes
 import json
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
 import sqlite3
 from functools import wraps
-import pandas as pd
-from io import BytesIO
-import pytz
+import threading
+import atexit
+import uuid
+import hashlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+import queue
+import zipfile
+import subprocess
+import re
+import random
+import bisect
+import cProfile
+import base64
+import csv
+import tempfile
+from io import StringIO
+from werkzeug.datastructures import FileStorage
 
-import os
-import google.generativeai as genai
-from PIL import Image
+# pandas, numpy, openpyxl, requests, PIL and google.generativeai are imported
+# where they are used; importing them here added over a second to every
+# worker start
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Startup phases in seconds, see /api/admin/startup and benchmarks/bench_startup.py
+startup_timings = OrderedDict()
 
-def detect_crop_disease(image_path):
-    model = genai.GenerativeModel("gemini-1.5-flash")
+def record_startup_step(name, started):
+    startup_timings[name] = round(time.perf_counter() - started, 4)
 
-    image = Image.open(image_path)
+record_startup_step('imports', _startup_started)
 
-    
-    prompt = """
+_genai = None
+_genai_lock = threading.Lock()
+
+def get_genai():
+    """google.generativeai, imported and configured on first use"""
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            endpoint = os.getenv('GEMINI_API_ENDPOINT')
+            if endpoint:
+                # A stand-in server such as benchmarks/fake_gemini.py
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY") or 'test', transport='rest',
+                                client_options={'api_endpoint': endpoint})
+            else:
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            _genai = genai
+    return _genai
+
+GEMINI_PROMPT = """
 તમે કૃષિ વિષયના નિષ્ણાત છો.
 
 આ પાનના ફોટા પરથી પાકનો રોગ ઓળખો.
@@ -57,10 +103,28 @@ English શબ્દો બિલકુલ ઉપયોગ ન કરો.
 - રોકથામ 2
 """
 
-    response = model.generate_content([prompt, image])
-    return response.text
+# Cached Gemini answers are keyed on this, so editing the prompt invalidates them
+GEMINI_PROMPT_VERSION = hashlib.sha256(GEMINI_PROMPT.encode('utf-8')).hexdigest()[:12]
+
+def detect_crop_disease(image_path):
+    return detection_cache.get_or_compute(
+        image_path, f'gemini:{GEMINI_PROMPT_VERSION}',
+        lambda: detect_crop_disease_uncached(image_path))
+
+def detect_crop_disease_uncached(image_path):
+    return get_gemini_client().generate(GEMINI_PROMPT, image_path)
+
+class PaaksathiRequest(Request):
+    """Request class allowing a larger body for the bulk scan endpoint"""
+
+    @property
+    def max_content_length(self):
+        if self.endpoint == 'scan_batch_upload':
+            return app.config['BATCH_MAX_CONTENT_LENGTH']
+        return super().max_content_length
 
 app = Flask(__name__)
+app.request_class = PaaksathiRequest
 app.secret_key = 'paaksathi_ai_secret_key_2024'  # Change this in production
 CORS(app)
 
@@ -70,18 +134,301 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Visit buffering: page views are queued in memory and written to `visits` in
+# batches. VISIT_FLUSH_INTERVAL is also the maximum window of visits that can be
+# lost if a worker is killed without a clean shutdown.
+app.config['VISIT_BUFFER_SIZE'] = int(os.getenv('VISIT_BUFFER_SIZE', '100'))
+app.config['VISIT_FLUSH_INTERVAL'] = float(os.getenv('VISIT_FLUSH_INTERVAL', '5'))
+# Upper bound on queued visits while the database is failing; the oldest are
+# dropped (and counted) beyond it
+app.config['VISIT_BUFFER_MAX'] = int(os.getenv('VISIT_BUFFER_MAX', '10000'))
+
+# Database connection pool
+app.config['DATABASE'] = os.getenv('DATABASE', 'paaksathi.db')
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', '8'))
+app.config['DB_POOL_TIMEOUT'] = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+# Workers only check the schema version at startup; when it is behind they run
+# the full bootstrap unless DB_AUTO_INIT=0 (then run `flask init-db` on deploy)
+app.config['DB_AUTO_INIT'] = os.getenv('DB_AUTO_INIT', '1') == '1'
+app.config['DB_BUSY_TIMEOUT_MS'] = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+app.config['DB_MMAP_SIZE'] = int(os.getenv('DB_MMAP_SIZE', str(64 * 1024 * 1024)))
+
+# Scan pipeline: with SCAN_ASYNC on (or ?async=1 per request) /api/scan/upload returns a
+# job ID right away and detection runs on a bounded worker pool
+app.config['SCAN_ASYNC'] = os.getenv('SCAN_ASYNC', '0') == '1'
+app.config['SCAN_WORKERS'] = int(os.getenv('SCAN_WORKERS', '4'))
+app.config['SCAN_QUEUE_MAX'] = int(os.getenv('SCAN_QUEUE_MAX', '32'))
+app.config['SCAN_JOB_RETENTION_HOURS'] = int(os.getenv('SCAN_JOB_RETENTION_HOURS', '24'))
+
+# Detection result cache (in-memory LRU in front of a SQLite table)
+app.config['DETECTION_CACHE_MEMORY_ITEMS'] = int(os.getenv('DETECTION_CACHE_MEMORY_ITEMS', '256'))
+app.config['DETECTION_CACHE_MAX_ROWS'] = int(os.getenv('DETECTION_CACHE_MAX_ROWS', '20000'))
+app.config['DETECTION_CACHE_TTL'] = int(os.getenv('DETECTION_CACHE_TTL', str(7 * 24 * 3600)))
+
+# Perceptual-hash near-duplicate matching: images whose 64-bit dHash differs in
+# at most this many bits count as the same leaf (negative disables matching)
+app.config['NEAR_DUPLICATE_DISTANCE'] = int(os.getenv('NEAR_DUPLICATE_DISTANCE', '5'))
+
+# Upload preprocessing: uploads are decoded, rotated upright, shrunk to fit
+# IMAGE_MAX_SIDE and re-encoded as metadata-free JPEG before storage/inference
+app.config['IMAGE_MAX_SIDE'] = int(os.getenv('IMAGE_MAX_SIDE', '1024'))
+app.config['IMAGE_JPEG_QUALITY'] = int(os.getenv('IMAGE_JPEG_QUALITY', '85'))
+app.config['KEEP_ORIGINAL_UPLOADS'] = os.getenv('KEEP_ORIGINAL_UPLOADS', '0') == '1'
+
+# Disease detection backend for detect_disease(): 'auto', 'onnx', 'numpy',
+# 'gemini' or 'mock'. 'auto' uses a local model file if one is present.
+app.config['DETECTION_BACKEND'] = os.getenv('DETECTION_BACKEND', 'auto')
+app.config['DETECTION_MODEL_DIR'] = os.getenv('DETECTION_MODEL_DIR', 'model')
+app.config['DETECTION_PRELOAD'] = os.getenv('DETECTION_PRELOAD', '1') == '1'
+
+# Gemini calls: each attempt gets GEMINI_TIMEOUT seconds and the whole call
+# (retries included) GEMINI_DEADLINE. Failed attempts are retried up to
+# GEMINI_MAX_RETRIES times with jittered exponential backoff. At most
+# GEMINI_MAX_CONCURRENCY calls run at once per worker; others wait up to
+# GEMINI_QUEUE_TIMEOUT. After GEMINI_BREAKER_THRESHOLD failed calls in a row
+# Gemini is skipped for GEMINI_BREAKER_COOLDOWN seconds and scans fall back to
+# the local detector. GEMINI_API_ENDPOINT (env only) points at another server.
+app.config['GEMINI_MODEL'] = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+app.config['GEMINI_TIMEOUT'] = float(os.getenv('GEMINI_TIMEOUT', '20'))
+app.config['GEMINI_DEADLINE'] = float(os.getenv('GEMINI_DEADLINE', '45'))
+app.config['GEMINI_MAX_RETRIES'] = int(os.getenv('GEMINI_MAX_RETRIES', '2'))
+app.config['GEMINI_RETRY_BASE_DELAY'] = float(os.getenv('GEMINI_RETRY_BASE_DELAY', '0.5'))
+app.config['GEMINI_MAX_CONCURRENCY'] = int(os.getenv('GEMINI_MAX_CONCURRENCY', '4'))
+app.config['GEMINI_QUEUE_TIMEOUT'] = float(os.getenv('GEMINI_QUEUE_TIMEOUT', '5'))
+app.config['GEMINI_BREAKER_THRESHOLD'] = int(os.getenv('GEMINI_BREAKER_THRESHOLD', '5'))
+app.config['GEMINI_BREAKER_COOLDOWN'] = float(os.getenv('GEMINI_BREAKER_COOLDOWN', '30'))
+
+# Micro-batching for local models: concurrent scans wait up to
+# INFERENCE_BATCH_MAX_WAIT_MS to share one forward pass of at most
+# INFERENCE_BATCH_MAX_SIZE images (a max size of 1 turns batching off)
+app.config['INFERENCE_BATCH_MAX_SIZE'] = int(os.getenv('INFERENCE_BATCH_MAX_SIZE', '8'))
+app.config['INFERENCE_BATCH_MAX_WAIT_MS'] = float(os.getenv('INFERENCE_BATCH_MAX_WAIT_MS', '10'))
+
+# Bulk scan uploads (/api/scan/batch)
+app.config['BATCH_MAX_FILES'] = int(os.getenv('BATCH_MAX_FILES', '50'))
+app.config['BATCH_MAX_CONTENT_LENGTH'] = int(os.getenv('BATCH_MAX_CONTENT_MB', '200')) * 1024 * 1024
+
+# Weather: provider is 'openweathermap' (needs WEATHER_API_KEY) or 'stub'.
+# Requests are snapped to WEATHER_TILE_DEG grid tiles and each tile is fetched
+# from upstream at most once per WEATHER_CACHE_TTL seconds.
+app.config['WEATHER_PROVIDER'] = os.getenv('WEATHER_PROVIDER', 'openweathermap' if os.getenv('WEATHER_API_KEY') else 'stub')
+app.config['WEATHER_API_KEY'] = os.getenv('WEATHER_API_KEY')
+app.config['WEATHER_API_URL'] = os.getenv('WEATHER_API_URL', 'https://api.openweathermap.org/data/2.5/forecast')
+app.config['WEATHER_TIMEOUT'] = float(os.getenv('WEATHER_TIMEOUT', '5'))
+app.config['WEATHER_TILE_DEG'] = float(os.getenv('WEATHER_TILE_DEG', '0.1'))
+app.config['WEATHER_CACHE_TTL'] = int(os.getenv('WEATHER_CACHE_TTL', '600'))
+
+# Cache-Control for the crops/diseases/schemes catalogs. Clients revalidate
+# with If-None-Match and get a 304 while the catalog is unchanged.
+app.config['CATALOG_CACHE_CONTROL'] = os.getenv('CATALOG_CACHE_CONTROL', 'no-cache')
+
+# User exports are read from the database EXPORT_BATCH_SIZE rows at a time;
+# background exports are written to EXPORT_FOLDER
+app.config['EXPORT_BATCH_SIZE'] = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+app.config['EXPORT_FOLDER'] = os.getenv('EXPORT_FOLDER', 'exports')
+
+# Visits maintenance: raw visits older than VISIT_RETENTION_DAYS are rolled up
+# into per-day totals and deleted VISIT_DELETE_BATCH rows at a time. Runs every
+# VISIT_MAINTENANCE_INTERVAL_HOURS in one worker (0 = only via the CLI).
+app.config['VISIT_RETENTION_DAYS'] = int(os.getenv('VISIT_RETENTION_DAYS', '90'))
+app.config['VISIT_DELETE_BATCH'] = int(os.getenv('VISIT_DELETE_BATCH', '5000'))
+app.config['VISIT_MAINTENANCE_INTERVAL_HOURS'] = float(os.getenv('VISIT_MAINTENANCE_INTERVAL_HOURS', '24'))
+app.config['VACUUM_PAGES_PER_STEP'] = int(os.getenv('VACUUM_PAGES_PER_STEP', '1000'))
+
+# Admin live updates (/api/admin/events): each connection buffers at most
+# EVENT_BUFFER_SIZE events and holds one worker thread for as long as it is
+# open, so it needs threaded workers (see gunicorn.conf.py) and connections are
+# capped at EVENT_MAX_SUBSCRIBERS per worker, well below its thread count.
+# Counters are re-read every EVENT_POLL_SECONDS to pick up changes made by
+# other workers.
+app.config['EVENT_BUFFER_SIZE'] = int(os.getenv('EVENT_BUFFER_SIZE', '256'))
+app.config['EVENT_MAX_SUBSCRIBERS'] = int(os.getenv('EVENT_MAX_SUBSCRIBERS', '4'))
+app.config['EVENT_POLL_SECONDS'] = float(os.getenv('EVENT_POLL_SECONDS', '5'))
+app.config['EVENT_HEARTBEAT_SECONDS'] = float(os.getenv('EVENT_HEARTBEAT_SECONDS', '15'))
+
+# Prometheus metrics at /metrics, counted per worker process. If METRICS_TOKEN
+# is set, scrapers must send it as a bearer token. A PROFILE_SAMPLE_RATE share
+# of requests (0 = off) runs under cProfile, and profiles of the ones slower
+# than PROFILE_SLOW_MS are written to PROFILE_DIR.
+app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', '1') == '1'
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN', '')
+app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+app.config['PROFILE_SLOW_MS'] = float(os.getenv('PROFILE_SLOW_MS', '500'))
+app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', 'profiles')
+
+# Static assets: once `flask build-assets` has run, pages load one minified,
+# fingerprinted stylesheet and script from static/dist/, cached by browsers for
+# STATIC_IMMUTABLE_MAX_AGE seconds. ASSET_BUNDLING=0 serves the source files
+# instead (for editing CSS/JS without rebuilding).
+app.config['ASSET_BUNDLING'] = os.getenv('ASSET_BUNDLING', '1') == '1'
+app.config['STATIC_IMMUTABLE_MAX_AGE'] = int(os.getenv('STATIC_IMMUTABLE_MAX_AGE', str(365 * 24 * 3600)))
+
 # Create uploads directory if it doesn't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 # Create model directory if it doesn't exist
 os.makedirs('model', exist_ok=True)
 
-# Database initialization
-def init_db():
-    """Initialize SQLite database with required tables"""
-    conn = sqlite3.connect('paaksathi.db')
+def add_column_if_missing(c, table, column, declaration):
+    """Add a column to an existing table (CREATE TABLE IF NOT EXISTS won't)"""
+    c.execute(f'PRAGMA table_info({table})')
+    if column not in [row[1] for row in c.fetchall()]:
+        c.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+
+def init_disease_search(c):
+    """Create the FTS5 index for diseases (if SQLite was built with FTS5)"""
+    c.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'diseases_fts'")
+    if c.fetchone():
+        return
+    try:
+        # unicode61 only counts letters and digits as token characters by
+        # default, so it would split Gujarati at every vowel sign and virama;
+        # adding M* keeps combining marks (and so whole words) inside tokens.
+        # Queries use prefix matching so suffixes like -માં / -નો still match
+        c.execute('''CREATE VIRTUAL TABLE diseases_fts USING fts5
+                     (name_gu, name_en, crop, symptoms, treatment, prevention,
+                      content='diseases', content_rowid='id',
+                      tokenize="unicode61 remove_diacritics 0 categories 'L* N* Co M*'",
+                      prefix='2 3')''')
+    except sqlite3.OperationalError as e:
+        print(f"FTS5 not available, disease search will use LIKE: {str(e)}")
+        return
+    c.execute('''CREATE TRIGGER IF NOT EXISTS diseases_fts_insert AFTER INSERT ON diseases BEGIN
+                   INSERT INTO diseases_fts (rowid, name_gu, name_en, crop, symptoms, treatment, prevention)
+                   VALUES (new.id, new.name_gu, new.name_en, new.crop, new.symptoms, new.treatment, new.prevention);
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS diseases_fts_delete AFTER DELETE ON diseases BEGIN
+                   INSERT INTO diseases_fts (diseases_fts, rowid, name_gu, name_en, crop, symptoms, treatment, prevention)
+                   VALUES ('delete', old.id, old.name_gu, old.name_en, old.crop, old.symptoms, old.treatment, old.prevention);
+                 END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS diseases_fts_update AFTER UPDATE ON diseases BEGIN
+                   INSERT INTO diseases_fts (diseases_fts, rowid, name_gu, name_en, crop, symptoms, treatment, prevention)
+                   VALUES ('delete', old.id, old.name_gu, old.name_en, old.crop, old.symptoms, old.treatment, old.prevention);
+                   INSERT INTO diseases_fts (rowid, name_gu, name_en, crop, symptoms, treatment, prevention)
+                   VALUES (new.id, new.name_gu, new.name_en, new.crop, new.symptoms, new.treatment, new.prevention);
+                 END''')
+    # Index the rows that already exist
+    c.execute("INSERT INTO diseases_fts (diseases_fts) VALUES ('rebuild')")
+
+# -------------------- Schema migrations --------------------
+# Each step runs once, in order, and is recorded in schema_version.
+# Append new steps at the end; never edit or reorder applied ones.
+
+def migrate_phash_columns(c):
+    # Perceptual hashes for near-duplicate lookups
+    add_column_if_missing(c, 'scans', 'phash', 'TEXT')
+    add_column_if_missing(c, 'scans', 'duplicate_of', 'INTEGER')
+    add_column_if_missing(c, 'detection_cache', 'phash', 'TEXT')
+
+def migrate_listing_indexes(c):
+    # Admin listings sort newest first; keyset pagination walks these backwards
+    c.execute('CREATE INDEX IF NOT EXISTS idx_users_created_at ON users (created_at, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_visits_visit_time ON visits (visit_time, id)')
+
+def migrate_disease_search(c):
+    # Full-text index over the disease library, kept in sync by triggers
+    init_disease_search(c)
+
+def migrate_disease_search_tokenizer(c):
+    # Re-create the index with a tokenizer that keeps Gujarati words whole
+    for trigger in ('insert', 'delete', 'update'):
+        c.execute(f'DROP TRIGGER IF EXISTS diseases_fts_{trigger}')
+    c.execute('DROP TABLE IF EXISTS diseases_fts')
+    init_disease_search(c)
+
+def migrate_scan_indexes(c):
+    # Per-user scan history and counter rebuilds
+    c.execute('CREATE INDEX IF NOT EXISTS idx_scans_user_id ON scans (user_id, scan_time)')
+    # admin_scan_records() GROUP BY crop_type, disease_name reads only this index
+    c.execute('CREATE INDEX IF NOT EXISTS idx_scans_crop_disease ON scans (crop_type, disease_name)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_scans_scan_time ON scans (scan_time)')
+    # Counter rebuilds group visits by day
+    c.execute('CREATE INDEX IF NOT EXISTS idx_visits_date ON visits (date)')
+    # Finished-job cleanup
+    c.execute('CREATE INDEX IF NOT EXISTS idx_scan_jobs_finished_at ON scan_jobs (finished_at)')
+
+def migrate_visit_rollups(c):
+    # Per-day visit totals that outlive the raw rows
+    c.execute('''CREATE TABLE IF NOT EXISTS visit_rollups
+                 (date TEXT PRIMARY KEY,
+                  visits INTEGER NOT NULL,
+                  unique_ips INTEGER NOT NULL)''')
+    # Last run of each periodic job, shared by all workers
+    c.execute('''CREATE TABLE IF NOT EXISTS maintenance_runs
+                 (name TEXT PRIMARY KEY,
+                  last_run REAL NOT NULL DEFAULT 0)''')
+
+def migrate_scan_daily_stats(c):
+    # Scan counts per day, crop and disease, kept current by save_scans();
+    # NULL crop/disease are stored as '' since they are part of the key
+    c.execute('''CREATE TABLE IF NOT EXISTS scan_daily_stats
+                 (day TEXT NOT NULL,
+                  crop_type TEXT NOT NULL,
+                  disease_name TEXT NOT NULL,
+                  count INTEGER NOT NULL,
+                  PRIMARY KEY (day, crop_type, disease_name)) WITHOUT ROWID''')
+    rebuild_scan_daily_stats(c)
+
+MIGRATIONS = [
+    (1, 'Perceptual hash columns on scans and detection_cache', migrate_phash_columns),
+    (2, 'Indexes for admin user and visit listings', migrate_listing_indexes),
+    (3, 'Full-text index for the disease library', migrate_disease_search),
+    (4, 'Indexes for scan lookups, analytics and job cleanup', migrate_scan_indexes),
+    (5, 'Visit rollups and maintenance run tracking', migrate_visit_rollups),
+    (6, 'Daily crop and disease scan aggregates', migrate_scan_daily_stats),
+    (7, 'Disease search tokenizer that keeps Gujarati words whole', migrate_disease_search_tokenizer),
+]
+
+def run_migrations(conn):
+    """Apply pending migrations, each in its own transaction"""
     c = conn.cursor()
-    
+    c.execute('''CREATE TABLE IF NOT EXISTS schema_version
+                 (version INTEGER PRIMARY KEY,
+                  description TEXT,
+                  applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    conn.commit()
+    applied = []
+    for version, description, migrate in MIGRATIONS:
+        # IMMEDIATE takes the write lock up front, so workers starting at the
+        # same time apply each step once; the check is repeated under the lock
+        c.execute('BEGIN IMMEDIATE')
+        try:
+            c.execute('SELECT 1 FROM schema_version WHERE version = ?', (version,))
+            if c.fetchone():
+                conn.rollback()
+                continue
+            migrate(c)
+            c.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                      (version, description))
+            conn.commit()
+            applied.append(version)
+        except Exception:
+            conn.rollback()
+            raise
+    if applied:
+        print(f"Applied schema migrations: {applied}")
+    return applied
+
+def schema_version(c):
+    c.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+    return c.fetchone()[0]
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations"""
+    conn = sqlite3.connect(app.config['DATABASE'])
+    applied = run_migrations(conn)
+    version = schema_version(conn.cursor())
+    conn.close()
+    print(f"Schema at version {version}" + ('' if applied else ' (nothing to apply)'))
+
+# Database initialization
+def create_tables(c):
+    """
+    CREATE ... IF NOT EXISTS for the base tables; runs on every startup.
+    Anything that is not idempotent (new columns, backfills, seed rows for an
+    existing database) has to be a MIGRATIONS entry instead.
+    """
     # Users table
     c.execute('''CREATE TABLE IF NOT EXISTS users
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -128,11 +475,47 @@ def init_db():
                   title TEXT NOT NULL,
                   description TEXT)''')
 
+    # Background scan jobs (shared by all workers so any of them can answer a status poll)
+    c.execute('''CREATE TABLE IF NOT EXISTS scan_jobs
+                 (id TEXT PRIMARY KEY,
+                  kind TEXT NOT NULL,
+                  status TEXT NOT NULL,
+                  result TEXT,
+                  error TEXT,
+                  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                  finished_at TIMESTAMP)''')
+
+    # Detection results keyed by image hash + crop type + model/prompt version
+    c.execute('''CREATE TABLE IF NOT EXISTS detection_cache
+                 (key TEXT PRIMARY KEY,
+                  result TEXT NOT NULL,
+                  created_at REAL NOT NULL,
+                  last_used REAL NOT NULL)''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_detection_cache_last_used ON detection_cache (last_used)')
+
+    # Pre-aggregated counters (day = '' holds the all-time total)
+    c.execute('''CREATE TABLE IF NOT EXISTS counters
+                 (name TEXT NOT NULL,
+                  day TEXT NOT NULL DEFAULT '',
+                  value INTEGER NOT NULL DEFAULT 0,
+                  PRIMARY KEY (name, day))''')
+
     # Admin table
     c.execute('''CREATE TABLE IF NOT EXISTS admin
                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
                   username TEXT UNIQUE NOT NULL,
                   password TEXT NOT NULL)''')
+
+def init_db():
+    """Initialize SQLite database with required tables"""
+    conn = sqlite3.connect(app.config['DATABASE'])
+    c = conn.cursor()
+    
+    # Lets the maintenance job give free pages back in small steps
+    # (only takes effect on a new database; see the maintain-visits command)
+    c.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    
+    create_tables(c)
     
     # Create default admin if not exists
     c.execute('''INSERT OR IGNORE INTO admin (username, password) 
@@ -181,20 +564,1303 @@ def init_db():
         c.executemany('INSERT INTO schemes (title, description) VALUES (?, ?)', schemes)
 
     conn.commit()
+
+    # Bring the schema up to date (columns, indexes, ...)
+    run_migrations(conn)
+
+    # Backfill counters the first time they are needed
+    c.execute('SELECT COUNT(*) as count FROM counters')
+    result = c.fetchone()
+    if result and result[0] == 0:
+        rebuild_counters(c)
+
+    conn.commit()
+    conn.close()
+
+# ==================== COUNTERS ====================
+
+def bump_counter(c, name, amount=1, day=None):
+    """Increment a counter total and its per-day bucket on the given cursor"""
+    if day is None:
+        day = datetime.utcnow().strftime('%Y-%m-%d')
+    c.executemany('''INSERT INTO counters (name, day, value) VALUES (?, ?, ?)
+                     ON CONFLICT(name, day) DO UPDATE SET value = value + excluded.value''',
+                  [(name, '', amount), (name, day, amount)])
+
+def read_counters(c, names, day=''):
+    """Read several counters at once, missing counters read as 0"""
+    placeholders = ','.join('?' for _ in names)
+    c.execute(f'SELECT name, value FROM counters WHERE day = ? AND name IN ({placeholders})',
+              (day, *names))
+    values = {row[0]: row[1] for row in c.fetchall()}
+    return {name: values.get(name, 0) for name in names}
+
+def rebuild_counters(c):
+    """Recompute all counters from the base tables"""
+    # Catalog versions are not derived from other tables, keep them
+    c.execute("DELETE FROM counters WHERE name NOT LIKE 'catalog:%'")
+    # Rolled-up days count from visit_rollups, the rest from the raw rows
+    c.execute('''INSERT INTO counters (name, day, value)
+                 SELECT 'visits', '',
+                        (SELECT COALESCE(SUM(visits), 0) FROM visit_rollups)
+                        + (SELECT COUNT(*) FROM visits
+                           WHERE date IS NULL OR date NOT IN (SELECT date FROM visit_rollups))
+                 UNION ALL SELECT 'scans', '', COUNT(*) FROM scans
+                 UNION ALL SELECT 'users', '', COUNT(*) FROM users''')
+    c.execute('''INSERT INTO counters (name, day, value)
+                 SELECT 'visits', date, visits FROM visit_rollups''')
+    c.execute('''INSERT INTO counters (name, day, value)
+                 SELECT 'visits', date, COUNT(*) FROM visits
+                 WHERE date IS NOT NULL AND date NOT IN (SELECT date FROM visit_rollups)
+                 GROUP BY date''')
+    c.execute('''INSERT INTO counters (name, day, value)
+                 SELECT 'scans', date(scan_time), COUNT(*) FROM scans
+                 WHERE scan_time IS NOT NULL GROUP BY date(scan_time)''')
+    c.execute('''INSERT INTO counters (name, day, value)
+                 SELECT 'users', date(created_at), COUNT(*) FROM users
+                 WHERE created_at IS NOT NULL GROUP BY date(created_at)''')
+    c.execute('''INSERT INTO counters (name, day, value)
+                 SELECT 'scans:user:' || user_id, '', COUNT(*) FROM scans
+                 WHERE user_id IS NOT NULL GROUP BY user_id''')
+
+def bump_scan_daily_stats(c, scans, day=None):
+    """Add (crop_type, disease_name) pairs to today's scan_daily_stats rows"""
+    if day is None:
+        day = datetime.utcnow().strftime('%Y-%m-%d')
+    counts = {}
+    for crop_type, disease_name in scans:
+        key = (crop_type or '', disease_name or '')
+        counts[key] = counts.get(key, 0) + 1
+    c.executemany('''INSERT INTO scan_daily_stats (day, crop_type, disease_name, count)
+                     VALUES (?, ?, ?, ?)
+                     ON CONFLICT(day, crop_type, disease_name) DO UPDATE SET count = count + excluded.count''',
+                  [(day, crop_type, disease_name, count)
+                   for (crop_type, disease_name), count in counts.items()])
+
+def rebuild_scan_daily_stats(c):
+    """Recompute scan_daily_stats from the scans table"""
+    c.execute('DELETE FROM scan_daily_stats')
+    c.execute('''INSERT INTO scan_daily_stats (day, crop_type, disease_name, count)
+                 SELECT COALESCE(date(scan_time), ''), COALESCE(crop_type, ''),
+                        COALESCE(disease_name, ''), COUNT(*)
+                 FROM scans
+                 GROUP BY 1, 2, 3''')
+
+@app.cli.command('rebuild-scan-stats')
+def rebuild_scan_stats_command():
+    """Recompute the scan_daily_stats aggregate from the scans table"""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')
+    rebuild_scan_daily_stats(c)
+    conn.commit()
+    c.execute('SELECT COUNT(*), COALESCE(SUM(count), 0) FROM scan_daily_stats')
+    rows, scans = c.fetchone()
+    conn.close()
+    print(f"Scan stats rebuilt: {rows} rows covering {scans} scans")
+
+@app.cli.command('rebuild-counters')
+def rebuild_counters_command():
+    """Recompute the counters table from visits, scans and users"""
+    visit_buffer.flush()
+    conn = get_db_connection()
+    c = conn.cursor()
+    rebuild_counters(c)
+    conn.commit()
+    totals = read_counters(c, ['visits', 'scans', 'users'])
+    conn.close()
+    print(f"Counters rebuilt: {totals}")
+
+def database_is_current():
+    """True when the database exists and has every migration applied"""
+    if not os.path.exists(app.config['DATABASE']):
+        return False
+    try:
+        conn = sqlite3.connect(app.config['DATABASE'])
+        try:
+            return schema_version(conn.cursor()) >= MIGRATIONS[-1][0]
+        finally:
+            conn.close()
+    except sqlite3.OperationalError:
+        return False
+
+def bootstrap_db():
+    """Create, seed and migrate the database unless that was already done"""
+    if database_is_current():
+        # Cheap no-op for existing tables, so tables added to create_tables()
+        # still reach databases that are already migrated
+        conn = sqlite3.connect(app.config['DATABASE'])
+        create_tables(conn.cursor())
+        conn.commit()
+        conn.close()
+        return
+    if not app.config['DB_AUTO_INIT']:
+        print("Database schema is out of date, run 'flask init-db'")
+        return
+    init_db()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create, seed and migrate the database (run once per deployment)"""
+    init_db()
+    conn = sqlite3.connect(app.config['DATABASE'])
+    print(f"Database ready at schema version {schema_version(conn.cursor())}")
     conn.close()
 
-# Initialize database on startup
-init_db()
+# Initialize database on startup (a single version check once it is set up)
+_step_started = time.perf_counter()
+bootstrap_db()
+record_startup_step('db_bootstrap', _step_started)
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def save_preprocessed_upload(file, upload_dir, filename):
+    """
+    Save an uploaded image downsized and re-encoded as JPEG.
+    Returns the saved path, or None if the file is not a readable image.
+    """
+    # The extension always becomes .jpg, so a random suffix keeps leaf.png and
+    # leaf.jpg from the same upload (or second) apart
+    base_name = filename.rsplit('.', 1)[0] if '.' in filename else filename
+    base_name = f'{base_name}_{uuid.uuid4().hex[:8]}'
+    filepath = os.path.join(upload_dir, f'{base_name}.jpg')
+    max_side = app.config['IMAGE_MAX_SIDE']
+
+    if app.config['KEEP_ORIGINAL_UPLOADS']:
+        original_dir = os.path.join(upload_dir, 'originals')
+        os.makedirs(original_dir, exist_ok=True)
+        extension = filename.rsplit('.', 1)[1] if '.' in filename else ''
+        file.save(os.path.join(original_dir, f'{base_name}.{extension}' if extension else base_name))
+        file.stream.seek(0)
+
+    from PIL import Image, ImageOps
+    try:
+        with Image.open(file.stream) as image:
+            # JPEG only: let the decoder scale down by 1/2, 1/4 or 1/8 while decoding
+            image.draft('RGB', (max_side, max_side))
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGB')
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+            # Saving without exif/icc drops the metadata
+            image.save(filepath, 'JPEG', quality=app.config['IMAGE_JPEG_QUALITY'], optimize=True)
+    except Exception as e:
+        print(f"Error preprocessing upload {filename}: {str(e)}")
+        return None
+    return filepath
+
+# ==================== METRICS ====================
+
+def format_metric_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+def format_metric_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, dict(zip(self.labels, key)), value) for key, value in self._values.items()]
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    type = 'histogram'
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()]
+        samples = []
+        for key, counts, total, count in values:
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append((f'{self.name}_bucket', {**labels, 'le': format_metric_value(bound)}, cumulative))
+            samples.append((f'{self.name}_sum', labels, total))
+            samples.append((f'{self.name}_count', labels, count))
+        return samples
+
+class MetricsRegistry:
+    """
+    Metrics in the Prometheus text format. Collectors are called at scrape
+    time and return (name, type, help, [(labels, value)]) tuples for values
+    that already live elsewhere (cache stats, queue depths).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=Histogram.DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, func):
+        self._collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{format_metric_labels(labels)} {format_metric_value(value)}')
+        for collect in self._collectors:
+            try:
+                families = collect()
+            except Exception as e:
+                print(f"Error in metrics collector {collect.__name__}: {str(e)}")
+                continue
+            for name, metric_type, help, samples in families:
+                lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in samples:
+                    lines.append(f'{name}{format_metric_labels(labels)} {format_metric_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+metrics = MetricsRegistry()
+
+REQUEST_SECONDS = metrics.histogram(
+    'paaksathi_http_request_duration_seconds', 'Time to build the response, by endpoint',
+    ('endpoint', 'method', 'status'))
+REQUEST_DB_QUERIES = metrics.histogram(
+    'paaksathi_http_request_db_queries', 'SQL statements run per request',
+    ('endpoint',), (0, 1, 2, 5, 10, 20, 50, 100, 200))
+REQUEST_DB_SECONDS = metrics.histogram(
+    'paaksathi_http_request_db_seconds', 'Time spent in SQL statements per request', ('endpoint',))
+DB_QUERIES = metrics.counter('paaksathi_db_queries_total', 'SQL statements run through pooled connections')
+DB_QUERY_SECONDS = metrics.histogram(
+    'paaksathi_db_query_duration_seconds', 'Time per SQL statement',
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1))
+INFERENCE_SECONDS = metrics.histogram(
+    'paaksathi_inference_duration_seconds', 'Detector time per scan (cache misses only)', ('backend',))
+UPSTREAM_SECONDS = metrics.histogram(
+    'paaksathi_upstream_request_duration_seconds', 'Calls to external services, per attempt',
+    ('service', 'outcome'))
+PROFILES_WRITTEN = metrics.counter('paaksathi_profiles_written_total', 'Slow-request cProfile dumps written')
+
+def record_db_query(elapsed):
+    DB_QUERIES.inc()
+    DB_QUERY_SECONDS.observe(elapsed)
+    if has_request_context():
+        query_stats = g.get('query_stats')
+        if query_stats is not None:
+            query_stats[0] += 1
+            query_stats[1] += elapsed
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times each statement (SELECT rows after the first are not included)"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_db_query(time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_db_query(time.perf_counter() - started)
+
+_profile_lock = threading.Lock()
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.query_stats = [0, 0.0]
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    # One profiled request at a time; profilers don't nest
+    if rate > 0 and random.random() < rate and _profile_lock.acquire(blocking=False):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            _profile_lock.release()
+            return
+        g.profiler = profiler
+
+@app.after_request
+def record_request_metrics(response):
+    """Streamed bodies (exports, SSE) are timed until their headers are ready"""
+    started = g.get('request_started')
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.endpoint or 'unmatched'
+    if app.config['METRICS_ENABLED']:
+        REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, method=request.method,
+                                status=str(response.status_code))
+        queries, query_time = g.query_stats
+        REQUEST_DB_QUERIES.observe(queries, endpoint=endpoint)
+        REQUEST_DB_SECONDS.observe(query_time, endpoint=endpoint)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profile_lock.release()
+        if elapsed * 1000 >= app.config['PROFILE_SLOW_MS']:
+            write_profile(profiler, endpoint, elapsed)
+    return response
+
+@app.teardown_request
+def stop_request_profiler(exception):
+    # after_request is skipped when the request failed outright
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profile_lock.release()
+
+def write_profile(profiler, endpoint, elapsed):
+    """Save cProfile stats; open with `python -m pstats <file>` or snakeviz"""
+    try:
+        os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+        filename = f"{datetime.utcnow():%Y%m%d_%H%M%S}_{endpoint}_{int(elapsed * 1000)}ms.prof"
+        profiler.dump_stats(os.path.join(app.config['PROFILE_DIR'], filename))
+        PROFILES_WRITTEN.inc()
+    except Exception as e:
+        print(f"Error writing profile: {str(e)}")
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    if not app.config['METRICS_ENABLED']:
+        return jsonify({'success': False, 'message': 'Metrics disabled'}), 404
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@metrics.collector
+def collect_runtime_metrics():
+    """Cache, queue, pool and upstream-client state read at scrape time"""
+    detection = detection_cache.stats()
+    weather = weather_cache.stats()
+    catalogs = catalog_cache.stats()
+    pool = db_pool.stats()
+    families = [
+        ('paaksathi_cache_hits_total', 'counter', 'Cache lookups answered from the cache', [
+            ({'cache': 'detection_memory'}, detection['memory_hits']),
+            ({'cache': 'detection_disk'}, detection['disk_hits']),
+            ({'cache': 'detection_near_duplicate'}, detection['near_duplicate_hits']),
+            ({'cache': 'weather'}, weather['hits'] + weather['coalesced']),
+            ({'cache': 'catalog'}, catalogs['hits'])]),
+        ('paaksathi_cache_misses_total', 'counter', 'Cache lookups that had to compute the value', [
+            ({'cache': 'detection'}, detection['misses']),
+            ({'cache': 'weather'}, weather['misses']),
+            ({'cache': 'catalog'}, catalogs['rebuilds'])]),
+        ('paaksathi_cache_hit_ratio', 'gauge', 'Share of lookups answered from the cache', [
+            ({'cache': 'detection'}, detection['hit_ratio']),
+            ({'cache': 'weather'}, weather['hit_ratio'])]),
+        ('paaksathi_cache_evictions_total', 'counter', 'Entries dropped to stay within the cache size', [
+            ({'cache': 'detection_memory'}, detection['memory_evictions']),
+            ({'cache': 'detection_table'}, detection['table_evictions'])]),
+        ('paaksathi_queue_depth', 'gauge', 'Work waiting or running in this worker', [
+            ({'queue': 'scan_jobs'}, scan_jobs.depth()),
+            ({'queue': 'export_jobs'}, export_jobs.depth()),
+            ({'queue': 'visit_buffer'}, visit_buffer.pending_count()),
+            ({'queue': 'admin_event_streams'}, len(admin_events._subscribers))]),
+        ('paaksathi_visits_dropped_total', 'counter', 'Queued visits dropped while the database was failing', [
+            ({}, visit_buffer.dropped)]),
+        ('paaksathi_db_pool_connections', 'gauge', 'Pooled SQLite connections', [
+            ({'state': 'open'}, pool['size']), ({'state': 'idle'}, pool['idle'])]),
+        ('paaksathi_db_pool_waits_total', 'counter', 'Acquires that had to wait for a connection', [
+            ({}, pool['waits'])]),
+    ]
+    scheduler = getattr(_detector, 'scheduler', None)
+    if scheduler is not None:
+        batching = scheduler.stats()
+        families += [
+            ('paaksathi_queue_depth', 'gauge', 'Work waiting or running in this worker', [
+                ({'queue': 'inference_batch'}, batching['queue_depth'])]),
+            ('paaksathi_inference_batches_total', 'counter', 'Batched forward passes', [({}, batching['batches'])]),
+            ('paaksathi_inference_batch_items_total', 'counter', 'Images run through batched forward passes', [
+                ({}, batching['items'])]),
+        ]
+    if _gemini_client is not None:
+        gemini = _gemini_client.stats()
+        families += [
+            ('paaksathi_gemini_in_flight', 'gauge', 'Gemini calls in progress', [({}, gemini['in_flight'])]),
+            ('paaksathi_gemini_circuit_open', 'gauge', '1 while Gemini is being skipped', [
+                ({}, int(gemini['breaker_state'] != 'closed'))]),
+            ('paaksathi_gemini_calls_total', 'counter', 'Gemini calls by outcome', [
+                ({'outcome': name}, gemini[name])
+                for name in ('successes', 'failures', 'retries', 'timeouts', 'short_circuited',
+                             'rejected_busy', 'fallbacks')]),
+        ]
+    # Prometheus expects each family once
+    merged = OrderedDict()
+    for name, metric_type, help, samples in families:
+        merged.setdefault(name, (name, metric_type, help, []))[3].extend(samples)
+    return list(merged.values())
+
+# ==================== DATABASE POOL ====================
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection that goes back to the pool instead of closing"""
+
+    pool = None
+    request_bound = False
+    # Set while the connection sits in the pool, so a second close() is a no-op
+    released = False
+
+    def close(self):
+        # Request connections are released in teardown, not by the route
+        if self.request_bound:
+            return
+        self.pool.release(self)
+
+    def close_for_real(self):
+        sqlite3.Connection.close(self)
+
+    def cursor(self, factory=None):
+        if factory is None and app.config['METRICS_ENABLED']:
+            factory = InstrumentedCursor
+        return super().cursor(factory) if factory is not None else super().cursor()
+
+    # sqlite3.Connection.execute() would bypass cursor() above
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections with hit/miss/wait counters"""
+
+    def __init__(self, database, max_size, timeout):
+        self.database = database
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self._idle = []
+        self._open = 0
+        self._cond = threading.Condition()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, factory=PooledConnection,
+                               check_same_thread=False,
+                               timeout=app.config['DB_BUSY_TIMEOUT_MS'] / 1000)
+        conn.pool = self
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f"PRAGMA busy_timeout={app.config['DB_BUSY_TIMEOUT_MS']}")
+        conn.execute(f"PRAGMA mmap_size={app.config['DB_MMAP_SIZE']}")
+        return conn
+
+    def acquire(self):
+        """Take an idle connection, open a new one, or wait for one to be released"""
+        with self._cond:
+            if not self._idle and self._open >= self.max_size:
+                self.waits += 1
+                started = time.perf_counter()
+                got_one = self._cond.wait_for(lambda: self._idle or self._open < self.max_size,
+                                              timeout=self.timeout)
+                self.wait_time += time.perf_counter() - started
+                if not got_one:
+                    raise sqlite3.OperationalError('Timed out waiting for a database connection')
+            if self._idle:
+                self.hits += 1
+                conn = self._idle.pop()
+                conn.released = False
+                return conn
+            self.misses += 1
+            self._open += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any uncommitted work"""
+        with self._cond:
+            if conn.released:
+                return
+            conn.released = True
+        conn.request_bound = False
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            conn.close_for_real()
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self._open,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'wait_time_ms': round(self.wait_time * 1000, 3)
+            }
+
+db_pool = ConnectionPool(app.config['DATABASE'], app.config['DB_POOL_SIZE'], app.config['DB_POOL_TIMEOUT'])
+
 def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect('paaksathi.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get database connection (shared for the whole request inside an app context)"""
+    if has_app_context():
+        conn = g.get('db')
+        if conn is None:
+            conn = db_pool.acquire()
+            conn.request_bound = True
+            g.db = conn
+        return conn
+    return db_pool.acquire()
+
+@app.teardown_appcontext
+def release_db_connection(exception):
+    """Return the request's connection to the pool"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.release(conn)
+
+# ==================== DETECTION CACHE ====================
+
+def hash_file(path):
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class DetectionCache:
+    """Two-tier cache for detection results keyed by image content"""
+
+    def __init__(self, memory_items, max_rows, ttl):
+        self.memory_items = memory_items
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.near_hits = 0
+        self.memory_evictions = 0
+        self.table_evictions = 0
+
+    def make_key(self, image_path, namespace, crop_type=''):
+        return f'{hash_file(image_path)}:{(crop_type or "").lower()}:{namespace}'
+
+    def _lookup(self, key):
+        """
+        (result, 'memory' | 'disk' | None) for an exact key. Not counted here:
+        get_or_compute() counts each lookup once, as its final outcome
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, result = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    return result, 'memory'
+                del self._memory[key]
+
+        # Own connection: committing the request's would also commit whatever
+        # the route has written so far. The cache writes are best effort; a
+        # busy database must not fail the scan
+        conn = db_pool.acquire()
+        try:
+            c = conn.cursor()
+            c.execute('SELECT result, created_at FROM detection_cache WHERE key = ?', (key,))
+            row = c.fetchone()
+            result = None
+            if row is not None:
+                fresh = now - row['created_at'] < self.ttl
+                if fresh:
+                    result = json.loads(row['result'])
+                    self._remember(key, row['created_at'], result)
+                else:
+                    cache_phash_index.discard(key)
+                try:
+                    if fresh:
+                        c.execute('UPDATE detection_cache SET last_used = ? WHERE key = ?', (now, key))
+                    else:
+                        c.execute('DELETE FROM detection_cache WHERE key = ?', (key,))
+                    conn.commit()
+                except sqlite3.OperationalError as e:
+                    print(f"Error updating detection cache: {str(e)}")
+        finally:
+            db_pool.release(conn)
+        return result, ('disk' if result is not None else None)
+
+    def _count(self, tier):
+        with self._lock:
+            if tier == 'memory':
+                self.memory_hits += 1
+            elif tier == 'disk':
+                self.disk_hits += 1
+            elif tier == 'near':
+                self.near_hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, key, result, phash=None):
+        now = time.time()
+        self._remember(key, now, result)
+        evicted = []
+        conn = db_pool.acquire()
+        try:
+            c = conn.cursor()
+            c.execute('''INSERT OR REPLACE INTO detection_cache (key, result, created_at, last_used, phash)
+                         VALUES (?, ?, ?, ?, ?)''',
+                      (key, json.dumps(result, ensure_ascii=False), now, now,
+                       format_phash(phash) if phash is not None else None))
+            c.execute('DELETE FROM detection_cache WHERE created_at < ? RETURNING key', (now - self.ttl,))
+            evicted = [row[0] for row in c.fetchall()]
+            # Keep only the most recently used rows
+            c.execute('''DELETE FROM detection_cache WHERE key IN
+                         (SELECT key FROM detection_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)
+                         RETURNING key''', (self.max_rows,))
+            evicted += [row[0] for row in c.fetchall()]
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            print(f"Error storing detection result: {str(e)}")
+            evicted = []
+        finally:
+            db_pool.release(conn)
+        for evicted_key in evicted:
+            cache_phash_index.discard(evicted_key)
+        with self._lock:
+            self.table_evictions += len(evicted)
+
+    def get_or_compute(self, image_path, namespace, compute, crop_type='', phash=None):
+        """Return a cached result for this image (or a near-duplicate of it), or compute and store it"""
+        key = self.make_key(image_path, namespace, crop_type)
+        result, tier = self._lookup(key)
+        if result is not None:
+            self._count(tier)
+            return result
+
+        if phash is None:
+            phash = image_phash(image_path)
+        if phash is not None:
+            # Same leaf re-photographed or re-compressed: reuse the earlier answer
+            suffix = key.split(':', 1)[1]
+            for distance, near_key in cache_phash_index.search(phash):
+                if near_key != key and near_key.split(':', 1)[1] == suffix:
+                    result, _ = self._lookup(near_key)
+                    if result is None:
+                        # Expired or evicted by another worker
+                        cache_phash_index.discard(near_key)
+                    else:
+                        self._count('near')
+                        self._remember(key, time.time(), result)
+                        return result
+
+        self._count(None)
+        result = compute()
+        self.put(key, result, phash)
+        return result
+
+    def _remember(self, key, created_at, result):
+        if self.memory_items <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (created_at, result)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+                self.memory_evictions += 1
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits + self.near_hits
+            lookups = hits + self.misses
+            return {
+                'memory_items': len(self._memory),
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'near_duplicate_hits': self.near_hits,
+                'memory_evictions': self.memory_evictions,
+                'table_evictions': self.table_evictions,
+                'hit_ratio': round(hits / lookups, 4) if lookups else 0.0
+            }
+
+detection_cache = DetectionCache(app.config['DETECTION_CACHE_MEMORY_ITEMS'],
+                                 app.config['DETECTION_CACHE_MAX_ROWS'],
+                                 app.config['DETECTION_CACHE_TTL'])
+
+# ==================== NEAR-DUPLICATE IMAGES ====================
+
+def compute_dhash(image, hash_size=8):
+    """64-bit difference hash of a PIL image"""
+    from PIL import Image
+    image.draft('L', (hash_size * 4, hash_size * 4))
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+def image_phash(image_path):
+    """dHash of an image file, or None if it can't be decoded"""
+    from PIL import Image
+    try:
+        with Image.open(image_path) as image:
+            return compute_dhash(image)
+    except Exception as e:
+        print(f"Error hashing image {image_path}: {str(e)}")
+        return None
+
+def format_phash(value):
+    return f'{value:016x}'
+
+class MultiIndexHashTable:
+    """
+    Hamming-distance index over 64-bit hashes.
+    The hash is split into max_distance + 1 chunks; any hash within
+    max_distance bits must match at least one chunk exactly.
+    """
+
+    def __init__(self, max_distance, bits=64):
+        self.max_distance = max_distance
+        chunks = min(max(max_distance + 1, 1), bits)
+        widths = [bits // chunks + (1 if i < bits % chunks else 0) for i in range(chunks)]
+        self.chunks = []
+        shift = bits
+        for width in widths:
+            shift -= width
+            self.chunks.append((shift, (1 << width) - 1))
+        self.tables = [{} for _ in self.chunks]
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        entry = (value, item)
+        for (shift, mask), table in zip(self.chunks, self.tables):
+            table.setdefault((value >> shift) & mask, []).append(entry)
+
+    def remove(self, value, item):
+        """Drop an entry added with add(); unknown entries are ignored"""
+        entry = (value, item)
+        removed = False
+        for (shift, mask), table in zip(self.chunks, self.tables):
+            bucket_key = (value >> shift) & mask
+            bucket = table.get(bucket_key)
+            if bucket and entry in bucket:
+                bucket.remove(entry)
+                removed = True
+                if not bucket:
+                    del table[bucket_key]
+        if removed:
+            self.size -= 1
+
+    def search(self, value, max_distance=None):
+        """All (distance, item) pairs within max_distance, closest first"""
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        if max_distance < 0:
+            return []
+        found = {}
+        for (shift, mask), table in zip(self.chunks, self.tables):
+            for candidate, item in table.get((value >> shift) & mask, ()):
+                distance = (value ^ candidate).bit_count()
+                if distance <= max_distance:
+                    found[id(item), candidate] = (distance, item)
+        return sorted(found.values(), key=lambda pair: pair[0])
+
+class PhashIndex:
+    """
+    In-memory Hamming index that catches up with new rows of a table on each
+    lookup. Deleted rows are dropped with discard(); rows deleted by other
+    workers are dropped when the index outgrows max_size and is rebuilt from
+    the live table. For tables whose rowids can be reused, max_rowid_query
+    detects that and triggers a rebuild too.
+    """
+
+    def __init__(self, query, max_size=None, max_rowid_query=None):
+        # query must select (rowid, phash, item) for rows with rowid > ?
+        self.query = query
+        self.max_size = max_size
+        self.max_rowid_query = max_rowid_query
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.table = MultiIndexHashTable(app.config['NEAR_DUPLICATE_DISTANCE'])
+        self.values = {}
+        self.last_rowid = 0
+
+    def refresh(self):
+        """
+        Catch up with the table. The database is read without holding the
+        lock, so concurrent searches only wait for the in-memory update.
+        """
+        with self._lock:
+            last_rowid = self.last_rowid
+            rebuild = self.max_size is not None and self.table.size > self.max_size
+        conn = get_db_connection()
+        c = conn.cursor()
+        if not rebuild and self.max_rowid_query is not None:
+            # Without AUTOINCREMENT, deleting the newest rows lets SQLite hand out their rowids again
+            c.execute(self.max_rowid_query)
+            rebuild = (c.fetchone()[0] or 0) < last_rowid
+        c.execute(self.query, (0 if rebuild else last_rowid,))
+        rows = c.fetchall()
+        conn.close()
+
+        if rebuild:
+            # Built aside and swapped in whole
+            table = MultiIndexHashTable(app.config['NEAR_DUPLICATE_DISTANCE'])
+            values = {}
+            for rowid, phash, item in rows:
+                values[item] = int(phash, 16)
+                table.add(values[item], item)
+            with self._lock:
+                self.table, self.values = table, values
+                self.last_rowid = rows[-1][0] if rows else 0
+        else:
+            with self._lock:
+                # Another search may have applied some of these meanwhile
+                self._apply([row for row in rows if row[0] > self.last_rowid])
+
+    def _apply(self, rows):
+        for rowid, phash, item in rows:
+            # A replaced row comes back under a new rowid
+            self._discard(item)
+            self.values[item] = int(phash, 16)
+            self.table.add(self.values[item], item)
+            self.last_rowid = max(self.last_rowid, rowid)
+
+    def search(self, phash, max_distance=None):
+        self.refresh()
+        with self._lock:
+            return self.table.search(phash, max_distance)
+
+    def discard(self, item):
+        """Forget an item whose row was deleted"""
+        with self._lock:
+            self._discard(item)
+
+    def _discard(self, item):
+        value = self.values.pop(item, None)
+        if value is not None:
+            self.table.remove(value, item)
+
+scan_phash_index = PhashIndex('''SELECT id, phash, id FROM scans
+                                WHERE id > ? AND phash IS NOT NULL ORDER BY id''')
+cache_phash_index = PhashIndex('''SELECT rowid, phash, key FROM detection_cache
+                                 WHERE rowid > ? AND phash IS NOT NULL ORDER BY rowid''',
+                               max_size=2 * app.config['DETECTION_CACHE_MAX_ROWS'],
+                               max_rowid_query='SELECT MAX(rowid) FROM detection_cache')
+
+# ==================== STATIC ASSETS ====================
+
+# One stylesheet and one script per page, concatenated in this order from
+# files under static/. Pages include them with asset_urls('<bundle>').
+ASSET_BUNDLES = {
+    'site.css': ['css/style.css'],
+    'site.js': ['js/main.js'],
+    'admin.css': ['css/style.css', 'css/admin.css'],
+    'admin.js': ['js/main.js', 'js/admin.js'],
+    'auth.css': ['css/style.css', 'css/auth.css'],
+    'auth.js': ['js/main.js', 'js/auth.js'],
+    'dashboard.css': ['css/style.css', 'css/dashboard.css'],
+    'dashboard.js': ['js/main.js', 'js/dashboard.js'],
+    'result.css': ['css/style.css', 'css/result.css'],
+    'result.js': ['js/main.js', 'js/result.js'],
+    'upload.css': ['css/style.css', 'css/upload.css'],
+    'upload.js': ['js/main.js', 'js/upload.js'],
+    'weather.css': ['css/style.css', 'css/weather.css'],
+    'weather.js': ['js/main.js', 'js/weather.js'],
+}
+ASSET_DIST = 'dist'
+ASSET_MANIFEST = os.path.join(ASSET_DIST, 'manifest.json')
+
+JS_IDENTIFIER = re.compile(r'[\w$]+')
+# After these a '/' starts a regex literal rather than a division
+JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'throw', 'new',
+                     'delete', 'instanceof', 'yield', 'await'}
+
+def js_needs_space(before, after):
+    """Whether dropping the space between two characters would join two tokens"""
+    def word(ch):
+        return ch.isalnum() or ch in '_$\\' or ord(ch) > 127
+    return ((word(before) and (word(after) or after == '.'))
+            or (before in '+-/' and after in '+-/'))
+
+def minify_css(source):
+    """Drop comments and the whitespace CSS ignores; strings are kept as they are"""
+    out = []
+    i, n = 0, len(source)
+    space = False
+    while i < n:
+        ch = source[i]
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+            space = True
+            continue
+        if ch.isspace():
+            space = True
+            i += 1
+            continue
+        if space:
+            # Only the space between two words/values matters ("a b", "0 auto", "and (")
+            if out and out[-1][-1] not in '{};,>:(' and ch not in '{};,>)':
+                out.append(' ')
+            space = False
+        if ch in '"\'':
+            end = i + 1
+            while end < n and source[end] != ch:
+                end += 2 if source[end] == '\\' else 1
+            out.append(source[i:end + 1])
+            i = end + 1
+            continue
+        if ch == '}' and out and out[-1] == ';':
+            out.pop()
+        out.append(ch)
+        i += 1
+    return ''.join(out)
+
+def minify_js(source):
+    """
+    Conservative JS minifier: drops comments and the spaces between tokens but
+    keeps every line break, so automatic semicolon insertion is unaffected.
+    """
+    out = []
+    i, n = 0, len(source)
+    space = newline = False
+    last = last_word = ''
+    depth = 0
+    templates = []  # brace depth of each open ${ } inside a template literal
+
+    def template_end(i):
+        # Index after the closing ` or after an opening ${, and which one it was
+        while i < n:
+            if source[i] == '\\':
+                i += 2
+            elif source[i] == '`':
+                return i + 1, False
+            elif source.startswith('${', i):
+                return i + 2, True
+            else:
+                i += 1
+        return n, False
+
+    while i < n:
+        ch = source[i]
+        if ch.isspace():
+            newline = newline or ch == '\n'
+            space = True
+            i += 1
+            continue
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            newline = newline or '\n' in source[i:end]
+            space = True
+            i = end
+            continue
+
+        if out:
+            if newline:
+                out.append('\n')
+            elif space and js_needs_space(out[-1][-1], ch):
+                out.append(' ')
+        space = newline = False
+
+        if ch in '"\'' or (ch == '/' and (last in JS_REGEX_PRECEDERS or last == '' or last_word in JS_REGEX_KEYWORDS)):
+            # String or regex literal, copied as is
+            end = i + 1
+            in_class = False
+            while end < n and source[end] != '\n':
+                c = source[end]
+                if c == '\\':
+                    end += 2
+                    continue
+                if ch == '/' and c == '[':
+                    in_class = True
+                elif ch == '/' and c == ']':
+                    in_class = False
+                elif c == ch and not in_class:
+                    break
+                end += 1
+            end += 1
+            if ch == '/':
+                match = JS_IDENTIFIER.match(source, end)
+                end = match.end() if match else end
+            out.append(source[i:end])
+            i = end
+            last, last_word = 'a', ''
+            continue
+        if ch == '`' or (ch == '}' and templates and depth - 1 == templates[-1]):
+            if ch == '}':
+                depth = templates.pop()
+            end, opened = template_end(i + 1)
+            if opened:
+                templates.append(depth)
+                depth += 1
+            out.append(source[i:end])
+            i = end
+            last, last_word = ('{', '') if opened else ('a', '')
+            continue
+        match = JS_IDENTIFIER.match(source, i)
+        if match:
+            out.append(match.group())
+            i = match.end()
+            last, last_word = 'a', match.group()
+            continue
+        if ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+        out.append(ch)
+        i += 1
+        last, last_word = ch, ''
+    return ''.join(out) + '\n'
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def fingerprinted_name(path, content):
+    """css/style.css -> dist/css/style.<hash of content>.css"""
+    stem, ext = os.path.splitext(path)
+    return f"{ASSET_DIST}/{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+def write_asset(static_folder, path, content, compressors):
+    """Write one built file plus its precompressed variants; returns the sizes written"""
+    full_path = os.path.join(static_folder, path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with open(full_path, 'wb') as f:
+        f.write(content)
+    sizes = {'raw': len(content)}
+    for suffix, compress in compressors.items():
+        compressed = compress(content)
+        # Not worth a variant (nor the Content-Encoding) if it isn't smaller
+        if len(compressed) < len(content):
+            with open(full_path + suffix, 'wb') as f:
+                f.write(compressed)
+            sizes[suffix] = len(compressed)
+    return sizes
+
+class AssetBuildError(Exception):
+    pass
+
+def check_js_syntax(scripts):
+    """
+    Run `node --check` on each {name: content} script; returns the error
+    messages. The minifier is regex based, so this catches it breaking code.
+    """
+    if shutil.which('node') is None:
+        raise AssetBuildError("node is needed to check the minified JS (or pass --no-js-check)")
+    errors = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, content in scripts.items():
+            path = os.path.join(tmp, name.replace('/', '_'))
+            with open(path, 'wb') as f:
+                f.write(content)
+            result = subprocess.run(['node', '--check', path], capture_output=True, text=True)
+            if result.returncode != 0:
+                errors.append(f"{name}: {result.stderr.strip()}")
+    return errors
+
+def build_assets(static_folder, clean=False, check_js=True):
+    """
+    Minify and fingerprint every bundle in ASSET_BUNDLES, and each of their
+    source files on its own, into static/dist/ with .gz (and .br if the
+    brotli package is installed) variants. Returns the manifest.
+    Raises AssetBuildError, before writing anything, if a minified script
+    does not parse.
+    """
+    compressors = {'.gz': lambda data: gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli
+        compressors['.br'] = lambda data: brotli.compress(data, quality=11)
+    except ImportError:
+        print("brotli is not installed, writing gzip variants only (pip install brotli)")
+
+    minified = {}
+    for sources in ASSET_BUNDLES.values():
+        for source in sources:
+            if source not in minified:
+                with open(os.path.join(static_folder, source), encoding='utf-8') as f:
+                    minify = MINIFIERS[os.path.splitext(source)[1]]
+                    minified[source] = minify(f.read()).encode('utf-8')
+    bundled = {}
+    for bundle, sources in ASSET_BUNDLES.items():
+        # ';' keeps a file without a trailing semicolon from running into the next one
+        separator = b';\n' if bundle.endswith('.js') else b'\n'
+        bundled[bundle] = separator.join(minified[source] for source in sources)
+
+    if check_js:
+        errors = check_js_syntax({name: content for name, content in {**minified, **bundled}.items()
+                                  if name.endswith('.js')})
+        if errors:
+            raise AssetBuildError("Minified JS does not parse:\n" + '\n'.join(errors))
+
+    dist = os.path.join(static_folder, ASSET_DIST)
+    if clean and os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    manifest = {'bundles': {}, 'files': {}}
+    for source, content in minified.items():
+        manifest['files'][source] = fingerprinted_name(source, content)
+        write_asset(static_folder, manifest['files'][source], content, compressors)
+    for bundle, sources in ASSET_BUNDLES.items():
+        content = bundled[bundle]
+        manifest['bundles'][bundle] = fingerprinted_name(bundle, content)
+        sizes = write_asset(static_folder, manifest['bundles'][bundle], content, compressors)
+        original = sum(os.path.getsize(os.path.join(static_folder, source)) for source in sources)
+        print(f"{bundle:<15} {original:>7} -> {sizes['raw']:>7} bytes "
+              + ' '.join(f"{suffix[1:]} {size}" for suffix, size in sizes.items() if suffix != 'raw'))
+
+    # Written last: pages switch to the new build only once all of it is in place
+    manifest_path = os.path.join(static_folder, ASSET_MANIFEST)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+@app.cli.command('build-assets')
+@click.option('--clean', is_flag=True, help='Delete earlier builds first')
+@click.option('--no-js-check', is_flag=True, help='Skip the `node --check` of the minified JS')
+def build_assets_command(clean, no_js_check):
+    """Minify, bundle and fingerprint static CSS/JS into static/dist (run on deploy)"""
+    try:
+        manifest = build_assets(app.static_folder, clean, check_js=not no_js_check)
+    except AssetBuildError as e:
+        raise click.ClickException(str(e))
+    print(f"Built {len(manifest['bundles'])} bundles, manifest at static/{ASSET_MANIFEST}")
+
+_asset_manifest = {'mtime': None, 'bundles': {}, 'files': {}}
+
+def load_asset_manifest():
+    """The build manifest; re-read when a new build replaces it, empty if there is none"""
+    global _asset_manifest
+    try:
+        mtime = os.stat(os.path.join(app.static_folder, ASSET_MANIFEST)).st_mtime
+    except OSError:
+        mtime = None
+    if mtime != _asset_manifest['mtime']:
+        manifest = {'bundles': {}, 'files': {}}
+        if mtime is not None:
+            try:
+                with open(os.path.join(app.static_folder, ASSET_MANIFEST), encoding='utf-8') as f:
+                    manifest.update(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Error loading asset manifest: {str(e)}")
+        manifest['mtime'] = mtime
+        _asset_manifest = manifest
+    return _asset_manifest
+
+@app.template_global()
+def asset_urls(bundle):
+    """URLs a page includes for a bundle: the built file, or its sources when nothing is built"""
+    built = load_asset_manifest()['bundles'].get(bundle) if app.config['ASSET_BUNDLING'] else None
+    if built:
+        return [url_for('static', filename=built)]
+    return [url_for('static', filename=source) for source in ASSET_BUNDLES[bundle]]
+
+@app.url_defaults
+def fingerprint_static_url(endpoint, values):
+    """url_for('static', filename='js/main.js') points at the built copy when there is one"""
+    if endpoint == 'static' and app.config['ASSET_BUNDLING']:
+        built = load_asset_manifest()['files'].get(values.get('filename'))
+        if built:
+            values['filename'] = built
+
+def send_static_asset(filename):
+    """
+    Static files. Fingerprinted builds never change, so they are cached as
+    immutable and sent precompressed when the client accepts br or gzip.
+    """
+    if not filename.startswith(ASSET_DIST + '/'):
+        return app.send_static_file(filename)
+    max_age = app.config['STATIC_IMMUTABLE_MAX_AGE']
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        variant = safe_join(app.static_folder, filename + suffix)
+        if request.accept_encodings[encoding] and variant and os.path.isfile(variant):
+            response = send_from_directory(app.static_folder, filename + suffix, max_age=max_age,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, filename, max_age=max_age)
+    response.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+app.view_functions['static'] = send_static_asset
 
 # ==================== ROUTES ====================
 
@@ -232,10 +1898,13 @@ def upload_page():
             os.makedirs(upload_dir, exist_ok=True)
 
             filename = secure_filename(file.filename)
-            image_path = os.path.join(upload_dir, filename)
-            file.save(image_path)
+            image_path = save_preprocessed_upload(file, upload_dir, filename)
+            if image_path is None:
+                return render_template('pages/upload.html'), 400
 
-            ai_result = detect_crop_disease(image_path)
+            # Always answered inline: this is an HTML form post, so SCAN_ASYNC
+            # (job IDs to poll) applies to /api/scan/upload only
+            ai_result = detect_crop_disease_with_fallback(image_path)
 
             return render_template(
                 'pages/result.html',
@@ -321,13 +1990,11 @@ def profile_page():
     conn = get_db_connection()
     c = conn.cursor()
 
-    # Total visits (site-wide)
-    c.execute('SELECT COUNT(*) as count FROM visits')
-    total_visits = c.fetchone()['count']
-
-    # Total scans by user
-    c.execute('SELECT COUNT(*) as count FROM scans WHERE user_id = ?', (user_id,))
-    total_scans = c.fetchone()['count']
+    # Total visits (site-wide) and total scans by user
+    user_scans_key = f'scans:user:{user_id}'
+    counters = read_counters(c, ['visits', user_scans_key])
+    total_visits = counters['visits'] + visit_buffer.pending_count()
+    total_scans = counters[user_scans_key]
 
     conn.close()
 
@@ -351,13 +2018,232 @@ def track_visit_api():
     track_visit(request.remote_addr)
     return jsonify({'success': True})
 
-def track_visit(ip_address):
-    """Track website visit"""
+class VisitBuffer:
+    """In-memory buffer that writes visits to the database in batches"""
+
+    def __init__(self, max_size, flush_interval, max_pending):
+        self.max_size = max(1, max_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max(self.max_size, max_pending)
+        self.dropped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def add(self, ip_address):
+        """Queue a visit; flush immediately once the batch is full"""
+        now = datetime.utcnow()
+        row = (ip_address, now.strftime('%Y-%m-%d %H:%M:%S'), now.strftime('%Y-%m-%d'))
+        with self._lock:
+            self._pending.append(row)
+            self._trim()
+            full = len(self._pending) >= self.max_size
+        if full or self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def pending_count(self):
+        """Number of visits not yet written to the database"""
+        with self._lock:
+            return len(self._pending)
+
+    def _trim(self):
+        # Caller holds self._lock
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+
+    def flush(self):
+        """Write all queued visits in a single transaction"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            try:
+                per_day = {}
+                for row in rows:
+                    per_day[row[2]] = per_day.get(row[2], 0) + 1
+                # Its own connection, never the request's: the commit below
+                # must not take along a request's half-done work
+                conn = db_pool.acquire()
+                try:
+                    c = conn.cursor()
+                    c.executemany('INSERT INTO visits (ip_address, visit_time, date) VALUES (?, ?, ?)', rows)
+                    for day, amount in per_day.items():
+                        bump_counter(c, 'visits', amount, day)
+                    conn.commit()
+                finally:
+                    db_pool.release(conn)
+            except Exception as e:
+                print(f"Error flushing visits: {str(e)}")
+                # Put the batch back so the next flush can retry it
+                with self._lock:
+                    self._pending[:0] = rows
+                    self._trim()
+                return 0
+            admin_events.publish('visits', {
+                'count': len(rows),
+                'recent': [{'ip_address': ip_address, 'visit_time': visit_time, 'date': date}
+                           for ip_address, visit_time, date in rows[-10:]]
+            })
+            return len(rows)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='visit-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+visit_buffer = VisitBuffer(app.config['VISIT_BUFFER_SIZE'], app.config['VISIT_FLUSH_INTERVAL'],
+                           app.config['VISIT_BUFFER_MAX'])
+
+# Write out whatever is still queued when the worker exits
+atexit.register(visit_buffer.flush)
+
+def track_visit(ip_address):
+    """Track website visit"""
+    visit_buffer.add(ip_address)
+
+# -------------------- Visits maintenance --------------------
+
+def rollup_old_visits(conn, retention_days, batch_size):
+    """
+    Roll up raw visits older than the retention window into visit_rollups,
+    then delete them in small batches so no write lock is held for long
+    """
+    c = conn.cursor()
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+    
+    # Rolled-up days are final; only days not yet rolled up are added
+    c.execute('''INSERT INTO visit_rollups (date, visits, unique_ips)
+                 SELECT date, COUNT(*), COUNT(DISTINCT ip_address) FROM visits
+                 WHERE date < ? AND date NOT IN (SELECT date FROM visit_rollups)
+                 GROUP BY date''', (cutoff,))
+    rolled_up = c.rowcount
+    conn.commit()
+    
+    deleted = 0
+    while True:
+        c.execute('''DELETE FROM visits WHERE id IN
+                     (SELECT id FROM visits WHERE date < ?
+                      AND date IN (SELECT date FROM visit_rollups) LIMIT ?)''',
+                  (cutoff, batch_size))
+        conn.commit()
+        deleted += c.rowcount
+        if c.rowcount < batch_size:
+            break
+        # Let waiting writers in between batches
+        time.sleep(0.05)
+    return rolled_up, deleted
+
+def incremental_vacuum(conn, pages_per_step):
+    """Return free pages to the OS a few at a time (needs auto_vacuum=INCREMENTAL)"""
+    c = conn.cursor()
+    c.execute('PRAGMA auto_vacuum')
+    if c.fetchone()[0] != 2:
+        return None
+    freed = 0
+    while True:
+        c.execute('PRAGMA freelist_count')
+        free_pages = c.fetchone()[0]
+        if free_pages == 0:
+            break
+        c.execute(f'PRAGMA incremental_vacuum({pages_per_step})')
+        c.fetchall()
+        freed += min(free_pages, pages_per_step)
+        time.sleep(0.01)
+    return freed
+
+def maintain_visits():
+    """Retention, rollup and compaction for the visits table"""
+    visit_buffer.flush()
+    conn = get_db_connection()
+    try:
+        rolled_up, deleted = rollup_old_visits(conn, app.config['VISIT_RETENTION_DAYS'],
+                                               app.config['VISIT_DELETE_BATCH'])
+        freed = incremental_vacuum(conn, app.config['VACUUM_PAGES_PER_STEP'])
+    finally:
+        conn.close()
+    return {'days_rolled_up': rolled_up, 'visits_deleted': deleted, 'pages_freed': freed}
+
+def claim_periodic_run(name, interval_seconds):
+    """True for exactly one worker once per interval"""
+    now = time.time()
     conn = get_db_connection()
     c = conn.cursor()
-    c.execute('INSERT INTO visits (ip_address) VALUES (?)', (ip_address,))
+    c.execute('INSERT OR IGNORE INTO maintenance_runs (name, last_run) VALUES (?, 0)', (name,))
+    c.execute('UPDATE maintenance_runs SET last_run = ? WHERE name = ? AND last_run <= ?',
+              (now, name, now - interval_seconds))
+    claimed = c.rowcount == 1
     conn.commit()
     conn.close()
+    return claimed
+
+def run_visit_maintenance_loop(interval_seconds):
+    while True:
+        try:
+            if claim_periodic_run('visits', interval_seconds):
+                print(f"Visit maintenance: {maintain_visits()}")
+        except Exception as e:
+            print(f"Error in visit maintenance: {str(e)}")
+        time.sleep(min(interval_seconds, 3600))
+
+def start_visit_maintenance():
+    interval_hours = app.config['VISIT_MAINTENANCE_INTERVAL_HOURS']
+    # Not before `flask init-db` has created the tables
+    if interval_hours > 0 and database_is_current():
+        threading.Thread(target=run_visit_maintenance_loop, args=(interval_hours * 3600,),
+                         name='visit-maintenance', daemon=True).start()
+
+@app.cli.command('maintain-visits')
+@click.option('--enable-incremental-vacuum', is_flag=True,
+              help='Switch an existing database to auto_vacuum=INCREMENTAL (runs a full VACUUM once).')
+def maintain_visits_command(enable_incremental_vacuum):
+    """Roll up and delete old raw visits, then reclaim free pages"""
+    if enable_incremental_vacuum:
+        conn = sqlite3.connect(app.config['DATABASE'])
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        conn.close()
+        print("auto_vacuum set to INCREMENTAL")
+    print(f"Visit maintenance: {maintain_visits()}")
+
+@app.route('/api/admin/visit-history', methods=['GET'])
+def admin_visit_history():
+    """Daily visits and unique IPs: rollups for old days, raw rows for the recent tail"""
+    try:
+        if 'admin_id' not in session:
+            return jsonify({'success': False, 'message': 'અનધિકૃત પ્રવેશ'}), 401
+        days = min(max(request.args.get('days', 30, type=int), 1), 3650)
+        since = (datetime.utcnow() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+        
+        visit_buffer.flush()
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute('''SELECT date, visits, unique_ips FROM visit_rollups WHERE date >= ?
+                     UNION ALL
+                     SELECT date, COUNT(*), COUNT(DISTINCT ip_address) FROM visits
+                     WHERE date >= ? AND date NOT IN (SELECT date FROM visit_rollups)
+                     GROUP BY date
+                     ORDER BY date''', (since, since))
+        history = [dict(row) for row in c.fetchall()]
+        conn.close()
+        return jsonify({'success': True, 'history': history})
+    except Exception as e:
+        print(f"Error in admin_visit_history: {str(e)}")
+        return jsonify({'success': False, 'message': 'Error fetching visit history'}), 500
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
@@ -365,24 +2251,15 @@ def get_stats():
     conn = get_db_connection()
     c = conn.cursor()
     
-    # Total visits
-    c.execute('SELECT COUNT(*) as count FROM visits')
-    total_visits = c.fetchone()['count']
-    
-    # Total scans
-    c.execute('SELECT COUNT(*) as count FROM scans')
-    total_scans = c.fetchone()['count']
-    
-    # Total users
-    c.execute('SELECT COUNT(*) as count FROM users')
-    total_users = c.fetchone()['count']
+    # Totals come from the counters table (visits still waiting in the buffer are added on top)
+    counters = read_counters(c, ['visits', 'scans', 'users'])
     
     conn.close()
     
     return jsonify({
-        'total_visits': total_visits,
-        'total_scans': total_scans,
-        'total_users': total_users
+        'total_visits': counters['visits'] + visit_buffer.pending_count(),
+        'total_scans': counters['scans'],
+        'total_users': counters['users']
     })
 
 @app.route('/api/user/signup', methods=['POST'])
@@ -416,9 +2293,11 @@ def user_signup():
             c.execute('''INSERT INTO users (name, mobile, email, password) 
                          VALUES (?, ?, ?, ?)''', 
                       (name, mobile, email, password))
-            conn.commit()
             user_id = c.lastrowid
+            bump_counter(c, 'users')
+            conn.commit()
             conn.close()
+            admin_events.publish('user', {'id': user_id, 'name': name})
             
             session['user_id'] = user_id
             session['user_name'] = name
@@ -491,8 +2370,8 @@ def get_user_profile():
     user = c.fetchone()
     
     # User's scan count
-    c.execute('SELECT COUNT(*) as count FROM scans WHERE user_id = ?', (user_id,))
-    user_scans = c.fetchone()['count']
+    user_scans_key = f'scans:user:{user_id}'
+    user_scans = read_counters(c, [user_scans_key])[user_scans_key]
     
     conn.close()
     
@@ -527,50 +2406,389 @@ def scan_upload():
         filename = secure_filename(file.filename)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        filepath = save_preprocessed_upload(file, app.config['UPLOAD_FOLDER'], filename)
+        if filepath is None:
+            return jsonify({'success': False, 'message': 'છબી વાંચી શકાઈ નથી. કૃપા કરીને બીજી છબી અપલોડ કરો'}), 400
         
-        # Detect disease using ML model or mock data
-        disease_result = detect_disease(filepath, crop_type)
-        
-        # Save scan to database (increments scan count)
         user_id = session.get('user_id')
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute('''INSERT INTO scans (user_id, crop_type, disease_name, image_path) 
-                     VALUES (?, ?, ?, ?)''',
-                  (user_id, crop_type, disease_result['disease_name'], filepath))
-        conn.commit()
-        conn.close()
         
-        return jsonify({
-            'success': True,
-            'result': disease_result,
-            'image_path': filepath
-        })
+        if wants_async():
+            job_id = scan_jobs.submit('scan', run_scan, filepath, crop_type, user_id)
+            if job_id is None:
+                os.remove(filepath)
+                return scan_queue_full_response()
+            return scan_job_accepted_response(job_id)
+        
+        return jsonify({'success': True, **run_scan(filepath, crop_type, user_id)})
     
+    except GeminiUnavailable:
+        response = jsonify({'success': False, 'message': GEMINI_UNAVAILABLE_TEXT})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
     except Exception as e:
         print(f"Error in scan_upload: {str(e)}")
         return jsonify({'success': False, 'message': 'સ્કેન દરમિયાન ભૂલ આવી. કૃપા કરીને ફરી પ્રયાસ કરો.'}), 500
 
-def detect_disease(image_path, crop_type):
+def run_scan(filepath, crop_type, user_id):
+    """Detect disease for a saved upload and record the scan"""
+    disease_result, phash, duplicate_of = detect_scan(filepath, crop_type)
+    
+    # Save scan to database (increments scan count)
+    save_scans([(user_id, crop_type, disease_result['disease_name'], filepath, phash, duplicate_of)])
+    
+    return {'result': disease_result, 'image_path': filepath}
+
+def detect_scan(filepath, crop_type):
+    """Run detection for a saved upload; returns (result, phash, duplicate_of)"""
+    # Look for an earlier scan of the same leaf before this one is indexed
+    phash = image_phash(filepath)
+    duplicate_of = None
+    if phash is not None:
+        matches = scan_phash_index.search(phash)
+        if matches:
+            duplicate_of = matches[0][1]
+    
+    # Detect disease using ML model or mock data
+    disease_result = detect_disease(filepath, crop_type, phash)
+    return disease_result, phash, duplicate_of
+
+def save_scans(scans):
+    """Insert (user_id, crop_type, disease_name, image_path, phash, duplicate_of) rows in one transaction"""
+    if not scans:
+        return
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.executemany('''INSERT INTO scans (user_id, crop_type, disease_name, image_path, phash, duplicate_of) 
+                     VALUES (?, ?, ?, ?, ?, ?)''',
+                  [(user_id, crop_type, disease_name, image_path,
+                    format_phash(phash) if phash is not None else None, duplicate_of)
+                   for user_id, crop_type, disease_name, image_path, phash, duplicate_of in scans])
+    bump_counter(c, 'scans', len(scans))
+    bump_scan_daily_stats(c, [(scan[1], scan[2]) for scan in scans])
+    per_user = {}
+    for scan in scans:
+        if scan[0] is not None:
+            per_user[scan[0]] = per_user.get(scan[0], 0) + 1
+    for user_id, amount in per_user.items():
+        bump_counter(c, f'scans:user:{user_id}', amount)
+    conn.commit()
+    conn.close()
+    admin_events.publish('scans', {
+        'count': len(scans),
+        'scans': [{'crop': scan[1], 'disease': scan[2]} for scan in scans]
+    })
+
+# -------------------- Bulk scans --------------------
+
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+def get_batch_executor():
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ThreadPoolExecutor(max_workers=max(1, app.config['SCAN_WORKERS']),
+                                                 thread_name_prefix='batch-scan')
+    return _batch_executor
+
+class BatchTooLarge(Exception):
+    """A bulk upload has too many files or too many bytes once unzipped"""
+
+def too_many_batch_files():
+    return BatchTooLarge(f"એક સાથે વધુમાં વધુ {app.config['BATCH_MAX_FILES']} ફાઇલો અપલોડ કરો")
+
+def collect_batch_files():
     """
-    Detect crop disease from image
-    This function can use ML model or return mock data
-    """
-    # Check if ML model exists and use it
-    model_path = 'model/crop_disease_model.h5'
-    if os.path.exists(model_path):
-        # TODO: Load and use actual ML model
-        # Example:
-        # from tensorflow import keras
-        # model = keras.models.load_model(model_path)
-        # prediction = model.predict(preprocessed_image)
-        # return format_prediction(prediction, crop_type)
-        pass
+    Files of a bulk upload as (filename, FileStorage, crop_type).
+    Accepts several 'files' parts or one zip 'archive'. Crop types come from
+    repeated 'crop_types' fields (in file order), a JSON object in 'crop_types'
+    mapping filename to crop, or the 'crop_type' default.
+    Zip members above the single-upload limit come back with file None, so
+    the caller can report them. Raises BatchTooLarge before unpacking
+    anything if the limits are exceeded.
+    """
+    default_crop = request.form.get('crop_type', 'cotton')
+    crop_types = request.form.getlist('crop_types')
+    crop_map = {}
+    if len(crop_types) == 1 and crop_types[0].lstrip().startswith('{'):
+        crop_map = json.loads(crop_types[0])
+        crop_types = []
+
+    items = []
+    archive = request.files.get('archive')
+    if archive and archive.filename:
+        with zipfile.ZipFile(archive.stream) as zf:
+            # Guard against zip bombs using the sizes in the central directory
+            # (reads never return more than those): no member above the
+            # single-upload limit, and caps on members and total size
+            members = []
+            total_size = 0
+            for info in zf.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or not name or not allowed_file(name):
+                    continue
+                members.append((name, info))
+                if info.file_size <= app.config['MAX_CONTENT_LENGTH']:
+                    total_size += info.file_size
+                if len(members) > app.config['BATCH_MAX_FILES']:
+                    raise too_many_batch_files()
+                if total_size > app.config['BATCH_MAX_CONTENT_LENGTH']:
+                    raise BatchTooLarge('ફાઇલોનું કુલ કદ ખૂબ મોટું છે')
+            for name, info in members:
+                if info.file_size > app.config['MAX_CONTENT_LENGTH']:
+                    items.append((name, None))
+                    continue
+                # Unpacked to disk one at a time rather than held in memory
+                stream = tempfile.TemporaryFile()
+                with zf.open(info) as member:
+                    shutil.copyfileobj(member, stream)
+                stream.seek(0)
+                items.append((name, FileStorage(stream=stream, filename=name)))
+    else:
+        items = [(f.filename, f) for f in request.files.getlist('files') if f and f.filename]
+        if len(items) > app.config['BATCH_MAX_FILES']:
+            raise too_many_batch_files()
+
+    result = []
+    for index, (name, file) in enumerate(items):
+        if index < len(crop_types) and crop_types[index]:
+            crop_type = crop_types[index]
+        else:
+            crop_type = crop_map.get(name, default_crop)
+        result.append((name, file, crop_type))
+    return result
+
+def process_batch_item(file, filename, crop_type):
+    """Preprocess and detect one image of a bulk upload (runs on the batch pool)"""
+    if not allowed_file(filename):
+        return {'success': False, 'message': 'અમાન્ય ફાઇલ પ્રકાર'}, None
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    stored_name = f"{timestamp}_{secure_filename(filename)}"
+    try:
+        filepath = save_preprocessed_upload(file, app.config['UPLOAD_FOLDER'], stored_name)
+    finally:
+        file.close()
+    if filepath is None:
+        return {'success': False, 'message': 'છબી વાંચી શકાઈ નથી'}, None
+    disease_result, phash, duplicate_of = detect_scan(filepath, crop_type)
+    scan = (crop_type, disease_result['disease_name'], filepath, phash, duplicate_of)
+    return {'success': True, 'result': disease_result, 'image_path': filepath}, scan
+
+@app.route('/api/scan/batch', methods=['POST'])
+def scan_batch_upload():
+    """
+    Bulk crop image upload. Streams one JSON line per image as soon as it is
+    detected, then a summary line once all scans are saved.
+    """
+    try:
+        files = collect_batch_files()
+    except BatchTooLarge as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except (zipfile.BadZipFile, ValueError) as e:
+        print(f"Error in scan_batch_upload: {str(e)}")
+        return jsonify({'success': False, 'message': 'અમાન્ય વિનંતી'}), 400
     
-    # For now, return mock data based on crop type
-    return detect_disease_mock(crop_type)
+    if not files:
+        return jsonify({'success': False, 'message': 'કોઈ ફાઇલ પ્રદાન કરવામાં આવી નથી'}), 400
+    
+    user_id = session.get('user_id')
+    executor = get_batch_executor()
+    futures = {}
+    too_large = 0
+    for index, (filename, file, crop_type) in enumerate(files):
+        if file is None:
+            # Never unpacked; reported in order with the other results
+            future = Future()
+            future.set_result(({'success': False, 'error': 'file too large',
+                                'message': 'ફાઇલ ખૂબ મોટી છે'}, None))
+            too_large += 1
+        else:
+            future = executor.submit(process_batch_item, file, filename, crop_type)
+        futures[future] = (index, filename, crop_type)
+    
+    def generate():
+        scans = []
+        saved = False
+        try:
+            for future in as_completed(futures):
+                index, filename, crop_type = futures[future]
+                try:
+                    payload, scan = future.result()
+                except Exception as e:
+                    print(f"Error in scan_batch_upload ({filename}): {str(e)}")
+                    payload, scan = {'success': False, 'message': 'સ્કેન દરમિયાન ભૂલ આવી'}, None
+                if scan is not None:
+                    scans.append((user_id, *scan))
+                line = {'index': index, 'filename': filename, 'crop_type': crop_type, **payload}
+                yield json.dumps(line, ensure_ascii=False) + '\n'
+            
+            try:
+                save_scans(scans)
+                saved = True
+                summary = {'done': True, 'success': True, 'total': len(futures), 'saved': len(scans),
+                           'too_large': too_large}
+            except Exception as e:
+                print(f"Error saving batch scans: {str(e)}")
+                summary = {'done': True, 'success': False, 'total': len(futures), 'saved': 0,
+                           'too_large': too_large, 'message': 'સ્કેન સાચવવામાં ભૂલ આવી'}
+            yield json.dumps(summary, ensure_ascii=False) + '\n'
+        finally:
+            # Client went away mid-stream, or the scans could not be saved:
+            # no scans rows point at these images
+            if not saved:
+                discard_batch_uploads(futures)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def discard_batch_uploads(futures):
+    """Cancel pending batch items and delete the images of the others once they finish"""
+    def remove_upload(future):
+        try:
+            scan = future.result()[1]
+            if scan is not None:
+                os.remove(scan[2])
+        except Exception:
+            pass
+    for future in futures:
+        if not future.cancel():
+            future.add_done_callback(remove_upload)
+
+# -------------------- Scan jobs --------------------
+
+class ScanJobQueue:
+    """Bounded worker pool for scans; job state lives in the scan_jobs table"""
+
+    def __init__(self, workers, max_depth):
+        self.workers = max(1, workers)
+        self.max_depth = max(1, max_depth)
+        self._depth = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def depth(self):
+        """Jobs queued or running in this worker process"""
+        with self._lock:
+            return self._depth
+
+    def submit(self, kind, func, *args):
+        """Queue a job; returns its ID, or None when the queue is full"""
+        with self._lock:
+            if self._depth >= self.max_depth:
+                return None
+            self._depth += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='scan-worker')
+        job_id = uuid.uuid4().hex
+        try:
+            conn = get_db_connection()
+            conn.execute("INSERT INTO scan_jobs (id, kind, status) VALUES (?, ?, 'queued')",
+                         (job_id, kind))
+            conn.commit()
+            conn.close()
+            self._executor.submit(self._run, job_id, func, args)
+        except Exception:
+            with self._lock:
+                self._depth -= 1
+            raise
+        return job_id
+
+    def _run(self, job_id, func, args):
+        try:
+            self._update(job_id, 'running')
+            result = func(*args)
+            self._update(job_id, 'done', result=json.dumps(result, ensure_ascii=False))
+        except Exception as e:
+            print(f"Error in scan job {job_id}: {str(e)}")
+            self._update(job_id, 'failed', error=str(e))
+        finally:
+            with self._lock:
+                self._depth -= 1
+
+    def _update(self, job_id, status, result=None, error=None):
+        conn = get_db_connection()
+        c = conn.cursor()
+        if status == 'running':
+            c.execute("UPDATE scan_jobs SET status = 'running' WHERE id = ?", (job_id,))
+        else:
+            c.execute('''UPDATE scan_jobs SET status = ?, result = ?, error = ?, finished_at = CURRENT_TIMESTAMP
+                         WHERE id = ?''', (status, result, error, job_id))
+            # Forget old finished jobs
+            c.execute("DELETE FROM scan_jobs WHERE finished_at < datetime('now', ?)",
+                      (f"-{app.config['SCAN_JOB_RETENTION_HOURS']} hours",))
+        conn.commit()
+        conn.close()
+
+    def shutdown(self):
+        """Let queued jobs finish before the worker exits"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+scan_jobs = ScanJobQueue(app.config['SCAN_WORKERS'], app.config['SCAN_QUEUE_MAX'])
+atexit.register(scan_jobs.shutdown)
+
+def wants_async():
+    """Whether this upload should run as a background job"""
+    value = request.values.get('async')
+    if value is None:
+        return app.config['SCAN_ASYNC']
+    return value.lower() in ('1', 'true', 'yes')
+
+def scan_job_accepted_response(job_id):
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('scan_job_status', job_id=job_id)
+    }), 202
+
+def scan_queue_full_response():
+    response = jsonify({'success': False, 'message': 'સર્વર વ્યસ્ત છે. કૃપા કરીને થોડી વાર પછી પ્રયાસ કરો.'})
+    response.status_code = 429
+    response.headers['Retry-After'] = '5'
+    return response
+
+@app.route('/api/scan/jobs/<job_id>', methods=['GET'])
+def scan_job_status(job_id):
+    """Poll the status of a background scan job"""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('SELECT status, result, error FROM scan_jobs WHERE id = ?', (job_id,))
+    job = c.fetchone()
+    conn.close()
+    
+    if not job:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    if job['status'] == 'failed':
+        return jsonify({'success': False, 'job_id': job_id, 'status': 'failed',
+                        'message': 'સ્કેન દરમિયાન ભૂલ આવી. કૃપા કરીને ફરી પ્રયાસ કરો.'})
+    
+    payload = {'success': True, 'job_id': job_id, 'status': job['status']}
+    if job['status'] == 'done':
+        payload.update(json.loads(job['result']))
+    return jsonify(payload)
+
+def detect_disease(image_path, crop_type, phash=None):
+    """
+    Detect crop disease from image
+    Exact and near-duplicate images are answered from the detection cache
+    """
+    detector = get_detector()
+    # With the gemini backend this raises GeminiUnavailable: there is no
+    # local model to answer instead, and mock data would look like a diagnosis
+    return detection_cache.get_or_compute(
+        image_path, f'local:{detector.name}:{detector.version}',
+        lambda: run_detector(detector, image_path, crop_type),
+        crop_type, phash)
+
+def run_detector(detector, image_path, crop_type):
+    started = time.perf_counter()
+    try:
+        return detector.detect(image_path, crop_type)
+    finally:
+        INFERENCE_SECONDS.observe(time.perf_counter() - started, backend=detector.name)
 
 def detect_disease_mock(crop_type):
     """Mock disease detection (replace with actual AI model)"""
@@ -625,25 +2843,582 @@ def detect_disease_mock(crop_type):
     
     return diseases.get(crop_type.lower(), diseases['cotton'])
 
-@app.route('/api/weather', methods=['GET'])
-def get_weather():
-    """Get weather data API"""
-    try:
-        # Get location from query params or use default
-        lat = request.args.get('lat', '23.0225')  # Default: Ahmedabad
-        lon = request.args.get('lon', '72.5714')
+# -------------------- Gemini client --------------------
+
+class GeminiUnavailable(Exception):
+    """Gemini did not answer (circuit open, too busy, or the call failed)"""
+
+# HTTP statuses worth another attempt: rate limited, server errors, timeouts
+GEMINI_RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+def is_retryable_gemini_error(error):
+    # OSError covers connection resets and the rest transport's requests errors
+    return getattr(error, 'code', None) in GEMINI_RETRYABLE_CODES or isinstance(error, OSError)
+
+def is_timeout_error(error):
+    return (getattr(error, 'code', None) == 504 or isinstance(error, TimeoutError)
+            or 'Timeout' in type(error).__name__)
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` failed calls in a row. Once `cooldown` seconds
+    have passed a single trial call is let through (half-open); its outcome
+    closes the breaker again or restarts the cooldown.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = 'half_open'
+                return True
+            return False
+
+    def cancel(self):
+        """The allowed call never reached upstream; let the next one be the trial"""
+        with self._lock:
+            if self.state == 'half_open':
+                self.state = 'open'
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.threshold:
+                if self.state != 'open':
+                    self.opens += 1
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+class GeminiClient:
+    """One GenerativeModel per worker with deadlines, retries, a breaker and a concurrency cap"""
+
+    def __init__(self, model_name, timeout, deadline, max_retries, retry_base_delay,
+                 max_concurrency, queue_timeout, breaker):
+        self.model_name = model_name
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max(0, max_retries)
+        self.retry_base_delay = retry_base_delay
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._model = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.short_circuited = 0
+        self.rejected_busy = 0
+        self.fallbacks = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                self._model = get_genai().GenerativeModel(self.model_name)
+            return self._model
+
+    def generate(self, prompt, image_path):
+        """Answer text for prompt + image, or GeminiUnavailable"""
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            raise GeminiUnavailable('circuit open')
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.breaker.cancel()
+            self._count('rejected_busy')
+            raise GeminiUnavailable('too many concurrent calls')
         
-        # TODO: Integrate actual weather API (OpenWeatherMap, etc.)
-        # Example:
-        # import requests
-        # api_key = os.getenv('WEATHER_API_KEY')
-        # url = f'https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric'
-        # response = requests.get(url)
-        # data = response.json()
-        # weather_data = format_weather_response(data)
+        started = time.monotonic()
+        self._count('in_flight')
+        try:
+            text = self._generate_with_retries(prompt, image_path, started + self.deadline)
+        except Exception as e:
+            # Only an unreachable or overloaded upstream trips the breaker; a
+            # refused or blocked answer (4xx, safety block) means it is up
+            if is_retryable_gemini_error(e) or is_timeout_error(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            self._count('failures')
+            if is_timeout_error(e):
+                self._count('timeouts')
+            print(f"Error in Gemini call: {str(e)}")
+            raise GeminiUnavailable(str(e)) from e
+        finally:
+            self._slots.release()
+            self._count('in_flight', -1)
         
-        # For now, return mock data
-        weather_data = {
+        self.breaker.record_success()
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self.successes += 1
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+        return text
+
+    def _generate_with_retries(self, prompt, image_path, deadline):
+        from PIL import Image
+        attempt = 0
+        while True:
+            self._count('calls')
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError('Gemini deadline exceeded')
+            attempt_started = time.perf_counter()
+            try:
+                with Image.open(image_path) as image:
+                    # retry=None: the SDK's own retry policy would keep retrying for minutes
+                    response = self.model().generate_content(
+                        [prompt, image], request_options={'timeout': min(self.timeout, remaining), 'retry': None})
+                UPSTREAM_SECONDS.observe(time.perf_counter() - attempt_started, service='gemini', outcome='ok')
+                return response.text
+            except Exception as e:
+                UPSTREAM_SECONDS.observe(time.perf_counter() - attempt_started, service='gemini', outcome='error')
+                if attempt >= self.max_retries or not is_retryable_gemini_error(e):
+                    raise
+                # Full jitter keeps workers that failed together from retrying together
+                delay = random.uniform(0, self.retry_base_delay * 2 ** attempt)
+                if time.monotonic() + delay >= deadline:
+                    raise
+                attempt += 1
+                self._count('retries')
+                time.sleep(delay)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'model': self.model_name,
+                'breaker_state': self.breaker.state,
+                'breaker_opens': self.breaker.opens,
+                'consecutive_failures': self.breaker.failures,
+                'in_flight': self.in_flight,
+                'max_concurrency': self.max_concurrency,
+                'calls': self.calls,
+                'successes': self.successes,
+                'failures': self.failures,
+                'retries': self.retries,
+                'timeouts': self.timeouts,
+                'short_circuited': self.short_circuited,
+                'rejected_busy': self.rejected_busy,
+                'fallbacks': self.fallbacks,
+                'average_latency_ms': round(self.latency_total / self.successes * 1000, 1) if self.successes else None,
+                'max_latency_ms': round(self.latency_max * 1000, 1)
+            }
+
+_gemini_client = None
+_gemini_client_lock = threading.Lock()
+
+def get_gemini_client():
+    global _gemini_client
+    with _gemini_client_lock:
+        if _gemini_client is None:
+            _gemini_client = GeminiClient(
+                app.config['GEMINI_MODEL'], app.config['GEMINI_TIMEOUT'], app.config['GEMINI_DEADLINE'],
+                app.config['GEMINI_MAX_RETRIES'], app.config['GEMINI_RETRY_BASE_DELAY'],
+                app.config['GEMINI_MAX_CONCURRENCY'], app.config['GEMINI_QUEUE_TIMEOUT'],
+                CircuitBreaker(app.config['GEMINI_BREAKER_THRESHOLD'], app.config['GEMINI_BREAKER_COOLDOWN']))
+    return _gemini_client
+
+GEMINI_UNAVAILABLE_TEXT = 'AI સેવા હાલ ઉપલબ્ધ નથી. કૃપા કરીને થોડી વાર પછી ફરી પ્રયાસ કરો.'
+
+def fallback_detection(image_path, crop_type):
+    """
+    Local model answer while Gemini is unavailable (not cached as a Gemini
+    answer), or None when no local model is configured
+    """
+    if not isinstance(get_detector(), LocalModelDetector):
+        return None
+    get_gemini_client()._count('fallbacks')
+    return detect_disease(image_path, crop_type)
+
+def format_detection_text(result):
+    """A detector result in the same layout as the Gemini answer"""
+    lines = [
+        'નોંધ: AI સેવા હાલ ઉપલબ્ધ નથી, સ્થાનિક મોડેલનું પરિણામ બતાવ્યું છે.',
+        '',
+        'રોગનું નામ:',
+        result.get('disease_name_guj') or result.get('disease_name', ''),
+    ]
+    for heading, key in (('લક્ષણો:', 'symptoms_guj'), ('ઉપચાર:', 'treatment_guj'), ('ખાતર / દવા:', 'fertilizer')):
+        if result.get(key):
+            lines += ['', heading, f'- {result[key]}']
+    return '\n'.join(lines)
+
+def detect_crop_disease_with_fallback(image_path, crop_type=''):
+    """Gemini answer text, or the local detector's answer in the same layout"""
+    try:
+        return detect_crop_disease(image_path)
+    except GeminiUnavailable:
+        result = fallback_detection(image_path, crop_type)
+        if result is None:
+            return GEMINI_UNAVAILABLE_TEXT
+        return format_detection_text(result)
+
+# -------------------- Detection backends --------------------
+
+class MockDetector:
+    """Fixed answer per crop type, used when no model is available"""
+
+    name = 'mock'
+    version = '1'
+
+    def load(self):
+        pass
+
+    def warmup(self):
+        pass
+
+    def detect(self, image_path, crop_type):
+        return detect_disease_mock(crop_type)
+
+class GeminiDetector:
+    """Remote Gemini detection, shaped like the local detectors' results"""
+
+    name = 'gemini'
+
+    def __init__(self):
+        self.version = GEMINI_PROMPT_VERSION
+
+    def load(self):
+        pass
+
+    def warmup(self):
+        pass
+
+    def detect(self, image_path, crop_type):
+        # Uncached: detect_disease() already caches this detector's results
+        return parse_gemini_answer(detect_crop_disease_uncached(image_path))
+
+# Headings of the Gemini answer (see GEMINI_PROMPT) and the result keys they fill
+GEMINI_ANSWER_SECTIONS = {
+    'રોગનું નામ': 'disease_name_guj',
+    'લક્ષણો': 'symptoms_guj',
+    'ઉપચાર': 'treatment_guj',
+    'ખાતર / દવા': 'fertilizer',
+}
+
+def parse_gemini_answer(text):
+    """
+    Gemini answer text -> result dict with the same keys as the local
+    detectors. The answer is Gujarati only, so the English fields are empty.
+    """
+    sections = {}
+    current = None
+    for line in text.splitlines():
+        line = line.strip()
+        heading, sep, rest = line.partition(':')
+        if sep and heading.strip(' *#') in GEMINI_ANSWER_SECTIONS:
+            current = GEMINI_ANSWER_SECTIONS[heading.strip(' *#')]
+            line = rest.strip()
+        elif sep and heading.strip(' *#') and not line.startswith(('-', '•', '*')) and not rest.strip():
+            # Another heading (e.g. રોકથામ) ends the previous section
+            current = None
+        line = line.lstrip('-•* ').strip()
+        if current and line:
+            sections.setdefault(current, []).append(line)
+    disease_name = sections.get('disease_name_guj', [''])[0]
+    return {
+        'disease_name': disease_name,
+        'disease_name_guj': disease_name,
+        'symptoms': '',
+        'symptoms_guj': ', '.join(sections.get('symptoms_guj', [])),
+        'treatment': '',
+        'treatment_guj': ', '.join(sections.get('treatment_guj', [])),
+        'fertilizer': ', '.join(sections.get('fertilizer', [])),
+        'ai_result': text
+    }
+
+class LocalModelDetector(abc.ABC):
+    """
+    Base class for CPU models loaded from DETECTION_MODEL_DIR.
+    labels.json lists one result dict per output class, each with a 'crop' key.
+    """
+
+    name = 'local'
+    model_file = None
+
+    def __init__(self, model_dir):
+        self.model_dir = model_dir
+        self.model_path = os.path.join(model_dir, self.model_file)
+        self.version = None
+        self.labels = []
+        self.input_size = 224
+        # BatchScheduler set by get_detector() when micro-batching is on
+        self.scheduler = None
+
+    def load(self):
+        with open(os.path.join(self.model_dir, 'labels.json'), encoding='utf-8') as f:
+            self.labels = json.load(f)
+        self.version = hash_file(self.model_path)[:12]
+        self._load_model()
+
+    def warmup(self):
+        import numpy as np
+        self.predict_batch(np.zeros((1, self.input_size, self.input_size, 3), dtype=np.float32))
+
+    def preprocess(self, image_path):
+        """Image file -> float32 HxWx3 array scaled to [0, 1]"""
+        import numpy as np
+        from PIL import Image
+        with Image.open(image_path) as image:
+            image.draft('RGB', (self.input_size, self.input_size))
+            image = image.convert('RGB').resize((self.input_size, self.input_size), Image.BILINEAR)
+            return np.asarray(image, dtype=np.float32) / 255.0
+
+    @abc.abstractmethod
+    def _load_model(self):
+        """Load the model file at self.model_path"""
+
+    @abc.abstractmethod
+    def predict_batch(self, batch):
+        """NxHxWx3 array -> NxC class probabilities"""
+
+    def format_prediction(self, probabilities, crop_type):
+        """Pick the most likely class for this crop and return its result dict"""
+        crop = (crop_type or '').lower()
+        candidates = [i for i, label in enumerate(self.labels) if label.get('crop', '').lower() == crop]
+        if not candidates:
+            candidates = range(len(self.labels))
+        best = max(candidates, key=lambda i: probabilities[i])
+        result = {k: v for k, v in self.labels[best].items() if k != 'crop'}
+        result['confidence'] = round(float(probabilities[best]), 4)
+        return result
+
+    def detect(self, image_path, crop_type):
+        image = self.preprocess(image_path)
+        if self.scheduler is not None:
+            probabilities = self.scheduler.submit(image).result()
+        else:
+            probabilities = self.predict_batch(image[None])[0]
+        return self.format_prediction(probabilities, crop_type)
+
+class BatchScheduler:
+    """Collects concurrent inference requests into batched forward passes"""
+
+    def __init__(self, predict_batch, max_batch_size, max_wait_ms):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes = {}
+        self._thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, image):
+        """Queue one preprocessed image; the Future resolves to its probabilities"""
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        import numpy as np
+        while True:
+            batch = self._collect()
+            try:
+                probabilities = self.predict_batch(np.stack([image for image, _ in batch]))
+                for (_, future), row in zip(batch, probabilities):
+                    future.set_result(row)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'queue_depth': self._queue.qsize(),
+                'batches': self.batches,
+                'items': self.items,
+                'average_batch_size': round(self.items / self.batches, 3) if self.batches else 0.0,
+                'batch_sizes': {str(size): count for size, count in sorted(self.batch_sizes.items())}
+            }
+
+def softmax(logits):
+    import numpy as np
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+class NumpyDetector(LocalModelDetector):
+    """
+    Pure-NumPy MLP classifier stored as crop_disease_model.npz.
+    Arrays W0, b0, W1, b1, ... are dense layers (ReLU between them) applied
+    to the flattened image; optional 'input_size', 'mean' and 'std'.
+    """
+
+    name = 'numpy'
+    model_file = 'crop_disease_model.npz'
+
+    def _load_model(self):
+        import numpy as np
+        with np.load(self.model_path) as data:
+            self.layers = []
+            i = 0
+            while f'W{i}' in data:
+                self.layers.append((data[f'W{i}'].astype(np.float32), data[f'b{i}'].astype(np.float32)))
+                i += 1
+            if 'input_size' in data:
+                self.input_size = int(data['input_size'])
+            self.mean = data['mean'].astype(np.float32) if 'mean' in data else None
+            self.std = data['std'].astype(np.float32) if 'std' in data else None
+
+    def predict_batch(self, batch):
+        import numpy as np
+        x = batch.reshape(batch.shape[0], -1)
+        if self.mean is not None:
+            x = x - self.mean
+        if self.std is not None:
+            x = x / self.std
+        for i, (weights, bias) in enumerate(self.layers):
+            x = x @ weights + bias
+            if i < len(self.layers) - 1:
+                x = np.maximum(x, 0)
+        return softmax(x)
+
+class OnnxDetector(LocalModelDetector):
+    """ONNX Runtime model (crop_disease_model.onnx) on the CPU provider"""
+
+    name = 'onnx'
+    model_file = 'crop_disease_model.onnx'
+
+    def _load_model(self):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(self.model_path, options,
+                                                    providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        shape = model_input.shape
+        self.channels_first = len(shape) == 4 and shape[1] == 3
+        size = shape[2] if self.channels_first else shape[1]
+        if isinstance(size, int):
+            self.input_size = size
+
+    def predict_batch(self, batch):
+        import numpy as np
+        if self.channels_first:
+            batch = batch.transpose(0, 3, 1, 2)
+        outputs = self.session.run(None, {self.input_name: np.ascontiguousarray(batch, dtype=np.float32)})[0]
+        # Models exported without a final softmax return logits
+        if np.any(outputs < 0) or not np.allclose(outputs.sum(axis=1), 1, atol=1e-3):
+            outputs = softmax(outputs)
+        return outputs
+
+def create_detector(backend, model_dir):
+    """Build the detector for a DETECTION_BACKEND value"""
+    if backend == 'mock':
+        return MockDetector()
+    if backend == 'gemini':
+        return GeminiDetector()
+    if backend == 'numpy':
+        return NumpyDetector(model_dir)
+    if backend == 'onnx':
+        return OnnxDetector(model_dir)
+    if backend == 'auto':
+        has_labels = os.path.exists(os.path.join(model_dir, 'labels.json'))
+        if has_labels and os.path.exists(os.path.join(model_dir, OnnxDetector.model_file)):
+            try:
+                import onnxruntime  # noqa: F401
+                return OnnxDetector(model_dir)
+            except ImportError:
+                print("onnxruntime is not installed, skipping the ONNX model")
+        if has_labels and os.path.exists(os.path.join(model_dir, NumpyDetector.model_file)):
+            return NumpyDetector(model_dir)
+        return MockDetector()
+    raise ValueError(f'Unknown DETECTION_BACKEND: {backend}')
+
+_detector = None
+_detector_lock = threading.Lock()
+
+def get_detector():
+    """The process-wide detector, loaded and warmed up on first use"""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                detector = create_detector(app.config['DETECTION_BACKEND'], app.config['DETECTION_MODEL_DIR'])
+                try:
+                    detector.load()
+                    detector.warmup()
+                except Exception as e:
+                    print(f"Error loading {detector.name} detector, using mock: {str(e)}")
+                    detector = MockDetector()
+                if isinstance(detector, LocalModelDetector) and app.config['INFERENCE_BATCH_MAX_SIZE'] > 1:
+                    detector.scheduler = BatchScheduler(detector.predict_batch,
+                                                        app.config['INFERENCE_BATCH_MAX_SIZE'],
+                                                        app.config['INFERENCE_BATCH_MAX_WAIT_MS'])
+                _detector = detector
+    return _detector
+
+# -------------------- Weather --------------------
+
+WEATHER_CONDITIONS_GUJ = {
+    'Clear': 'સાફ આકાશ',
+    'Clouds': 'વાદળછાયા',
+    'Rain': 'વરસાદ',
+    'Drizzle': 'ઝરમર વરસાદ',
+    'Thunderstorm': 'વાવાઝોડું',
+    'Snow': 'બરફવર્ષા',
+    'Mist': 'ધુમ્મસ',
+    'Haze': 'ધુમ્મસ',
+    'Fog': 'ધુમ્મસ',
+    'Smoke': 'ધુમાડો',
+    'Dust': 'ધૂળ',
+    'Sand': 'ધૂળ'
+}
+
+class StubWeatherProvider:
+    """Fixed weather, for local development and tests"""
+
+    name = 'stub'
+
+    def fetch(self, lat, lon):
+        return {
             'temperature': 28,
             'humidity': 65,
             'wind_speed': 12,
@@ -651,6 +3426,156 @@ def get_weather():
             'condition': 'Partly Cloudy',
             'condition_guj': 'અંશતઃ વાદળછાયા'
         }
+
+class OpenWeatherMapProvider:
+    """Next forecast slot from the OpenWeatherMap 5 day / 3 hour forecast API"""
+
+    name = 'openweathermap'
+
+    def __init__(self, api_key, url, timeout):
+        self.api_key = api_key
+        self.url = url
+        self.timeout = timeout
+        import requests
+        self.session = requests.Session()
+
+    def fetch(self, lat, lon):
+        response = self.session.get(self.url, timeout=self.timeout, params={
+            'lat': lat, 'lon': lon, 'appid': self.api_key, 'units': 'metric', 'cnt': 1
+        })
+        response.raise_for_status()
+        slot = response.json()['list'][0]
+        condition = slot['weather'][0]['main'] if slot.get('weather') else ''
+        return {
+            'temperature': round(slot['main']['temp']),
+            'humidity': slot['main']['humidity'],
+            'wind_speed': round(slot['wind']['speed'] * 3.6),  # m/s -> km/h
+            'rain_probability': round(slot.get('pop', 0) * 100),
+            'condition': slot['weather'][0]['description'].capitalize() if slot.get('weather') else condition,
+            'condition_guj': WEATHER_CONDITIONS_GUJ.get(condition, '')
+        }
+
+def create_weather_provider():
+    provider = app.config['WEATHER_PROVIDER']
+    if provider == 'openweathermap':
+        return OpenWeatherMapProvider(app.config['WEATHER_API_KEY'], app.config['WEATHER_API_URL'],
+                                      app.config['WEATHER_TIMEOUT'])
+    if provider == 'stub':
+        return StubWeatherProvider()
+    raise ValueError(f'Unknown WEATHER_PROVIDER: {provider}')
+
+class WeatherCache:
+    """
+    TTL cache of weather per grid tile. Concurrent misses for the same tile
+    wait for a single upstream fetch instead of each making their own.
+    """
+
+    def __init__(self, provider, tile_deg, ttl):
+        self.provider = provider
+        self.tile_deg = tile_deg
+        self.ttl = ttl
+        self._entries = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.errors = 0
+
+    def tile(self, lat, lon):
+        return (round(lat / self.tile_deg), round(lon / self.tile_deg))
+
+    def get(self, lat, lon):
+        key = self.tile(lat, lon)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1]
+            flight = self._in_flight.get(key)
+            if flight is None:
+                flight = {'event': threading.Event(), 'result': None, 'error': None}
+                self._in_flight[key] = flight
+                leader = True
+                self.misses += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            flight['event'].wait(self.provider_timeout())
+            if flight['error'] is not None or flight['result'] is None:
+                raise flight['error'] or TimeoutError('Weather fetch timed out')
+            return flight['result']
+
+        started = time.perf_counter()
+        try:
+            # Fetch for the tile centre so every caller in the tile gets the same answer
+            result = self.provider.fetch(round(key[0] * self.tile_deg, 4), round(key[1] * self.tile_deg, 4))
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, service='weather', outcome='ok')
+            with self._lock:
+                self._entries[key] = (time.monotonic(), result)
+                self._evict_expired()
+            flight['result'] = result
+            return result
+        except Exception as e:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, service='weather', outcome='error')
+            with self._lock:
+                self.errors += 1
+                if entry is not None:
+                    # Upstream is down: an old answer beats no answer
+                    self.stale_served += 1
+                    flight['result'] = entry[1]
+                    return entry[1]
+            flight['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight['event'].set()
+
+    def provider_timeout(self):
+        return getattr(self.provider, 'timeout', 5) * 2
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (fetched, _) in self._entries.items() if now - fetched >= self.ttl * 2]:
+            del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'provider': self.provider.name,
+                'tiles': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'stale_served': self.stale_served,
+                'errors': self.errors,
+                'hit_ratio': round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0
+            }
+
+weather_cache = WeatherCache(create_weather_provider(), app.config['WEATHER_TILE_DEG'],
+                             app.config['WEATHER_CACHE_TTL'])
+
+@app.route('/api/weather', methods=['GET'])
+def get_weather():
+    """Get weather data API"""
+    try:
+        # Get location from query params or use default
+        # Default: Ahmedabad, only when a parameter is missing; garbage is a 400
+        try:
+            lat = float(request.args.get('lat', 23.0225))
+            lon = float(request.args.get('lon', 72.5714))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'અમાન્ય સ્થાન'}), 400
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return jsonify({'success': False, 'message': 'અમાન્ય સ્થાન'}), 400
+        
+        weather_data = weather_cache.get(lat, lon)
         
         return jsonify({'success': True, 'data': weather_data})
     except Exception as e:
@@ -705,17 +3630,13 @@ def admin_stats():
         conn = get_db_connection()
         c = conn.cursor()
         
-        # Total visits
-        c.execute('SELECT COUNT(*) as count FROM visits')
-        total_visits = c.fetchone()['count']
-        
-        # Total users
-        c.execute('SELECT COUNT(*) as count FROM users')
-        total_users = c.fetchone()['count']
-        
-        # Total scans
-        c.execute('SELECT COUNT(*) as count FROM scans')
-        total_scans = c.fetchone()['count']
+        # Make recent visits visible to the admin right away
+        visit_buffer.flush()
+
+        # Totals and today's buckets from the counters table
+        today = datetime.utcnow().strftime('%Y-%m-%d')
+        counters = read_counters(c, ['visits', 'users', 'scans'])
+        today_counters = read_counters(c, ['visits', 'users', 'scans'], today)
         
         # Recent visits (last 50)
         c.execute('''SELECT ip_address, visit_time, date 
@@ -724,58 +3645,523 @@ def admin_stats():
                      LIMIT 50''')
         recent_visits = [dict(row) for row in c.fetchall()]
         
-        # User details
-        c.execute('''SELECT id, name, mobile, email, created_at 
-                     FROM users 
-                     ORDER BY created_at DESC''')
-        users = [dict(row) for row in c.fetchall()]
+        # First page of users; the rest via /api/admin/users
+        users, users_next_cursor = keyset_page(c, 'users', ADMIN_USER_FIELDS, 'created_at',
+                                               limit=ADMIN_PAGE_SIZE)
+        add_ist_dates(users, 'created_at')
         
         conn.close()
         
         return jsonify({
             'success': True,
             'stats': {
-                'total_visits': total_visits,
-                'total_users': total_users,
-                'total_scans': total_scans
+                'total_visits': counters['visits'],
+                'total_users': counters['users'],
+                'total_scans': counters['scans'],
+                'today_visits': today_counters['visits'],
+                'today_users': today_counters['users'],
+                'today_scans': today_counters['scans']
             },
             'recent_visits': recent_visits,
-            'users': users
+            'users': users,
+            'users_next_cursor': users_next_cursor
         })
     except Exception as e:
         print(f"Error in admin_stats: {str(e)}")
         return jsonify({'success': False, 'message': 'આંકડા મેળવવામાં ભૂલ આવી'}), 500
 
+@app.route('/api/admin/session', methods=['GET'])
+def admin_session():
+    """Whether an admin is logged in (cheap check for the admin page)"""
+    if 'admin_id' not in session:
+        return jsonify({'success': False, 'message': 'અનધિકૃત પ્રવેશ'}), 401
+    return jsonify({'success': True, 'username': session.get('admin_username')})
+
+# -------------------- Admin: live events --------------------
+
+class EventSubscriber:
+    """Bounded queue of events for one open admin stream"""
+
+    def __init__(self, max_size):
+        self.events = deque(maxlen=max(1, max_size))
+        self.overflowed = False
+        self.ready = threading.Condition()
+
+    def push(self, event):
+        with self.ready:
+            if len(self.events) == self.events.maxlen:
+                # Oldest event falls off; the client has to reload everything
+                self.overflowed = True
+            self.events.append(event)
+            self.ready.notify()
+
+    def drain(self, timeout):
+        """(events, overflowed) waiting at most timeout seconds for the first event"""
+        with self.ready:
+            if not self.events and not self.overflowed:
+                self.ready.wait(timeout)
+            events, overflowed = list(self.events), self.overflowed
+            self.events.clear()
+            self.overflowed = False
+            return events, overflowed
+
+class EventBus:
+    """
+    In-process publish/subscribe for admin dashboard deltas.
+    Event ids carry a per-process prefix so a reconnect that lands on another
+    worker (or after a restart) is told to resync instead of missing events.
+    """
+
+    def __init__(self, buffer_size, max_subscribers):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.prefix = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._history = deque(maxlen=max(1, buffer_size))
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event_type, data):
+        with self._lock:
+            self._seq += 1
+            event = (f'{self.prefix}-{self._seq}', event_type, data)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.push(event)
+
+    def subscribe(self, last_event_id=None):
+        """
+        (subscriber, backlog, resync) or None when at the connection cap.
+        backlog holds the events missed since last_event_id when they are
+        still in history; otherwise resync is True.
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscriber = EventSubscriber(self.buffer_size)
+            self._subscribers.add(subscriber)
+            backlog, resync = [], False
+            if last_event_id:
+                ids = [event[0] for event in self._history]
+                if last_event_id in ids:
+                    backlog = list(self._history)[ids.index(last_event_id) + 1:]
+                elif last_event_id != f'{self.prefix}-{self._seq}':
+                    resync = True
+            return subscriber, backlog, resync
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def is_full(self):
+        with self._lock:
+            return len(self._subscribers) >= self.max_subscribers
+
+admin_events = EventBus(app.config['EVENT_BUFFER_SIZE'], app.config['EVENT_MAX_SUBSCRIBERS'])
+
+def format_sse(event_type, data, event_id=None):
+    lines = []
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
+
+ADMIN_EVENT_COUNTERS = ('visits', 'users', 'scans', 'catalog:crops', 'catalog:diseases', 'catalog:schemes')
+
+def read_event_counters():
+    # Straight from the pool: the stream keeps its request context open, and a
+    # request-bound connection would stay checked out for the whole stream
+    conn = db_pool.acquire()
+    try:
+        return read_counters(conn.cursor(), list(ADMIN_EVENT_COUNTERS))
+    finally:
+        db_pool.release(conn)
+
+def admin_event_stream(last_event_id):
+    """
+    Subscribes only once the body is actually being sent, so a client that
+    disconnects before that never holds a subscriber slot
+    """
+    subscription = admin_events.subscribe(last_event_id)
+    if subscription is None:
+        # Lost the race for the last slot since the route checked
+        yield 'retry: 30000\n\n'
+        return
+    subscriber, backlog, resync = subscription
+    poll_seconds = app.config['EVENT_POLL_SECONDS']
+    heartbeat_seconds = app.config['EVENT_HEARTBEAT_SECONDS']
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        yield 'retry: 3000\n\n'
+        if resync:
+            yield format_sse('resync', {})
+        for event_id, event_type, data in backlog:
+            yield format_sse(event_type, data, event_id)
+        
+        counters = read_event_counters()
+        yield format_sse('counters', counters)
+        # Catalog versions already announced: an edit made in this worker arrives
+        # both as a published event and as a counter change on the next poll
+        catalog_versions = {}
+        next_poll = time.monotonic() + poll_seconds
+        last_sent = time.monotonic()
+        while True:
+            events, overflowed = subscriber.drain(max(0.0, min(next_poll, last_sent + heartbeat_seconds)
+                                                      - time.monotonic()))
+            if overflowed:
+                yield format_sse('resync', {})
+                last_sent = time.monotonic()
+            else:
+                for event_id, event_type, data in events:
+                    if event_type == 'catalog':
+                        if data['version'] <= catalog_versions.get(data['name'], 0):
+                            continue
+                        catalog_versions[data['name']] = data['version']
+                    yield format_sse(event_type, data, event_id)
+                    last_sent = time.monotonic()
+            
+            if time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + poll_seconds
+                current = read_event_counters()
+                if current != counters:
+                    for key in ADMIN_EVENT_COUNTERS:
+                        name = key.split(':', 1)[1] if key.startswith('catalog:') else None
+                        if name and current[key] != counters[key] and current[key] > catalog_versions.get(name, 0):
+                            catalog_versions[name] = current[key]
+                            yield format_sse('catalog', {'name': name, 'version': current[key]})
+                    counters = current
+                    yield format_sse('counters', counters)
+                    last_sent = time.monotonic()
+            
+            if time.monotonic() - last_sent >= heartbeat_seconds:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                last_sent = time.monotonic()
+    finally:
+        admin_events.unsubscribe(subscriber)
+
+@app.route('/api/admin/events', methods=['GET'])
+def admin_event_source():
+    """
+    Server-Sent Events stream of dashboard deltas: counters, visits, user,
+    scans, catalog (a catalog changed) and resync (reload everything)
+    """
+    if 'admin_id' not in session:
+        return jsonify({'success': False, 'message': 'અનધિકૃત પ્રવેશ'}), 401
+    if admin_events.is_full():
+        response = jsonify({'success': False, 'message': 'Too many live connections'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    response = Response(stream_with_context(admin_event_stream(request.headers.get('Last-Event-ID'))),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# -------------------- Admin: paginated listings --------------------
+
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 500
+ADMIN_USER_FIELDS = ('id', 'name', 'mobile', 'email', 'created_at')
+ADMIN_VISIT_FIELDS = ('id', 'ip_address', 'visit_time', 'date')
+
+def encode_cursor(sort_value, row_id):
+    raw = json.dumps([sort_value, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    return sort_value, int(row_id)
+
+def keyset_page(c, table, fields, sort_column, where=None, params=(), limit=ADMIN_PAGE_SIZE, cursor=None):
+    """
+    One page of rows newest first, continuing after `cursor`.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    conditions = list(where or [])
+    params = list(params)
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        conditions.append(f'({sort_column}, id) < (?, ?)')
+        params.extend([sort_value, row_id])
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    # The sort column and id are always fetched so the next cursor can be built
+    columns = list(dict.fromkeys([*fields, sort_column, 'id']))
+    c.execute(f'''SELECT {', '.join(columns)} FROM {table} {where_sql}
+                  ORDER BY {sort_column} DESC, id DESC LIMIT ?''', (*params, limit + 1))
+    rows = [dict(row) for row in c.fetchall()]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][sort_column], rows[-1]['id'])
+    return [{k: row[k] for k in fields} for row in rows], next_cursor
+
+def add_ist_dates(rows, column):
+    """Add a '<column>_ist' Gujarati display string to each row"""
+    for row, formatted in zip(rows, format_registration_dates(row[column] for row in rows)):
+        row[f'{column}_ist'] = formatted
+
+def listing_args(allowed_fields):
+    """Parse limit/cursor/fields query params shared by the admin listings"""
+    limit = min(max(request.args.get('limit', ADMIN_PAGE_SIZE, type=int), 1), ADMIN_MAX_PAGE_SIZE)
+    cursor = request.args.get('cursor') or None
+    fields = tuple(f for f in request.args.get('fields', '').split(',') if f)
+    unknown = [f for f in fields if f not in allowed_fields]
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    return limit, cursor, fields or allowed_fields
+
+def date_range_conditions(column):
+    """WHERE clauses for the optional from/to (YYYY-MM-DD) query params"""
+    conditions, params = [], []
+    date_from = request.args.get('from')
+    date_to = request.args.get('to')
+    if date_from:
+        datetime.strptime(date_from, '%Y-%m-%d')
+        conditions.append(f'{column} >= ?')
+        params.append(date_from)
+    if date_to:
+        datetime.strptime(date_to, '%Y-%m-%d')
+        conditions.append(f"{column} < date(?, '+1 day')")
+        params.append(date_to)
+    return conditions, params
+
+@app.route('/api/admin/users', methods=['GET'])
+def admin_users():
+    """
+    Registered users, newest first, with keyset pagination.
+    Query params: limit, cursor, fields (comma separated), mobile_prefix, from, to
+    """
+    try:
+        if 'admin_id' not in session:
+            return jsonify({'success': False, 'message': 'અનધિકૃત પ્રવેશ'}), 401
+        limit, cursor, fields = listing_args(ADMIN_USER_FIELDS)
+        conditions, params = date_range_conditions('created_at')
+        mobile_prefix = request.args.get('mobile_prefix', '')
+        if mobile_prefix:
+            if not mobile_prefix.isdigit():
+                raise ValueError('mobile_prefix must be digits')
+            # Range instead of LIKE so the mobile UNIQUE index is used
+            conditions.append('mobile >= ? AND mobile < ?')
+            params.extend([mobile_prefix, mobile_prefix + ':'])
+        
+        conn = get_db_connection()
+        c = conn.cursor()
+        users, next_cursor = keyset_page(c, 'users', fields, 'created_at', conditions, params, limit, cursor)
+        conn.close()
+        if 'created_at' in fields:
+            add_ist_dates(users, 'created_at')
+        return jsonify({'success': True, 'users': users, 'next_cursor': next_cursor})
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Error in admin_users: {str(e)}")
+        return jsonify({'success': False, 'message': 'Error fetching users'}), 500
+
+@app.route('/api/admin/visits', methods=['GET'])
+def admin_visits():
+    """
+    Raw visits, newest first, with keyset pagination.
+    Query params: limit, cursor, fields (comma separated), from, to
+    """
+    try:
+        if 'admin_id' not in session:
+            return jsonify({'success': False, 'message': 'અનધિકૃત પ્રવેશ'}), 401
+        limit, cursor, fields = listing_args(ADMIN_VISIT_FIELDS)
+        conditions, params = date_range_conditions('visit_time')
+        
+        visit_buffer.flush()
+        conn = get_db_connection()
+        c = conn.cursor()
+        visits, next_cursor = keyset_page(c, 'visits', fields, 'visit_time', conditions, params, limit, cursor)
+        conn.close()
+        if 'visit_time' in fields:
+            add_ist_dates(visits, 'visit_time')
+        return jsonify({'success': True, 'visits': visits, 'next_cursor': next_cursor})
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Error in admin_visits: {str(e)}")
+        return jsonify({'success': False, 'message': 'Error fetching visits'}), 500
+
+@app.route('/api/admin/db-stats', methods=['GET'])
+def admin_db_stats():
+    """Database connection pool counters"""
+    if 'admin_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    return jsonify({'success': True, 'pool': db_pool.stats()})
+
+@app.route('/api/admin/cache-stats', methods=['GET'])
+def admin_cache_stats():
+    """Hit/miss counters for the in-process caches"""
+    if 'admin_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    return jsonify({'success': True, 'caches': {
+        'detection': detection_cache.stats(),
+        'weather': weather_cache.stats(),
+        'catalogs': catalog_cache.stats()
+    }})
+
+@app.route('/api/admin/repeat-scans', methods=['GET'])
+def admin_repeat_scans():
+    """Recent scans that look like a re-submission of an earlier image"""
+    try:
+        if 'admin_id' not in session:
+            return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+        limit = min(request.args.get('limit', 100, type=int), 500)
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute('''SELECT s.id, s.user_id, s.crop_type, s.disease_name, s.image_path, s.scan_time,
+                            s.duplicate_of, o.image_path as original_image_path, o.scan_time as original_scan_time
+                     FROM scans s
+                     JOIN scans o ON o.id = s.duplicate_of
+                     WHERE s.duplicate_of IS NOT NULL
+                     ORDER BY s.id DESC
+                     LIMIT ?''', (limit,))
+        rows = [dict(row) for row in c.fetchall()]
+        conn.close()
+        return jsonify({'success': True, 'records': rows})
+    except Exception as e:
+        print(f"Error in admin_repeat_scans: {str(e)}")
+        return jsonify({'success': False, 'message': 'Error fetching records'}), 500
+
+@app.route('/api/admin/inference-stats', methods=['GET'])
+def admin_inference_stats():
+    """Active detection backend, micro-batching and Gemini client counters"""
+    if 'admin_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    detector = get_detector()
+    scheduler = getattr(detector, 'scheduler', None)
+    return jsonify({'success': True, 'inference': {
+        'backend': detector.name,
+        'version': detector.version,
+        'batching': scheduler.stats() if scheduler is not None else None,
+        'gemini': _gemini_client.stats() if _gemini_client is not None else None
+    }})
+
+@app.route('/api/admin/startup', methods=['GET'])
+def admin_startup():
+    """How long this worker took to start, by phase, and which heavy modules are loaded"""
+    if 'admin_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    lazy_modules = ['pandas', 'numpy', 'openpyxl', 'requests', 'PIL', 'google.generativeai']
+    return jsonify({'success': True, 'startup': startup_timings,
+                    'loaded_modules': [name for name in lazy_modules if name in sys.modules]})
+
 # -------------------- Admin: scan records --------------------
 @app.route('/api/admin/scan-records', methods=['GET'])
 def admin_scan_records():
-    """Return aggregated scan records for admin dashboard"""
+    """
+    Return aggregated scan records for admin dashboard.
+    Query params: from, to (YYYY-MM-DD, UTC days), crop, limit
+    """
     try:
         if 'admin_id' not in session:
             return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+        conditions, params = date_range_conditions('day')
+        crop = request.args.get('crop', '')
+        if crop:
+            conditions.append('crop_type = ?')
+            params.append(crop)
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
         conn = get_db_connection()
         c = conn.cursor()
-        c.execute('''SELECT crop_type as crop, disease_name as disease, COUNT(*) as count
-                     FROM scans
-                     GROUP BY crop_type, disease_name
-                     ORDER BY count DESC
-                     LIMIT 100''')
+        c.execute(f'''SELECT NULLIF(crop_type, '') as crop, NULLIF(disease_name, '') as disease,
+                             SUM(count) as count
+                      FROM scan_daily_stats
+                      {where}
+                      GROUP BY crop_type, disease_name
+                      ORDER BY count DESC
+                      LIMIT ?''', (*params, limit))
         rows = [dict(row) for row in c.fetchall()]
         conn.close()
         return jsonify({'success': True, 'records': rows})
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         print(f"Error in admin_scan_records: {str(e)}")
         return jsonify({'success': False, 'message': 'Error fetching records'}), 500
 
+# -------------------- Catalog cache --------------------
+
+class CatalogCache:
+    """
+    Pre-serialized JSON bodies for the reference catalogs.
+    Each catalog has a version in the counters table that admin writes bump
+    in the same transaction, so every worker notices the change.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.rebuilds = 0
+        self.not_modified = 0
+
+    def get(self, name, loader):
+        """(body, etag) for a catalog, rebuilt only when its version changed"""
+        conn = get_db_connection()
+        try:
+            c = conn.cursor()
+            version = read_counters(c, [f'catalog:{name}'])[f'catalog:{name}']
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None and entry[0] == version:
+                    self.hits += 1
+                    return entry[1], entry[2]
+            body = app.json.dumps({'success': True, name: loader(c)}).encode('utf-8')
+        finally:
+            conn.close()
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        with self._lock:
+            self._entries[name] = (version, body, etag)
+            self.rebuilds += 1
+        return body, etag
+
+    def response(self, name, loader):
+        body, etag = self.get(name, loader)
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = app.config['CATALOG_CACHE_CONTROL']
+        response.make_conditional(request)
+        if response.status_code == 304:
+            with self._lock:
+                self.not_modified += 1
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {
+                'catalogs': {name: entry[0] for name, entry in self._entries.items()},
+                'hits': self.hits,
+                'rebuilds': self.rebuilds,
+                'not_modified': self.not_modified
+            }
+
+catalog_cache = CatalogCache()
+
+def bump_catalog_version(c, name):
+    """Invalidate a cached catalog (call inside the writing transaction); returns the new version"""
+    c.execute('''INSERT INTO counters (name, day, value) VALUES (?, '', 1)
+                 ON CONFLICT(name, day) DO UPDATE SET value = value + 1
+                 RETURNING value''', (f'catalog:{name}',))
+    return c.fetchone()[0]
+
 # -------------------- Crops API --------------------
+def load_crops(c):
+    c.execute('SELECT id, name_gu, name_en FROM crops ORDER BY name_gu')
+    return [dict(row) for row in c.fetchall()]
+
 @app.route('/api/crops', methods=['GET'])
 def get_crops():
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('SELECT id, name_gu, name_en FROM crops ORDER BY name_gu')
-    crops = [dict(row) for row in c.fetchall()]
-    conn.close()
-    return jsonify({'success': True, 'crops': crops})
+    return catalog_cache.response('crops', load_crops)
 
 @app.route('/api/crops', methods=['POST'])
 def add_crop():
@@ -790,9 +4176,11 @@ def add_crop():
         conn = get_db_connection()
         c = conn.cursor()
         c.execute('INSERT INTO crops (name_gu, name_en) VALUES (?, ?)', (name_gu, name_en))
-        conn.commit()
         crop_id = c.lastrowid
+        version = bump_catalog_version(c, 'crops')
+        conn.commit()
         conn.close()
+        admin_events.publish('catalog', {'name': 'crops', 'version': version})
         return jsonify({'success': True, 'crop_id': crop_id})
     except Exception as e:
         print(f"Error adding crop: {str(e)}")
@@ -806,22 +4194,100 @@ def delete_crop(crop_id):
         conn = get_db_connection()
         c = conn.cursor()
         c.execute('DELETE FROM crops WHERE id = ?', (crop_id,))
+        version = bump_catalog_version(c, 'crops')
         conn.commit()
         conn.close()
+        admin_events.publish('catalog', {'name': 'crops', 'version': version})
         return jsonify({'success': True})
     except Exception as e:
         print(f"Error deleting crop: {str(e)}")
         return jsonify({'success': False, 'message': 'Error deleting crop'}), 500
 
 # -------------------- Diseases API --------------------
+def load_diseases(c):
+    c.execute('SELECT id, name_gu, name_en, crop, symptoms, treatment, prevention FROM diseases ORDER BY name_gu')
+    return [dict(row) for row in c.fetchall()]
+
 @app.route('/api/diseases', methods=['GET'])
 def get_diseases():
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('SELECT id, name_gu, name_en, crop, symptoms, treatment, prevention FROM diseases ORDER BY name_gu')
-    diseases = [dict(row) for row in c.fetchall()]
-    conn.close()
-    return jsonify({'success': True, 'diseases': diseases})
+    return catalog_cache.response('diseases', load_diseases)
+
+# Anything that is not a separator is part of a search term (Gujarati vowel
+# signs are not \w, so a \w+ split would cut words apart)
+SEARCH_TERM_RE = re.compile(r'[^\s.,;:!?"\'()\[\]{}<>*^+\-/\\|]+')
+
+def build_fts_query(text):
+    """User text -> FTS5 query: every term must match, as a prefix"""
+    terms = SEARCH_TERM_RE.findall(text.replace('\u200c', '').replace('\u200d', ''))
+    return ' '.join(f'"{term}"*' for term in terms[:10])
+
+@app.route('/api/diseases/search', methods=['GET'])
+def search_diseases():
+    """
+    Search the disease library.
+    Query params: q (text), crop (Gujarati or English crop name),
+    page (from 1), per_page (max 50)
+    """
+    try:
+        text = request.args.get('q', '').strip()
+        crop = request.args.get('crop', '').strip()
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 50)
+        
+        where = []
+        params = []
+        if crop:
+            # Diseases store the Gujarati crop name; accept the English one too
+            where.append('''(d.crop = ? OR d.crop IN
+                            (SELECT name_gu FROM crops WHERE lower(name_en) = lower(?)))''')
+            params.extend([crop, crop])
+        
+        conn = get_db_connection()
+        c = conn.cursor()
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'diseases_fts'")
+        has_fts = c.fetchone() is not None
+        
+        query = build_fts_query(text)
+        if query and has_fts:
+            source = 'diseases_fts JOIN diseases d ON d.id = diseases_fts.rowid'
+            where.insert(0, 'diseases_fts MATCH ?')
+            params.insert(0, query)
+            # Names weigh more than crop, which weighs more than the detail lists
+            order = 'bm25(diseases_fts, 10.0, 10.0, 3.0, 2.0, 1.0, 1.0), d.name_gu'
+        else:
+            source = 'diseases d'
+            order = 'd.name_gu'
+            if text:
+                like = f'%{text}%'
+                where.append('''(d.name_gu LIKE ? OR d.name_en LIKE ? OR d.symptoms LIKE ?
+                                OR d.treatment LIKE ? OR d.prevention LIKE ?)''')
+                params.extend([like] * 5)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+        
+        c.execute(f'SELECT COUNT(*) as count FROM {source} {where_sql}', params)
+        total = c.fetchone()['count']
+        c.execute(f'''SELECT d.id, d.name_gu, d.name_en, d.crop, d.symptoms, d.treatment, d.prevention
+                      FROM {source} {where_sql}
+                      ORDER BY {order}
+                      LIMIT ? OFFSET ?''', (*params, per_page, (page - 1) * per_page))
+        diseases = [dict(row) for row in c.fetchall()]
+        conn.close()
+        
+        return jsonify({
+            'success': True,
+            'diseases': diseases,
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'has_more': page * per_page < total
+        })
+    except sqlite3.OperationalError as e:
+        # Malformed FTS syntax that slipped through the term filter
+        print(f"Error in search_diseases: {str(e)}")
+        return jsonify({'success': False, 'message': 'અમાન્ય શોધ'}), 400
+    except Exception as e:
+        print(f"Error in search_diseases: {str(e)}")
+        return jsonify({'success': False, 'message': 'Error searching diseases'}), 500
 
 @app.route('/api/diseases', methods=['POST'])
 def add_disease():
@@ -841,9 +4307,11 @@ def add_disease():
         c = conn.cursor()
         c.execute('''INSERT INTO diseases (name_gu, name_en, crop, symptoms, treatment, prevention)
                      VALUES (?, ?, ?, ?, ?, ?)''', (name_gu, name_en, crop, symptoms, treatment, prevention))
-        conn.commit()
         disease_id = c.lastrowid
+        version = bump_catalog_version(c, 'diseases')
+        conn.commit()
         conn.close()
+        admin_events.publish('catalog', {'name': 'diseases', 'version': version})
         return jsonify({'success': True, 'disease_id': disease_id})
     except Exception as e:
         print(f"Error adding disease: {str(e)}")
@@ -857,22 +4325,23 @@ def delete_disease(disease_id):
         conn = get_db_connection()
         c = conn.cursor()
         c.execute('DELETE FROM diseases WHERE id = ?', (disease_id,))
+        version = bump_catalog_version(c, 'diseases')
         conn.commit()
         conn.close()
+        admin_events.publish('catalog', {'name': 'diseases', 'version': version})
         return jsonify({'success': True})
     except Exception as e:
         print(f"Error deleting disease: {str(e)}")
         return jsonify({'success': False, 'message': 'Error deleting disease'}), 500
 
 # -------------------- Schemes API --------------------
+def load_schemes(c):
+    c.execute('SELECT id, title, description FROM schemes ORDER BY id')
+    return [dict(row) for row in c.fetchall()]
+
 @app.route('/api/schemes', methods=['GET'])
 def get_schemes():
-    conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('SELECT id, title, description FROM schemes ORDER BY id')
-    schemes = [dict(row) for row in c.fetchall()]
-    conn.close()
-    return jsonify({'success': True, 'schemes': schemes})
+    return catalog_cache.response('schemes', load_schemes)
 
 @app.route('/api/schemes', methods=['POST'])
 def add_scheme():
@@ -887,9 +4356,11 @@ def add_scheme():
         conn = get_db_connection()
         c = conn.cursor()
         c.execute('INSERT INTO schemes (title, description) VALUES (?, ?)', (title, description))
-        conn.commit()
         scheme_id = c.lastrowid
+        version = bump_catalog_version(c, 'schemes')
+        conn.commit()
         conn.close()
+        admin_events.publish('catalog', {'name': 'schemes', 'version': version})
         return jsonify({'success': True, 'scheme_id': scheme_id})
     except Exception as e:
         print(f"Error adding scheme: {str(e)}")
@@ -903,142 +4374,260 @@ def delete_scheme(scheme_id):
         conn = get_db_connection()
         c = conn.cursor()
         c.execute('DELETE FROM schemes WHERE id = ?', (scheme_id,))
+        version = bump_catalog_version(c, 'schemes')
         conn.commit()
         conn.close()
+        admin_events.publish('catalog', {'name': 'schemes', 'version': version})
         return jsonify({'success': True})
     except Exception as e:
         print(f"Error deleting scheme: {str(e)}")
         return jsonify({'success': False, 'message': 'Error deleting scheme'}), 500
 
 # -------------------- Excel Export API --------------------
+
+# Month names in Gujarati
+GUJARATI_MONTHS = {
+    1: 'જાન્યુઆરી', 2: 'ફેબ્રુઆરી', 3: 'માર્ચ',
+    4: 'એપ્રિલ', 5: 'મે', 6: 'જૂન',
+    7: 'જુલાઈ', 8: 'ઑગસ્ટ', 9: 'સપ્ટેમ્બર',
+    10: 'ઑક્ટોબર', 11: 'નવેમ્બર', 12: 'ડિસેમ્બર'
+}
+
+IST_TIMEZONE = 'Asia/Kolkata'
+
+EXPORT_COLUMNS = ['Name', 'Mobile', 'Email', 'Registration Date (IST)']
+
+# Index = month number, for vectorized lookups
+GUJARATI_MONTH_NAMES = [''] + [GUJARATI_MONTHS[m] for m in range(1, 13)]
+
+def format_registration_dates(values):
+    """
+    Format a column of UTC timestamps as "27 ડિસેમ્બર, 2025 એ 11:10 AM વાગ્યે"
+    in IST. Values that cannot be parsed are returned as-is; empty ones as '-'.
+    """
+    import numpy as np
+    import pandas as pd
+    raw = pd.Series(list(values), dtype=object)
+    if raw.empty:
+        return []
+    # Naive timestamps are UTC (SQLite CURRENT_TIMESTAMP)
+    parsed = pd.to_datetime(raw, format='ISO8601', errors='coerce', utc=True)
+    ist = parsed.dt.tz_convert(IST_TIMEZONE)
+    valid = ist.notna().to_numpy()
+
+    result = np.where(raw.isna() | (raw == ''), '-', raw.astype(str)).astype(object)
+    if valid.any():
+        ist = ist[valid]
+        hour = ist.dt.hour.to_numpy()
+        hour_12 = hour % 12
+        hour_12[hour_12 == 0] = 12
+        formatted = (ist.dt.day.astype(str) + ' '
+                     + np.array(GUJARATI_MONTH_NAMES, dtype=object)[ist.dt.month.to_numpy()] + ', '
+                     + ist.dt.year.astype(str) + ' એ '
+                     + pd.Series(hour_12, index=ist.index).astype(str) + ':'
+                     + ist.dt.minute.astype(str).str.zfill(2) + ' '
+                     + pd.Series(np.where(hour < 12, 'AM', 'PM'), index=ist.index) + ' વાગ્યે')
+        result[valid] = formatted.to_numpy()
+    return result.tolist()
+
+def iter_export_rows(batch_size):
+    """Yield export rows, fetching users from the database in batches"""
+    conn = get_db_connection()
+    c = conn.cursor()
+    try:
+        c.execute('''SELECT name, mobile, email, created_at 
+                     FROM users 
+                     ORDER BY created_at DESC''')
+        while True:
+            users = c.fetchmany(batch_size)
+            if not users:
+                break
+            dates = format_registration_dates(user[3] for user in users)
+            for (name, mobile, email, _), formatted_date in zip(users, dates):
+                yield [name or '-', mobile or '-', email or '-', formatted_date]
+    finally:
+        c.close()
+        conn.close()
+
+def export_column_widths():
+    """
+    Column widths (capped at 50) without a pass over the formatted rows:
+    text columns use MAX(length()) in SQL, the date column the longest
+    string the date format can produce
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute('SELECT MAX(length(name)), MAX(length(mobile)), MAX(length(email)) FROM users')
+    lengths = [length or 1 for length in c.fetchone()]
+    conn.close()
+    longest_month = max(GUJARATI_MONTHS.values(), key=len)
+    date_length = len(f'28 {longest_month}, 2000 એ 12:00 PM વાગ્યે')
+    return [min(max(length, len(header)) + 2, 50)
+            for length, header in zip(lengths + [date_length], EXPORT_COLUMNS)]
+
+def write_users_xlsx(path):
+    """Write the users workbook to path with a write-only (streaming) worksheet"""
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Users')
+    # Write-only sheets need their widths before the first row
+    for index, width in enumerate(export_column_widths(), start=1):
+        worksheet.column_dimensions[get_column_letter(index)].width = width
+    worksheet.append(EXPORT_COLUMNS)
+    for row in iter_export_rows(app.config['EXPORT_BATCH_SIZE']):
+        worksheet.append(row)
+    workbook.save(path)
+
+def stream_users_csv():
+    """CSV export generator, one chunk per database batch"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens the Gujarati text as UTF-8
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_COLUMNS)
+    batch_size = app.config['EXPORT_BATCH_SIZE']
+    for count, row in enumerate(iter_export_rows(batch_size), start=1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def export_filename(extension):
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f'users_export_{timestamp}.{extension}'
+
 @app.route('/api/admin/export-users', methods=['GET'])
 def export_users_to_excel():
-    """Export user data to Excel file - Admin only"""
+    """
+    Export user data to Excel file - Admin only
+    ?format=csv streams a CSV instead of building an .xlsx
+    """
     try:
         # Check admin authentication
         if 'admin_id' not in session:
             return jsonify({'success': False, 'message': 'Unauthorized'}), 401
         
-        # Get database connection
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Fetch all users from database
-        c.execute('''SELECT name, mobile, email, created_at 
-                     FROM users 
-                     ORDER BY created_at DESC''')
-        users = c.fetchall()
-        conn.close()
-        
-        # Convert to list of dictionaries
-        users_data = []
-        ist_timezone = pytz.timezone('Asia/Kolkata')
-        
-        for user in users:
-            name, mobile, email, created_at = user
-            
-            # Convert timestamp to IST and format
-            if created_at:
-                try:
-                    # Parse the timestamp
-                    if isinstance(created_at, str):
-                        # Try different date formats
-                        try:
-                            dt = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
-                        except:
-                            try:
-                                dt = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
-                            except:
-                                # Fallback to current time if parsing fails
-                                dt = datetime.now()
-                    else:
-                        dt = created_at
-                    
-                    # Convert to IST if timezone info is missing
-                    if dt.tzinfo is None:
-                        # Assume UTC if no timezone info
-                        dt = pytz.utc.localize(dt)
-                    dt_ist = dt.astimezone(ist_timezone)
-                    
-                    # Format as requested: "27 ડિસેમ્બર, 2025 એ 11:10 AM વાગ્યે"
-                    day = dt_ist.day
-                    month_num = dt_ist.month
-                    year = dt_ist.year
-                    hour = dt_ist.hour
-                    minute = dt_ist.minute
-                    
-                    # Month names in Gujarati
-                    month_map = {
-                        1: 'જાન્યુઆરી', 2: 'ફેબ્રુઆરી', 3: 'માર્ચ',
-                        4: 'એપ્રિલ', 5: 'મે', 6: 'જૂન',
-                        7: 'જુલાઈ', 8: 'ઑગસ્ટ', 9: 'સપ્ટેમ્બર',
-                        10: 'ઑક્ટોબર', 11: 'નવેમ્બર', 12: 'ડિસેમ્બર'
-                    }
-                    month_gu = month_map.get(month_num, '')
-                    
-                    # Format time in 12-hour format
-                    period = 'AM' if hour < 12 else 'PM'
-                    hour_12 = hour % 12
-                    if hour_12 == 0:
-                        hour_12 = 12
-                    
-                    formatted_date = f'{day} {month_gu}, {year} એ {hour_12}:{minute:02d} {period} વાગ્યે'
-                except Exception as e:
-                    # If formatting fails, use a simple format
-                    print(f"Error formatting date: {e}")
-                    formatted_date = str(created_at) if created_at else '-'
-            else:
-                formatted_date = '-'
-            
-            users_data.append({
-                'Name': name or '-',
-                'Mobile': mobile or '-',
-                'Email': email or '-',
-                'Registration Date (IST)': formatted_date
-            })
-        
-        # Create DataFrame
-        df = pd.DataFrame(users_data)
-        
-        # Create Excel file in memory
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Users')
-            
-            # Get the workbook and worksheet
-            workbook = writer.book
-            worksheet = writer.sheets['Users']
-            
-            # Auto-adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        output.seek(0)
+        if request.args.get('format') == 'csv':
+            response = Response(stream_with_context(stream_users_csv()), mimetype='text/csv; charset=utf-8')
+            response.headers['Content-Disposition'] = f'attachment; filename={export_filename("csv")}'
+            return response
         
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'users_export_{timestamp}.xlsx'
-        
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
-        )
+        # Build the workbook in a temp file and stream it from disk
+        tmp = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+        tmp.close()
+        try:
+            write_users_xlsx(tmp.name)
+            response = send_file(
+                tmp.name,
+                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                as_attachment=True,
+                download_name=export_filename('xlsx')
+            )
+        except Exception:
+            os.remove(tmp.name)
+            raise
+        response.call_on_close(lambda: os.remove(tmp.name))
+        return response
         
     except Exception as e:
         print(f"Error exporting users to Excel: {str(e)}")
         return jsonify({'success': False, 'message': 'Excel export failed'}), 500
 
+# Background exports share the scan_jobs table but not the scan workers
+export_jobs = ScanJobQueue(1, 2)
+atexit.register(export_jobs.shutdown)
+
+def run_users_export(extension):
+    """Write a users export into EXPORT_FOLDER (runs as a background job)"""
+    os.makedirs(app.config['EXPORT_FOLDER'], exist_ok=True)
+    # Old exports go away together with their job rows
+    cutoff = time.time() - app.config['SCAN_JOB_RETENTION_HOURS'] * 3600
+    for old_file in os.listdir(app.config['EXPORT_FOLDER']):
+        old_path = os.path.join(app.config['EXPORT_FOLDER'], old_file)
+        if os.path.isfile(old_path) and os.path.getmtime(old_path) < cutoff:
+            os.remove(old_path)
+    filename = export_filename(extension)
+    path = os.path.join(app.config['EXPORT_FOLDER'], f'{uuid.uuid4().hex}_{filename}')
+    if extension == 'csv':
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for chunk in stream_users_csv():
+                f.write(chunk)
+    else:
+        write_users_xlsx(path)
+    return {'path': path, 'filename': filename}
+
+@app.route('/api/admin/export-users/jobs', methods=['POST'])
+def start_users_export():
+    """Start a background users export; poll the returned status URL"""
+    if 'admin_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    extension = 'csv' if request.args.get('format') == 'csv' else 'xlsx'
+    job_id = export_jobs.submit('export', run_users_export, extension)
+    if job_id is None:
+        return scan_queue_full_response()
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': url_for('users_export_status', job_id=job_id)
+    }), 202
+
+def get_export_job(job_id):
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("SELECT status, result FROM scan_jobs WHERE id = ? AND kind = 'export'", (job_id,))
+    job = c.fetchone()
+    conn.close()
+    return job
+
+@app.route('/api/admin/export-users/jobs/<job_id>', methods=['GET'])
+def users_export_status(job_id):
+    if 'admin_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    job = get_export_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    payload = {'success': job['status'] != 'failed', 'job_id': job_id, 'status': job['status']}
+    if job['status'] == 'done':
+        payload['download_url'] = url_for('download_users_export', job_id=job_id)
+    return jsonify(payload)
+
+@app.route('/api/admin/export-users/jobs/<job_id>/download', methods=['GET'])
+def download_users_export(job_id):
+    if 'admin_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    job = get_export_job(job_id)
+    if not job or job['status'] != 'done':
+        return jsonify({'success': False, 'message': 'Export not ready'}), 404
+    result = json.loads(job['result'])
+    if not os.path.exists(result['path']):
+        return jsonify({'success': False, 'message': 'Export expired'}), 404
+    return send_file(os.path.abspath(result['path']), as_attachment=True, download_name=result['filename'])
+
+record_startup_step('total', _startup_started)
+
+def start_worker():
+    """
+    Background work for a serving process. Not run on import (CLI commands and
+    scripts import the app too): gunicorn.conf.py calls it from
+    post_worker_init, and `python app.py` before serving.
+    """
+    # Periodic visits retention/rollup (one worker wins each run)
+    start_visit_maintenance()
+    
+    # Load the detection model when the worker starts rather than on the first scan
+    if app.config['DETECTION_PRELOAD']:
+        step_started = time.perf_counter()
+        get_detector()
+        record_startup_step('detector_preload', step_started)
+    
+    if os.getenv('STARTUP_REPORT') == '1':
+        print(f"Startup timings (s): {dict(startup_timings)}")
+
 if __name__ == '__main__':
+    start_worker()
     app.run(debug=True, host='0.0.0.0', port=5000)
 
@@ -0,0 +1,106 @@
+"""
+Benchmark: Gujarati IST date column for the users export.
+Compares a per-row reference formatter (the export's original one, kept
+here) with the app's vectorized format_registration_dates() and checks they
+produce the same strings.
+
+Usage (from the project root):
+    python benchmarks/bench_date_format.py --rows 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the benchmark away from the real database
+os.environ.setdefault('DATABASE', os.path.join(tempfile.mkdtemp(), 'bench.db'))
+os.environ.setdefault('DETECTION_PRELOAD', '0')
+
+import app  # noqa: E402
+
+
+def format_registration_date(created_at):
+    """Reference: one timestamp at a time with strptime and pytz"""
+    import pytz
+    if not created_at:
+        return '-'
+    try:
+        try:
+            dt = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            dt = datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S.%f')
+    except ValueError:
+        return str(created_at)
+    dt_ist = pytz.utc.localize(dt).astimezone(pytz.timezone(app.IST_TIMEZONE))
+    period = 'AM' if dt_ist.hour < 12 else 'PM'
+    hour_12 = dt_ist.hour % 12 or 12
+    month_gu = app.GUJARATI_MONTHS[dt_ist.month]
+    return f'{dt_ist.day} {month_gu}, {dt_ist.year} એ {hour_12}:{dt_ist.minute:02d} {period} વાગ્યે'
+
+
+def make_timestamps(rows, seed=42):
+    """SQLite-style UTC timestamps, some with fractional seconds and some empty"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    values = []
+    for _ in range(rows):
+        dt = start + timedelta(seconds=rng.randrange(2 * 365 * 24 * 3600))
+        roll = rng.random()
+        if roll < 0.01:
+            values.append(None)
+        elif roll < 0.2:
+            values.append(dt.strftime('%Y-%m-%d %H:%M:%S.%f'))
+        else:
+            values.append(dt.strftime('%Y-%m-%d %H:%M:%S'))
+    return values
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    values = make_timestamps(args.rows)
+
+    per_row_time, per_row = best_of(args.repeat, lambda v: [format_registration_date(x) for x in v], values)
+    vectorized_time, vectorized = best_of(args.repeat, app.format_registration_dates, values)
+
+    if per_row != vectorized:
+        mismatch = next(i for i, (a, b) in enumerate(zip(per_row, vectorized)) if a != b)
+        raise SystemExit(f'Outputs differ at row {mismatch}: {per_row[mismatch]!r} != {vectorized[mismatch]!r}')
+
+    results = {
+        'benchmark': 'date_format',
+        'rows': args.rows,
+        'per_row_seconds': round(per_row_time, 4),
+        'vectorized_seconds': round(vectorized_time, 4),
+        'speedup': round(per_row_time / vectorized_time, 2) if vectorized_time else None
+    }
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{args.rows} rows: per-row {results['per_row_seconds']}s, "
+              f"vectorized {results['vectorized_seconds']}s ({results['speedup']}x)")
+
+
+if __name__ == '__main__':
+    main()
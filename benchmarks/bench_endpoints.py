@@ -0,0 +1,199 @@
+"""
+Benchmark: endpoint latency through the Flask test client.
+Seeds a synthetic database, then times each case in-process with the mock
+detector and the fake Gemini server, and optionally compares the results
+with a stored baseline (exit code 1 on a regression).
+
+Usage (from the project root):
+    python benchmarks/bench_endpoints.py --scale small
+    python benchmarks/bench_endpoints.py --baseline benchmarks/baselines/endpoints.json
+    python benchmarks/bench_endpoints.py --output benchmarks/baselines/endpoints.json   # new baseline
+"""
+
+import argparse
+import gc
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import (SCALES, import_app, machine_info, print_table, report_comparison,  # noqa: E402
+                    seed_database, summarize, write_results)
+from fake_gemini import start_fake_gemini  # noqa: E402
+
+
+def noise_jpeg(rng, size=(320, 240)):
+    """A JPEG no other generated image is a near-duplicate of"""
+    from PIL import Image
+    image = Image.frombytes('RGB', size, rng.randbytes(size[0] * size[1] * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class Cases:
+    """Each case is a method taking the test client; heavy cases run fewer iterations"""
+
+    HEAVY = {'export_users_xlsx': 20, 'export_users_csv': 20}
+
+    def __init__(self, rng, fresh_images):
+        self.rng = rng
+        # Generated up front so encoding them is not timed
+        self.fresh_images = iter(fresh_images)
+        self.repeat_image = fresh_images[0]
+        self.crops_etag = None
+
+    def names(self):
+        return [name for name in dir(self) if not name.startswith('_') and name not in ('names', 'run', 'HEAVY')
+                and callable(getattr(self, name))]
+
+    def run(self, name, client):
+        response = getattr(self, name)(client)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{name}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}')
+        response.close()
+
+    def page_index(self, client):
+        return client.get('/')
+
+    def api_stats(self, client):
+        return client.get('/api/stats')
+
+    def catalog_crops(self, client):
+        return client.get('/api/crops')
+
+    def catalog_crops_not_modified(self, client):
+        if self.crops_etag is None:
+            self.crops_etag = client.get('/api/crops').headers['ETag']
+        return client.get('/api/crops', headers={'If-None-Match': self.crops_etag})
+
+    def disease_search(self, client):
+        return client.get('/api/diseases/search', query_string={'q': self.rng.choice(['blight', 'rust', 'ડાઘ', 'wilt'])})
+
+    def weather(self, client):
+        return client.get('/api/weather', query_string={'lat': round(self.rng.uniform(20, 24), 2),
+                                                         'lon': round(self.rng.uniform(69, 74), 2)})
+
+    def admin_stats(self, client):
+        return client.get('/api/admin/stats')
+
+    def admin_users_page(self, client):
+        return client.get('/api/admin/users', query_string={'limit': 50})
+
+    def admin_scan_records(self, client):
+        return client.get('/api/admin/scan-records')
+
+    def admin_visit_history(self, client):
+        return client.get('/api/admin/visit-history', query_string={'days': 365})
+
+    def scan_upload_new_image(self, client):
+        return client.post('/api/scan/upload', data={
+            'file': (io.BytesIO(next(self.fresh_images)), 'leaf.jpg'), 'crop_type': self.rng.choice(['cotton', 'wheat', 'rice'])
+        })
+
+    def scan_upload_repeat_image(self, client):
+        return client.post('/api/scan/upload', data={
+            'file': (io.BytesIO(self.repeat_image), 'leaf.jpg'), 'crop_type': 'cotton'
+        })
+
+    def upload_page_gemini_stub(self, client):
+        return client.post('/upload', data={'image': (io.BytesIO(next(self.fresh_images)), 'leaf.jpg')})
+
+    def export_users_csv(self, client):
+        response = client.get('/api/admin/export-users', query_string={'format': 'csv'})
+        response.get_data()
+        return response
+
+    def export_users_xlsx(self, client):
+        response = client.get('/api/admin/export-users')
+        response.get_data()
+        return response
+
+
+def check_disease_search(client):
+    """
+    Gujarati search has to match whole words by prefix, not the letters left
+    over after splitting at vowel signs; fails the run before any timing.
+    """
+    expected = {'પાંદડા': 3, 'કપાસમાં પાંદડા': 1, 'કર્લ': 1, 'પાદ': 0, 'ર્લ': 0}
+    for query, total in expected.items():
+        data = client.get('/api/diseases/search', query_string={'q': query}).get_json()
+        if data.get('total') != total:
+            raise RuntimeError(f'disease search {query!r}: expected {total} results, got {data.get("total")}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--users', type=int, help='override the scale')
+    parser.add_argument('--visits', type=int, help='override the scale')
+    parser.add_argument('--scans', type=int, help='override the scale')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--only', help='comma separated case names')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write JSON results here')
+    parser.add_argument('--baseline', help='compare with this results file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    users, visits, scans = SCALES[args.scale]
+    users = args.users if args.users is not None else users
+    visits = args.visits if args.visits is not None else visits
+    scans = args.scans if args.scans is not None else scans
+
+    workdir = tempfile.mkdtemp(prefix='paaksathi-bench-')
+    # import_app() moves into workdir; --output / --baseline are relative to here
+    cwd = os.getcwd()
+    gemini = start_fake_gemini(seed=args.seed)
+    try:
+        seed_database(workdir, users, visits, scans, args.seed)
+        app = import_app(workdir, gemini.base_url)
+        rng = random.Random(args.seed)
+        # Enough unseen images for both upload cases (plus the repeated one)
+        cases = Cases(rng, [noise_jpeg(rng) for _ in range(2 * (args.iterations + args.warmup) + 1)])
+        names = args.only.split(',') if args.only else cases.names()
+
+        client = app.app.test_client()
+        client.post('/api/admin/login', json={'username': 'admin', 'password': 'admin123'})
+        check_disease_search(client)
+
+        results = {}
+        for name in names:
+            iterations = min(args.iterations, Cases.HEAVY.get(name, args.iterations))
+            for _ in range(min(args.warmup, iterations)):
+                cases.run(name, client)
+            latencies = []
+            gc.collect()
+            for _ in range(iterations):
+                started = time.perf_counter()
+                cases.run(name, client)
+                latencies.append(time.perf_counter() - started)
+            results[name] = summarize(latencies)
+            print(f"{name:<28} p50 {results[name]['p50_ms']} ms", file=sys.stderr)
+    finally:
+        os.chdir(cwd)
+        gemini.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = {
+        'suite': 'endpoints',
+        'machine': machine_info(),
+        'config': {'users': users, 'visits': visits, 'scans': scans,
+                   'iterations': args.iterations, 'seed': args.seed},
+        'results': results,
+    }
+    print_table(output)
+    if args.output:
+        write_results(args.output, output)
+    if args.baseline and not report_comparison(output, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
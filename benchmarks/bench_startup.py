@@ -0,0 +1,96 @@
+"""
+Benchmark: worker startup time.
+Imports app.py in fresh interpreters with `python -X importtime` and reports
+the app's own startup phases plus the slowest top-level imports.
+
+Usage (from the project root):
+    python benchmarks/bench_startup.py --runs 5 --top 10
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# start_worker() is what a gunicorn worker runs after importing the app
+CHILD = 'import json, app; app.start_worker(); print(json.dumps(app.startup_timings))'
+
+
+def parse_importtime(stderr):
+    """{package: cumulative seconds} for the imports made directly by app.py"""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Two spaces of indent per nesting level; app itself is at level 0
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        if depth != 1:
+            continue
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(cumulative) / 1e6
+    return packages
+
+
+def run_once(database_dir, preload):
+    env = dict(os.environ)
+    env.setdefault('DATABASE', os.path.join(database_dir, 'bench.db'))
+    env['DETECTION_PRELOAD'] = '1' if preload else '0'
+    env['VISIT_MAINTENANCE_INTERVAL_HOURS'] = '0'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--preload', action='store_true', help='include loading the detection model')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results')
+    args = parser.parse_args()
+
+    database_dir = tempfile.mkdtemp()
+    try:
+        # The first run bootstraps the database; later runs see a current schema
+        first_phases, _ = run_once(database_dir, args.preload)
+        runs = [run_once(database_dir, args.preload) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(database_dir, ignore_errors=True)
+
+    phases = {name: round(statistics.median(run[0].get(name, 0) for run in runs), 4)
+              for name in runs[0][0]}
+    packages = {}
+    for _, imports in runs:
+        for name, seconds in imports.items():
+            packages.setdefault(name, []).append(seconds)
+    slowest = sorted(((name, round(statistics.median(values), 4)) for name, values in packages.items()),
+                     key=lambda item: item[1], reverse=True)[:args.top]
+
+    results = {
+        'benchmark': 'startup',
+        'runs': args.runs,
+        'first_run_db_bootstrap_seconds': first_phases.get('db_bootstrap'),
+        'phases_seconds': phases,
+        'slowest_imports_seconds': dict(slowest)
+    }
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"Startup (median of {args.runs}): " +
+              ', '.join(f'{name} {seconds}s' for name, seconds in phases.items()))
+        print(f"First run db_bootstrap: {results['first_run_db_bootstrap_seconds']}s")
+        print('Slowest imports:')
+        for name, seconds in slowest:
+            print(f'  {name:<30} {seconds}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+Shared helpers for the benchmark scripts: an isolated app environment,
+latency summaries, result files and comparison against a stored baseline.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.join(ROOT, 'benchmarks')
+BASELINES_DIR = os.path.join(BENCHMARKS_DIR, 'baselines')
+
+# Synthetic database sizes (users, visits, scans)
+SCALES = {
+    'small': (1000, 20000, 5000),
+    'medium': (10000, 200000, 50000),
+    'large': (100000, 2000000, 500000),
+}
+
+
+def app_environment(workdir, gemini_endpoint=None):
+    """
+    Environment for running app.py away from the real database and uploads:
+    mock detector, no model preload, no background visit maintenance.
+    """
+    env = {
+        'DATABASE': os.path.join(workdir, 'bench.db'),
+        'DETECTION_BACKEND': 'mock',
+        'DETECTION_PRELOAD': '0',
+        'VISIT_MAINTENANCE_INTERVAL_HOURS': '0',
+        'EXPORT_FOLDER': os.path.join(workdir, 'exports'),
+    }
+    if gemini_endpoint:
+        env['GEMINI_API_ENDPOINT'] = gemini_endpoint
+    return env
+
+
+def import_app(workdir, gemini_endpoint=None):
+    """Import app.py in this process with app_environment(); uploads land in workdir"""
+    os.environ.update(app_environment(workdir, gemini_endpoint))
+    # UPLOAD_FOLDER and the model directory are relative to the working directory
+    os.chdir(workdir)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import app
+    return app
+
+
+def seed_database(workdir, users, visits, scans, seed=42):
+    """Build the synthetic database with seed_db.py in a separate process"""
+    env = dict(os.environ, **app_environment(workdir))
+    subprocess.run([sys.executable, os.path.join(BENCHMARKS_DIR, 'seed_db.py'),
+                    '--users', str(users), '--visits', str(visits), '--scans', str(scans),
+                    '--seed', str(seed)],
+                   cwd=workdir, env=env, check=True)
+
+
+def summarize(latencies):
+    """Latency list in seconds -> summary in milliseconds"""
+    values = sorted(latencies)
+    if not values:
+        return {'count': 0}
+
+    def percentile(p):
+        index = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+        return round(values[index] * 1000, 3)
+
+    return {
+        'count': len(values),
+        'mean_ms': round(statistics.fmean(values) * 1000, 3),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'min_ms': round(values[0] * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3),
+    }
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def write_results(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+# Metrics compared against the baseline, and whether higher is better
+COMPARED_METRICS = {'p50_ms': False, 'p95_ms': False, 'throughput_rps': True}
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    (regressions, improvements) as lists of (case, metric, baseline, current)
+    for metrics that moved by more than tolerance (a fraction, e.g. 0.2).
+    """
+    regressions, improvements = [], []
+    for case, current in results['results'].items():
+        previous = baseline.get('results', {}).get(case)
+        if not previous:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if metric not in current or not previous.get(metric):
+                continue
+            change = (current[metric] - previous[metric]) / previous[metric]
+            if higher_is_better:
+                change = -change
+            entry = (case, metric, previous[metric], current[metric])
+            if change > tolerance:
+                regressions.append(entry)
+            elif change < -tolerance:
+                improvements.append(entry)
+    return regressions, improvements
+
+
+def report_comparison(results, baseline_path, tolerance):
+    """Print the comparison; returns False when something regressed"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions, improvements = compare_to_baseline(results, baseline, tolerance)
+    if baseline.get('machine', {}).get('cpus') != results['machine']['cpus']:
+        print(f"Note: baseline was recorded on {baseline.get('machine', {}).get('cpus')} CPUs, "
+              f"this run has {results['machine']['cpus']}")
+    for label, entries in (('Regressions', regressions), ('Improvements', improvements)):
+        if entries:
+            print(f'{label} (more than {tolerance:.0%} vs {os.path.relpath(baseline_path)}):')
+            for case, metric, before, after in entries:
+                print(f'  {case:<28} {metric:<15} {before} -> {after}')
+    if not regressions and not improvements:
+        print(f'No change beyond {tolerance:.0%} vs {os.path.relpath(baseline_path)}')
+    return not regressions
+
+
+def print_table(results):
+    print(f"{'case':<28} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9}")
+    for case, summary in results['results'].items():
+        print(f"{case:<28} {summary.get('count', 0):>7} {summary.get('p50_ms', '-'):>9} "
+              f"{summary.get('p95_ms', '-'):>9} {summary.get('mean_ms', '-'):>9}")
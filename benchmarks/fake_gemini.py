@@ -0,0 +1,121 @@
+"""
+Fake Gemini server: a local stand-in for the generateContent REST API.
+Answers every request with a fixed Gujarati diagnosis after a configurable
+delay, and can fail or hang a share of requests to exercise the app's
+timeouts, retries and circuit breaker.
+
+Usage (from the project root):
+    python benchmarks/fake_gemini.py --port 8765 --latency-ms 300 --error-rate 0.1
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8765 python app.py
+
+In Python, start_fake_gemini() runs it on a background thread and returns
+the server; its base_url goes into GEMINI_API_ENDPOINT.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = """રોગનું નામ:
+બેક્ટેરિયલ બ્લાઇટ
+
+લક્ષણો:
+- પાન પર પાણી ભીના ઘા
+- કોણીય ડાઘ
+
+ઉપચાર:
+- કોપર આધારિત ફૂગનાશકનો ઉપયોગ કરો
+
+ખાતર / દવા:
+- કોપર ઓક્સીક્લોરાઇડ 50% WP
+- 2.5 ગ્રામ પ્રતિ લિટર પાણી
+
+રોકથામ:
+- સંક્રમિત છોડ દૂર કરો
+"""
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with server.lock:
+            server.requests += 1
+
+        if not self.path.split('?')[0].endswith(':generateContent'):
+            return self._reply(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+        roll = server.random.random()
+        if roll < server.hang_rate:
+            # Longer than any sane client timeout
+            time.sleep(server.hang_seconds)
+        time.sleep(server.latency)
+        if roll < server.hang_rate + server.error_rate:
+            return self._reply(503, {'error': {'code': 503, 'message': 'Overloaded', 'status': 'UNAVAILABLE'}})
+        self._reply(200, {
+            'candidates': [{
+                'content': {'parts': [{'text': server.answer}], 'role': 'model'},
+                'finishReason': 'STOP',
+                'index': 0
+            }]
+        })
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def start_fake_gemini(port=0, latency_ms=0, error_rate=0.0, hang_rate=0.0, hang_seconds=60,
+                      answer=ANSWER, seed=None, verbose=False):
+    """Run the fake server on a daemon thread; call .shutdown() to stop it"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeGeminiHandler)
+    server.daemon_threads = True
+    server.latency = latency_ms / 1000
+    server.error_rate = error_rate
+    server.hang_rate = hang_rate
+    server.hang_seconds = hang_seconds
+    server.answer = answer
+    server.random = random.Random(seed)
+    server.verbose = verbose
+    server.requests = 0
+    server.lock = threading.Lock()
+    server.base_url = f'http://127.0.0.1:{server.server_port}'
+    threading.Thread(target=server.serve_forever, name='fake-gemini', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 503')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='share of requests that stall')
+    parser.add_argument('--hang-seconds', type=float, default=60)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = start_fake_gemini(args.port, args.latency_ms, args.error_rate, args.hang_rate,
+                               args.hang_seconds, seed=args.seed, verbose=args.verbose)
+    print(f'Fake Gemini listening on {server.base_url}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
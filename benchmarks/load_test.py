@@ -0,0 +1,265 @@
+"""
+Load test: concurrent clients against a local gunicorn.
+Seeds a synthetic database, starts the fake Gemini server and gunicorn with
+the mock detector, then runs a closed-loop load of `--concurrency` clients
+over a weighted mix of endpoints for `--duration` seconds. Reports latency
+per endpoint, throughput and error rate, and optionally compares them with
+a stored baseline (exit code 1 on a regression).
+
+Usage (from the project root):
+    python benchmarks/load_test.py --workers 2 --threads 4 --concurrency 16 --duration 30
+    python benchmarks/load_test.py --baseline benchmarks/baselines/load.json
+"""
+
+import argparse
+import io
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_endpoints import noise_jpeg  # noqa: E402
+from common import (ROOT, SCALES, app_environment, machine_info, print_table,  # noqa: E402
+                    report_comparison, seed_database, summarize, write_results)
+from fake_gemini import start_fake_gemini  # noqa: E402
+
+# Relative weight of each request in the mix, roughly a farmer-heavy day
+MIX = {
+    'page_index': 20,
+    'api_stats': 15,
+    'catalog_crops': 15,
+    'disease_search': 10,
+    'weather': 10,
+    'scan_upload': 15,
+    'upload_gemini': 5,
+    'admin_stats': 5,
+    'admin_scan_records': 5,
+}
+
+
+class Client:
+    """One simulated user: its own HTTP session, logged in as admin"""
+
+    def __init__(self, base_url, rng, images):
+        import requests
+        self.base_url = base_url
+        self.rng = rng
+        self.images = images
+        self.session = requests.Session()
+        self.session.post(f'{base_url}/api/admin/login', json={'username': 'admin', 'password': 'admin123'},
+                          timeout=30).raise_for_status()
+
+    def get(self, path, **kwargs):
+        return self.session.get(self.base_url + path, timeout=60, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.session.post(self.base_url + path, timeout=60, **kwargs)
+
+    def page_index(self):
+        return self.get('/')
+
+    def api_stats(self):
+        return self.get('/api/stats')
+
+    def catalog_crops(self):
+        return self.get('/api/crops')
+
+    def disease_search(self):
+        return self.get('/api/diseases/search', params={'q': self.rng.choice(['blight', 'rust', 'ડાઘ', 'wilt'])})
+
+    def weather(self):
+        return self.get('/api/weather', params={'lat': round(self.rng.uniform(20, 24), 2),
+                                                'lon': round(self.rng.uniform(69, 74), 2)})
+
+    def scan_upload(self):
+        return self.post('/api/scan/upload', files={'file': ('leaf.jpg', io.BytesIO(self.rng.choice(self.images)))},
+                         data={'crop_type': self.rng.choice(['cotton', 'wheat', 'rice'])})
+
+    def upload_gemini(self):
+        return self.post('/upload', files={'image': ('leaf.jpg', io.BytesIO(self.rng.choice(self.images)))})
+
+    def admin_stats(self):
+        return self.get('/api/admin/stats')
+
+    def admin_scan_records(self):
+        return self.get('/api/admin/scan-records')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workdir, port, workers, threads, gemini_endpoint):
+    env = dict(os.environ, **app_environment(workdir, gemini_endpoint))
+    # The database is already seeded and migrated
+    env['DB_AUTO_INIT'] = '0'
+    log = open(os.path.join(workdir, 'gunicorn.log'), 'w')
+    process = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+        '-w', str(workers), '--threads', str(threads),
+        '-b', f'127.0.0.1:{port}', '--chdir', workdir, '--pythonpath', ROOT, 'app:app'
+    ], env=env, stdout=log, stderr=subprocess.STDOUT)
+    return process, log
+
+
+def wait_until_ready(base_url, process, timeout=60):
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with code {process.returncode}')
+        try:
+            if requests.get(f'{base_url}/api/stats', timeout=2).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'gunicorn did not answer within {timeout}s')
+
+
+def run_load(base_url, concurrency, duration, warmup, images, seed):
+    """{endpoint: ([latencies], errors)} for requests started after the warmup"""
+    names = list(MIX)
+    weights = [MIX[name] for name in names]
+    samples = {name: ([], [0]) for name in names}
+    lock = threading.Lock()
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        client = Client(base_url, rng, images)
+        local = {name: ([], 0) for name in names}
+        while True:
+            started = time.monotonic()
+            if started >= stop_at:
+                break
+            name = rng.choices(names, weights)[0]
+            try:
+                response = getattr(client, name)()
+                ok = response.status_code < 400
+                response.close()
+            except Exception as e:
+                print(f'{name}: {e}', file=sys.stderr)
+                ok = False
+            if started >= measure_from:
+                latencies, errors = local[name]
+                if ok:
+                    latencies.append(time.monotonic() - started)
+                local[name] = (latencies, errors + (not ok))
+        with lock:
+            for name, (latencies, errors) in local.items():
+                samples[name][0].extend(latencies)
+                samples[name][1][0] += errors
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {name: (latencies, errors[0]) for name, (latencies, errors) in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--users', type=int, help='override the scale')
+    parser.add_argument('--visits', type=int, help='override the scale')
+    parser.add_argument('--scans', type=int, help='override the scale')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--concurrency', type=int, default=16, help='simultaneous clients')
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='unmeasured seconds before that')
+    parser.add_argument('--gemini-latency-ms', type=float, default=300)
+    parser.add_argument('--images', type=int, default=200, help='distinct upload images (repeats hit the scan cache)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write JSON results here')
+    parser.add_argument('--baseline', help='compare with this results file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    users, visits, scans = SCALES[args.scale]
+    users = args.users if args.users is not None else users
+    visits = args.visits if args.visits is not None else visits
+    scans = args.scans if args.scans is not None else scans
+
+    workdir = tempfile.mkdtemp(prefix='paaksathi-load-')
+    gemini = start_fake_gemini(latency_ms=args.gemini_latency_ms, seed=args.seed)
+    process = log = None
+    try:
+        seed_database(workdir, users, visits, scans, args.seed)
+        rng = random.Random(args.seed)
+        images = [noise_jpeg(rng) for _ in range(args.images)]
+
+        port = free_port()
+        base_url = f'http://127.0.0.1:{port}'
+        process, log = start_gunicorn(workdir, port, args.workers, args.threads, gemini.base_url)
+        wait_until_ready(base_url, process)
+        print(f'gunicorn ready on {base_url}; {args.concurrency} clients for '
+              f'{args.warmup:g}s warmup + {args.duration:g}s', file=sys.stderr)
+
+        samples = run_load(base_url, args.concurrency, args.duration, args.warmup, images, args.seed)
+    except Exception:
+        if log is not None:
+            log.flush()
+            with open(log.name, encoding='utf-8', errors='replace') as f:
+                print(f.read()[-4000:], file=sys.stderr)
+        raise
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            log.close()
+        gemini.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {}
+    total_requests = total_errors = 0
+    all_latencies = []
+    for name, (latencies, errors) in samples.items():
+        summary = summarize(latencies)
+        summary['errors'] = errors
+        summary['throughput_rps'] = round(len(latencies) / args.duration, 2)
+        results[name] = summary
+        total_requests += len(latencies) + errors
+        total_errors += errors
+        all_latencies.extend(latencies)
+    total = summarize(all_latencies)
+    total['errors'] = total_errors
+    total['error_rate'] = round(total_errors / total_requests, 4) if total_requests else 0.0
+    total['throughput_rps'] = round(len(all_latencies) / args.duration, 2)
+    results['total'] = total
+
+    output = {
+        'suite': 'load',
+        'machine': machine_info(),
+        'config': {'users': users, 'visits': visits, 'scans': scans, 'workers': args.workers,
+                   'threads': args.threads, 'concurrency': args.concurrency, 'duration': args.duration,
+                   'gemini_latency_ms': args.gemini_latency_ms, 'images': args.images, 'seed': args.seed},
+        'results': results,
+    }
+    print_table(output)
+    print(f"throughput {total['throughput_rps']} req/s, error rate {total['error_rate']:.2%}")
+    if args.output:
+        write_results(args.output, output)
+    regressed = args.baseline and not report_comparison(output, args.baseline, args.tolerance)
+    if regressed or total_errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Seed a synthetic Paaksathi database for benchmarks.
+Creates the schema through app.py, then bulk-inserts users, visits, scans and
+extra library diseases spread over the last two years, and rebuilds the
+derived tables (counters, scan aggregates).
+
+Usage (from the project root; DATABASE picks the file):
+    DATABASE=/tmp/bench.db python benchmarks/seed_db.py --users 10000 --visits 200000 --scans 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the seeding away from the real database
+os.environ.setdefault('DATABASE', os.path.join(os.getcwd(), 'bench.db'))
+os.environ.setdefault('DETECTION_PRELOAD', '0')
+os.environ.setdefault('VISIT_MAINTENANCE_INTERVAL_HOURS', '0')
+
+import app  # noqa: E402
+
+CROPS = ['cotton', 'wheat', 'rice', 'tomato', 'potato', 'groundnut', 'cumin', 'castor']
+DISEASES = ['Bacterial Blight', 'Rust', 'Blast', 'Early Blight', 'Late Blight', 'Leaf Curl',
+            'Powdery Mildew', 'Wilt', 'Healthy']
+GUJARATI_WORDS = ['પાન', 'ડાઘ', 'ફૂગ', 'પીળા', 'સુકાઈ', 'વળી', 'ઘા', 'મૂળ', 'દાંડી', 'ફળ']
+BATCH_SIZE = 10000
+
+
+def timestamps(rng, count, days=730):
+    """Sorted 'YYYY-MM-DD HH:MM:SS' UTC strings over the last `days` days"""
+    end = datetime.utcnow()
+    start = end - timedelta(days=days)
+    span = int((end - start).total_seconds())
+    offsets = sorted(rng.randrange(span) for _ in range(count))
+    return [(start + timedelta(seconds=offset)).strftime('%Y-%m-%d %H:%M:%S') for offset in offsets]
+
+
+def insert_batches(conn, sql, rows):
+    c = conn.cursor()
+    for i in range(0, len(rows), BATCH_SIZE):
+        c.executemany(sql, rows[i:i + BATCH_SIZE])
+    conn.commit()
+
+
+def seed(conn, users, visits, scans, diseases, seed=42):
+    rng = random.Random(seed)
+    c = conn.cursor()
+    c.execute('SELECT COALESCE(MAX(id), 0) FROM users')
+    first_user = c.fetchone()[0] + 1
+
+    insert_batches(conn, 'INSERT INTO users (name, mobile, email, password, created_at) VALUES (?, ?, ?, ?, ?)', [
+        (f'ખેડૂત {first_user + i}', f'{7000000000 + first_user + i}', f'farmer{first_user + i}@example.com',
+         'benchmark', created_at)
+        for i, created_at in enumerate(timestamps(rng, users))
+    ])
+
+    # A few thousand distinct IPs, some much busier than others
+    ips = [f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}' for _ in range(5000)]
+    insert_batches(conn, 'INSERT INTO visits (ip_address, visit_time, date) VALUES (?, ?, ?)', [
+        (ips[min(int(rng.paretovariate(1.2)) - 1, len(ips) - 1)], visit_time, visit_time[:10])
+        for visit_time in timestamps(rng, visits)
+    ])
+
+    user_ids = list(range(first_user, first_user + users)) or [None]
+    insert_batches(conn, '''INSERT INTO scans (user_id, crop_type, disease_name, image_path, scan_time, phash)
+                            VALUES (?, ?, ?, ?, ?, ?)''', [
+        (rng.choice(user_ids), rng.choice(CROPS), rng.choice(DISEASES), f'static/uploads/bench_{i}.jpg',
+         scan_time, app.format_phash(rng.getrandbits(64)))
+        for i, scan_time in enumerate(timestamps(rng, scans))
+    ])
+
+    insert_batches(conn, '''INSERT INTO diseases (name_gu, name_en, crop, symptoms, treatment, prevention)
+                            VALUES (?, ?, ?, ?, ?, ?)''', [
+        (f'રોગ {i}', f'{rng.choice(DISEASES)} {i}', rng.choice(CROPS),
+         ' '.join(rng.choices(GUJARATI_WORDS, k=8)), ' '.join(rng.choices(GUJARATI_WORDS, k=6)),
+         ' '.join(rng.choices(GUJARATI_WORDS, k=6)))
+        for i in range(diseases)
+    ])
+
+    # Derived tables, as `flask rebuild-counters` / `flask rebuild-scan-stats` would
+    c.execute('BEGIN IMMEDIATE')
+    app.rebuild_counters(c)
+    app.rebuild_scan_daily_stats(c)
+    app.bump_catalog_version(c, 'diseases')
+    conn.commit()
+    c.execute('ANALYZE')
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--visits', type=int, default=20000)
+    parser.add_argument('--scans', type=int, default=5000)
+    parser.add_argument('--diseases', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    conn = app.sqlite3.connect(app.app.config['DATABASE'])
+    seed(conn, args.users, args.visits, args.scans, args.diseases, args.seed)
+    conn.close()
+    print(f"Seeded {app.app.config['DATABASE']}: {args.users} users, {args.visits} visits, "
+          f"{args.scans} scans, {args.diseases} diseases in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
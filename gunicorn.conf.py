@@ -0,0 +1,22 @@
+# Gunicorn settings, read automatically when gunicorn starts in this folder:
+#   DB_AUTO_INIT=0 gunicorn app:app
+#
+# Threaded workers are required: each open admin dashboard keeps a Server-Sent
+# Events response (/api/admin/events) running for as long as the tab is open.
+# A sync worker would spend its only slot on it and be killed at `timeout`;
+# with gthread it holds one thread, and `timeout` only covers the worker's
+# heartbeat. Keep EVENT_MAX_SUBSCRIBERS well below `threads` so live
+# dashboards never take every thread of a worker.
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+
+
+def post_worker_init(worker):
+    # Background threads and the model preload start per worker, never on import
+    from app import start_worker
+    start_worker()
@@ -22,6 +22,21 @@ document.addEventListener('DOMContentLoaded', function() {
         exportUsersBtn.addEventListener('click', handleExportUsers);
     }
 
+    // Toggle visits collapsible (Recent Visits section); bound once here since
+    // the catalog lists are re-rendered on every live update
+    const toggleVisitsBtn = document.getElementById('toggleVisitsBtn');
+    const visitsCollapsible = document.getElementById('visitsCollapsible');
+    if (toggleVisitsBtn && visitsCollapsible) {
+        // ensure it's closed by default
+        visitsCollapsible.classList.remove('open');
+        visitsCollapsible.setAttribute('aria-hidden','true');
+        toggleVisitsBtn.addEventListener('click', () => {
+            const isOpen = visitsCollapsible.classList.toggle('open');
+            visitsCollapsible.setAttribute('aria-hidden', (!isOpen).toString());
+            toggleVisitsBtn.textContent = isOpen ? 'બંધ કરો' : 'જુઓ';
+        });
+    }
+
     // Add handlers for admin forms (delegated to avoid missing elements)
     document.addEventListener('submit', async function(e) {
         if (e.target && e.target.id === 'addCropForm') {
@@ -38,7 +53,7 @@ document.addEventListener('DOMContentLoaded', function() {
             if (data.success) {
                 showNotification('Crop added', 'success');
                 document.getElementById('addCropForm').reset();
-                loadAdminData();
+                loadCropsList();
             } else {
                 showNotification(data.message || 'Add failed', 'error');
             }
@@ -62,7 +77,7 @@ document.addEventListener('DOMContentLoaded', function() {
             if (data.success) {
                 showNotification('Disease added', 'success');
                 document.getElementById('addDiseaseForm').reset();
-                loadAdminData();
+                loadDiseasesList();
             } else {
                 showNotification(data.message || 'Add failed', 'error');
             }
@@ -82,7 +97,7 @@ document.addEventListener('DOMContentLoaded', function() {
             if (data.success) {
                 showNotification('Scheme added', 'success');
                 document.getElementById('addSchemeForm').reset();
-                loadAdminData();
+                loadSchemesList();
             } else {
                 showNotification(data.message || 'Add failed', 'error');
             }
@@ -95,7 +110,7 @@ document.addEventListener('DOMContentLoaded', function() {
  */
 async function checkAdminSession() {
     try {
-        const response = await fetch('/api/admin/stats');
+        const response = await fetch('/api/admin/session');
         if (response.ok) {
             const data = await response.json();
             if (data.success) {
@@ -103,6 +118,7 @@ async function checkAdminSession() {
                 document.getElementById('adminLogin').style.display = 'none';
                 document.getElementById('adminDashboard').style.display = 'block';
                 loadAdminData();
+                startAdminEvents();
             } else {
                 // Admin is not logged in
                 document.getElementById('adminLogin').style.display = 'flex';
@@ -168,6 +184,7 @@ async function handleAdminLogout(e) {
         const data = await response.json();
 
         if (data.success) {
+            stopAdminEvents();
             document.getElementById('adminLogin').style.display = 'flex';
             document.getElementById('adminDashboard').style.display = 'none';
             showNotification('લોગઆઉટ સફળ!', 'success');
@@ -279,319 +296,415 @@ async function loadAdminData() {
 
         // Load scan records and admin-managed lists
         try {
-            // Scan records
-            const scanRes = await fetch('/api/admin/scan-records');
-            if (scanRes.ok) {
-                const scanData = await scanRes.json();
-                if (scanData.success) {
-                    const tbody = document.getElementById('scanRecordsBody');
-                    if (tbody) {
-                        tbody.innerHTML = scanData.records.map(r => `
-                            <tr>
-                                <td>${r.crop || '-'}</td>
-                                <td>${r.disease || '-'}</td>
-                                <td>${r.count}</td>
-                            </tr>
-                        `).join('');
-                    }
-                }
+            await Promise.all([loadScanRecords(), loadCropsList(), loadDiseasesList(), loadSchemesList()]);
+        } catch (err) {
+            console.error('Error loading additional admin lists:', err);
+        }
+
+    } catch (error) {
+        console.error('Error loading admin data:', error);
+        showNotification('ડેટા લોડ કરવામાં ભૂલ', 'error');
+    }
+}
+
+/**
+ * Load aggregated scan records
+ */
+async function loadScanRecords() {
+    const scanRes = await fetch('/api/admin/scan-records');
+    if (scanRes.ok) {
+        const scanData = await scanRes.json();
+        if (scanData.success) {
+            scanRecords = scanData.records;
+            renderScanRecords();
+        }
+    }
+}
+
+let scanRecords = [];
+
+function renderScanRecords() {
+    const tbody = document.getElementById('scanRecordsBody');
+    if (tbody) {
+        tbody.innerHTML = scanRecords.map(r => `
+            <tr>
+                <td>${r.crop || '-'}</td>
+                <td>${r.disease || '-'}</td>
+                <td>${r.count}</td>
+            </tr>
+        `).join('');
+    }
+}
+
+/**
+ * Live dashboard updates over Server-Sent Events.
+ * The server pushes deltas; only a 'resync' event reloads everything.
+ */
+let adminEvents = null;
+
+function startAdminEvents() {
+    if (adminEvents || !window.EventSource) return;
+    adminEvents = new EventSource('/api/admin/events');
+
+    adminEvents.addEventListener('counters', (e) => {
+        const counters = JSON.parse(e.data);
+        document.getElementById('adminTotalVisits').textContent = counters.visits;
+        document.getElementById('adminTotalUsers').textContent = counters.users;
+        document.getElementById('adminTotalScans').textContent = counters.scans;
+    });
+
+    adminEvents.addEventListener('visits', (e) => {
+        const data = JSON.parse(e.data);
+        incrementStat('adminTotalVisits', data.count);
+        const visitsTableBody = document.getElementById('visitsTableBody');
+        if (visitsTableBody) {
+            visitsTableBody.insertAdjacentHTML('afterbegin', data.recent.reverse().map(visit => `
+                <tr>
+                    <td>${visit.ip_address || '-'}</td>
+                    <td>${formatDate(visit.date)}</td>
+                    <td>${formatTime(visit.visit_time)}</td>
+                </tr>
+            `).join(''));
+            // Keep the table at the same 50 rows the stats endpoint returns
+            while (visitsTableBody.rows.length > 50) {
+                visitsTableBody.deleteRow(-1);
             }
+        }
+    });
 
-            // Crops
-            const cropsRes = await fetch('/api/crops');
-            if (cropsRes.ok) {
-                const cropsData = await cropsRes.json();
-                const cropsList = document.getElementById('cropsList');
-                if (cropsList && cropsData.crops) {
-                    cropsList.innerHTML = cropsData.crops.map(c => `
-                        <div class="list-item" data-id="${c.id}">
-                            <span>${c.name_gu} (${c.name_en || '-'})</span>
-                            <button class="btn btn-danger btn-delete-crop" data-id="${c.id}">Delete</button>
-                        </div>
-                    `).join('');
-
-                    // Attach delete handlers
-                    document.querySelectorAll('.btn-delete-crop').forEach(btn => {
-                        btn.addEventListener('click', async (e) => {
-                            const id = btn.getAttribute('data-id');
-                            if (!confirm('Are you sure you want to delete this crop?')) return;
-                            const res = await fetch(`/api/crops/${id}`, { method: 'DELETE' });
-                            const resp = await res.json();
-                            if (resp.success) {
-                                showNotification('Crop deleted', 'success');
-                                loadAdminData();
-                            } else {
-                                showNotification(resp.message || 'Delete failed', 'error');
-                            }
-                        });
-                    });
-                }
+    adminEvents.addEventListener('user', () => {
+        incrementStat('adminTotalUsers', 1);
+    });
+
+    adminEvents.addEventListener('scans', (e) => {
+        const data = JSON.parse(e.data);
+        incrementStat('adminTotalScans', data.count);
+        data.scans.forEach(scan => {
+            const record = scanRecords.find(r => r.crop === scan.crop && r.disease === scan.disease);
+            if (record) {
+                record.count += 1;
+            } else {
+                scanRecords.push({ crop: scan.crop, disease: scan.disease, count: 1 });
             }
+        });
+        scanRecords.sort((a, b) => b.count - a.count);
+        renderScanRecords();
+    });
 
-            // Diseases (with inline expandable details)
-            const diseasesRes = await fetch('/api/diseases');
-            if (diseasesRes.ok) {
-                const diseasesData = await diseasesRes.json();
-                const diseasesList = document.getElementById('diseasesList');
-                if (diseasesList && diseasesData.diseases) {
-                    const diseasesHtml = diseasesData.diseases.map(d => {
-                        // Default parsing
-                        let symptoms = parseListField(d.symptoms);
-                        let treatment = parseListField(d.treatment);
-                        let prevention = parseListField(d.prevention);
-
-                        // Special-case: Cotton Leaf Curl Disease (use exact provided content)
-                        const nameGu = String(d.name_gu || '').toLowerCase();
-                        const nameEn = String(d.name_en || '').toLowerCase();
-                        if (nameGu.includes('કપાસ') && (nameGu.includes('કાર્લ') || nameGu.includes('કર્લ') || nameEn.includes('leaf curl') || nameEn.includes('cotton'))) {
-                            symptoms = [
-                                'પાંદડા વળી જાય છે અને નાના રહે છે',
-                                'નસો જાડી થઈ જાય છે',
-                                'છોડની વૃદ્ધિ ધીમી પડી જાય છે',
-                                'ફૂલ અને કપાસ ઓછાં આવે છે'
-                            ];
-                            treatment = [
-                                'દવા: ઇમિડાક્લોપ્રિડ 17.8% SL',
-                                'માત્રા: 1 મિલી દવા પ્રતિ લિટર પાણીમાં'
-                            ];
-                            prevention = [
-                                'રોગ પ્રતિકારક વિવિધતા વાવો',
-                                'સફેદ માખી નિયંત્રણ કરો',
-                                'ખેતરમાં સાફસફાઈ રાખો',
-                                'અગાઉના પાકના અવશેષો નષ્ટ કરો'
-                            ];
-                        }
+    const catalogLoaders = { crops: loadCropsList, diseases: loadDiseasesList, schemes: loadSchemesList };
+    const catalogVersions = {};
+    adminEvents.addEventListener('catalog', (e) => {
+        const data = JSON.parse(e.data);
+        // Each version reloads a list once, however many times it is announced
+        if (data.version <= (catalogVersions[data.name] || 0)) return;
+        catalogVersions[data.name] = data.version;
+        const loader = catalogLoaders[data.name];
+        if (loader) {
+            loader().catch(err => console.error('Error reloading catalog:', err));
+        }
+    });
 
-                        return `
-                        <div class="list-item" data-id="${d.id}">
-                            <div class="list-main">
-                                <div>
-                                    <strong>${escapeHtml(d.name_gu)}</strong> <small>${escapeHtml(d.name_en || '')}</small>
-                                    <div class="muted">Crop: ${escapeHtml(d.crop || '-')}</div>
-                                </div>
-                                <div class="list-actions">
-                                    <button class="btn btn-secondary btn-view-disease" data-id="${d.id}" data-target="disease-details-${d.id}">જુઓ</button>
-                                    <button class="btn btn-danger btn-delete-disease" data-id="${d.id}">Delete</button>
-                                </div>
-                            </div>
-
-                            <div id="disease-details-${d.id}" class="expandable-details" data-id="${d.id}" aria-hidden="true">
-                                <div class="details-inner">
-                                    <h4 class="details-heading">લક્ષણો:</h4>
-                                    <ul class="details-list">
-                                        ${symptoms.map(item => `<li>${escapeHtml(item)}</li>`).join('')}
-                                    </ul>
-
-                                    <h4 class="details-heading">સારવાર:</h4>
-                                    <ul class="details-list">
-                                        ${treatment.map(item => `<li>${escapeHtml(item)}</li>`).join('')}
-                                    </ul>
-
-                                    <h4 class="details-heading">રોકથામ:</h4>
-                                    <ul class="details-list">
-                                        ${prevention.map(item => `<li>${escapeHtml(item)}</li>`).join('')}
-                                    </ul>
-                                </div>
-                            </div>
-                        </div>`;
-                    }).join('');
-
-                    diseasesList.innerHTML = diseasesHtml;
-
-                    // Attach delete handlers
-                    document.querySelectorAll('.btn-delete-disease').forEach(btn => {
-                        btn.addEventListener('click', async (e) => {
-                            const id = btn.getAttribute('data-id');
-                            if (!confirm('Are you sure you want to delete this disease?')) return;
-                            const res = await fetch(`/api/diseases/${id}`, { method: 'DELETE' });
-                            const resp = await res.json();
-                            if (resp.success) {
-                                showNotification('Disease deleted', 'success');
-                                loadAdminData();
-                            } else {
-                                showNotification(resp.message || 'Delete failed', 'error');
-                            }
-                        });
-                    });
-
-                    // Attach view (expand/collapse) handlers using event delegation for diseases
-                    const diseasesListEl = document.getElementById('diseasesList');
-                    if (diseasesListEl) {
-                        // remove any previous delegated listener to avoid duplication
-                        diseasesListEl.removeEventListener('click', diseasesListEl._delegatedClick);
-
-                        const delegatedClick = function(e) {
-                            const btn = e.target.closest('.btn-view-disease');
-                            if (!btn) return;
-                            const targetId = btn.getAttribute('data-target');
-                            const detailsEl = document.getElementById(targetId);
-                            if (!detailsEl) return;
-
-                            // find parent list-item
-                            const listItem = btn.closest('.list-item');
-                            if (!listItem) return;
-
-                            // collapse any other expanded item
-                            const currentlyExpanded = document.querySelector('.list-item.expanded');
-                            if (currentlyExpanded && currentlyExpanded !== listItem) {
-                                currentlyExpanded.classList.remove('expanded');
-                                const prevBtn = currentlyExpanded.querySelector('.btn-view-disease');
-                                if (prevBtn) prevBtn.textContent = 'જુઓ';
-                                const prevDetails = currentlyExpanded.querySelector('.expandable-details');
-                                if (prevDetails) {
-                                    prevDetails.setAttribute('aria-hidden','true');
-                                    prevDetails.style.display = 'none';
-                                }
-                            }
-
-                            const isExpanded = listItem.classList.toggle('expanded');
-                            detailsEl.setAttribute('aria-hidden', (!isExpanded).toString());
-                            detailsEl.style.display = isExpanded ? 'block' : 'none';
-                            btn.textContent = isExpanded ? 'બંધ કરો' : 'જુઓ';
-                        };
-
-                        // store the handler ref so we can remove later if needed
-                        diseasesListEl._delegatedClick = delegatedClick;
-                        diseasesListEl.addEventListener('click', delegatedClick);
-                    }
+    adminEvents.addEventListener('resync', () => {
+        loadAdminData();
+    });
+}
 
-                    // Toggle visits collapsible (Recent Visits section)
-                    const toggleVisitsBtn = document.getElementById('toggleVisitsBtn');
-                    const visitsCollapsible = document.getElementById('visitsCollapsible');
-                    if (toggleVisitsBtn && visitsCollapsible) {
-                        // ensure it's closed by default
-                        visitsCollapsible.classList.remove('open');
-                        visitsCollapsible.setAttribute('aria-hidden','true');
-                        toggleVisitsBtn.addEventListener('click', (e) => {
-                            const willOpen = !visitsCollapsible.classList.toggle('open');
-                            // Note: toggle returns true if class present AFTER toggle, so invert for willOpen
-                            const isOpen = visitsCollapsible.classList.contains('open');
-                            visitsCollapsible.setAttribute('aria-hidden', (!isOpen).toString());
-                            toggleVisitsBtn.textContent = isOpen ? 'બંધ કરો' : 'જુઓ';
-                        });
+function stopAdminEvents() {
+    if (adminEvents) {
+        adminEvents.close();
+        adminEvents = null;
+    }
+}
+
+function incrementStat(elementId, amount) {
+    const el = document.getElementById(elementId);
+    if (el) {
+        el.textContent = (parseInt(el.textContent, 10) || 0) + amount;
+    }
+}
+
+/**
+ * Load crops list
+ */
+async function loadCropsList() {
+    const cropsRes = await fetch('/api/crops');
+    if (cropsRes.ok) {
+        const cropsData = await cropsRes.json();
+        const cropsList = document.getElementById('cropsList');
+        if (cropsList && cropsData.crops) {
+            cropsList.innerHTML = cropsData.crops.map(c => `
+                <div class="list-item" data-id="${c.id}">
+                    <span>${c.name_gu} (${c.name_en || '-'})</span>
+                    <button class="btn btn-danger btn-delete-crop" data-id="${c.id}">Delete</button>
+                </div>
+            `).join('');
+
+            // Attach delete handlers
+            document.querySelectorAll('.btn-delete-crop').forEach(btn => {
+                btn.addEventListener('click', async (e) => {
+                    const id = btn.getAttribute('data-id');
+                    if (!confirm('Are you sure you want to delete this crop?')) return;
+                    const res = await fetch(`/api/crops/${id}`, { method: 'DELETE' });
+                    const resp = await res.json();
+                    if (resp.success) {
+                        showNotification('Crop deleted', 'success');
+                        loadCropsList();
+                    } else {
+                        showNotification(resp.message || 'Delete failed', 'error');
                     }
+                });
+            });
+        }
+    }
+}
+
+/**
+ * Load diseases list (with inline expandable details)
+ */
+async function loadDiseasesList() {
+    const diseasesRes = await fetch('/api/diseases');
+    if (diseasesRes.ok) {
+        const diseasesData = await diseasesRes.json();
+        const diseasesList = document.getElementById('diseasesList');
+        if (diseasesList && diseasesData.diseases) {
+            const diseasesHtml = diseasesData.diseases.map(d => {
+                // Default parsing
+                let symptoms = parseListField(d.symptoms);
+                let treatment = parseListField(d.treatment);
+                let prevention = parseListField(d.prevention);
+
+                // Special-case: Cotton Leaf Curl Disease (use exact provided content)
+                const nameGu = String(d.name_gu || '').toLowerCase();
+                const nameEn = String(d.name_en || '').toLowerCase();
+                if (nameGu.includes('કપાસ') && (nameGu.includes('કાર્લ') || nameGu.includes('કર્લ') || nameEn.includes('leaf curl') || nameEn.includes('cotton'))) {
+                    symptoms = [
+                        'પાંદડા વળી જાય છે અને નાના રહે છે',
+                        'નસો જાડી થઈ જાય છે',
+                        'છોડની વૃદ્ધિ ધીમી પડી જાય છે',
+                        'ફૂલ અને કપાસ ઓછાં આવે છે'
+                    ];
+                    treatment = [
+                        'દવા: ઇમિડાક્લોપ્રિડ 17.8% SL',
+                        'માત્રા: 1 મિલી દવા પ્રતિ લિટર પાણીમાં'
+                    ];
+                    prevention = [
+                        'રોગ પ્રતિકારક વિવિધતા વાવો',
+                        'સફેદ માખી નિયંત્રણ કરો',
+                        'ખેતરમાં સાફસફાઈ રાખો',
+                        'અગાઉના પાકના અવશેષો નષ્ટ કરો'
+                    ];
                 }
-            }
 
-            // Schemes (with inline expandable details)
-            const schemesRes = await fetch('/api/schemes');
-            if (schemesRes.ok) {
-                const schemesData = await schemesRes.json();
-                const schemesList = document.getElementById('schemesList');
-                if (schemesList && schemesData.schemes) {
-                    const schemesHtml = schemesData.schemes.map(s => {
-                        const desc = s.description || '';
-                        // Special-case PM-KISAN exact content
-                        let schemeDetails = renderSchemeDetails(desc);
-                        const titleLower = String(s.title || '').toLowerCase();
-                        if (titleLower.includes('pm-kisan') || titleLower.includes('pm kisan') || titleLower.includes('પીએમ કિસાન')) {
-                            schemeDetails = `
-                                <p>ભારત સરકારની યોજના જેમાં ખેડૂતોને વર્ષમાં ₹6000 આર્થિક સહાય મળે છે</p>
-                                <h4 class="details-heading">ફાયદા:</h4>
-                                <ul class="details-list">
-                                    <li>વર્ષમાં ₹6000 (₹2000 ત્રણ હપ્તામાં)</li>
-                                    <li>સીધા બેંક ખાતામાં રકમ</li>
-                                    <li>કોઈ વ્યાજ નથી, પરત કરવાની જરૂર નથી</li>
-                                    <li>ઓનલાઇન અરજી કરી શકાય</li>
-                                </ul>
-                                <h4 class="details-heading">પાત્રતા:</h4>
-                                <ul class="details-list">
-                                    <li>ખેદૂત પરિવાર જેની પાસે ખેતીલાયક જમીન છે</li>
-                                    <li>2 હેક્ટરથી વધુ જમીન હોય તો પણ યોજના લાગુ</li>
-                                    <li>આધાર કાર્ડ અને બેંક ખાતું જરૂરી</li>
-                                </ul>
-                                <h4 class="details-heading">અરજી કેવી રીતે કરવી:</h4>
-                                <ul class="details-list">
-                                    <li>નજીકના CSC કેન્દ્ર અથવા pmkisan.gov.in પર અરજી કરો</li>
-                                </ul>
-                            `;
-                        }
+                return `
+                <div class="list-item" data-id="${d.id}">
+                    <div class="list-main">
+                        <div>
+                            <strong>${escapeHtml(d.name_gu)}</strong> <small>${escapeHtml(d.name_en || '')}</small>
+                            <div class="muted">Crop: ${escapeHtml(d.crop || '-')}</div>
+                        </div>
+                        <div class="list-actions">
+                            <button class="btn btn-secondary btn-view-disease" data-id="${d.id}" data-target="disease-details-${d.id}">જુઓ</button>
+                            <button class="btn btn-danger btn-delete-disease" data-id="${d.id}">Delete</button>
+                        </div>
+                    </div>
+
+                    <div id="disease-details-${d.id}" class="expandable-details" data-id="${d.id}" aria-hidden="true">
+                        <div class="details-inner">
+                            <h4 class="details-heading">લક્ષણો:</h4>
+                            <ul class="details-list">
+                                ${symptoms.map(item => `<li>${escapeHtml(item)}</li>`).join('')}
+                            </ul>
+
+                            <h4 class="details-heading">સારવાર:</h4>
+                            <ul class="details-list">
+                                ${treatment.map(item => `<li>${escapeHtml(item)}</li>`).join('')}
+                            </ul>
+
+                            <h4 class="details-heading">રોકથામ:</h4>
+                            <ul class="details-list">
+                                ${prevention.map(item => `<li>${escapeHtml(item)}</li>`).join('')}
+                            </ul>
+                        </div>
+                    </div>
+                </div>`;
+            }).join('');
+
+            diseasesList.innerHTML = diseasesHtml;
+
+            // Attach delete handlers
+            document.querySelectorAll('.btn-delete-disease').forEach(btn => {
+                btn.addEventListener('click', async (e) => {
+                    const id = btn.getAttribute('data-id');
+                    if (!confirm('Are you sure you want to delete this disease?')) return;
+                    const res = await fetch(`/api/diseases/${id}`, { method: 'DELETE' });
+                    const resp = await res.json();
+                    if (resp.success) {
+                        showNotification('Disease deleted', 'success');
+                        loadDiseasesList();
+                    } else {
+                        showNotification(resp.message || 'Delete failed', 'error');
+                    }
+                });
+            });
 
-                        return `
-                        <div class="list-item" data-id="${s.id}">
-                            <div class="list-main">
-                                <div>
-                                    <strong>${escapeHtml(s.title)}</strong>
-                                    <div class="muted">${escapeHtml(desc.length > 120 ? desc.slice(0, 120) + '...' : desc)}</div>
-                                </div>
-                                <div class="list-actions">
-                                    <button class="btn btn-secondary btn-view-scheme" data-id="${s.id}" data-target="scheme-details-${s.id}">જુઓ</button>
-                                    <button class="btn btn-danger btn-delete-scheme" data-id="${s.id}">Delete</button>
-                                </div>
-                            </div>
-
-                            <div id="scheme-details-${s.id}" class="expandable-details" data-id="${s.id}" aria-hidden="true">
-                                <div class="details-inner">
-                                    <h4 class="details-heading">${escapeHtml(s.title)}</h4>
-                                    ${schemeDetails}
-                                </div>
-                            </div>
-                        </div>`;
-                    }).join('');
-
-                    schemesList.innerHTML = schemesHtml;
-
-                    // Attach delete handlers
-                    document.querySelectorAll('.btn-delete-scheme').forEach(btn => {
-                        btn.addEventListener('click', async (e) => {
-                            const id = btn.getAttribute('data-id');
-                            if (!confirm('Are you sure you want to delete this scheme?')) return;
-                            const res = await fetch(`/api/schemes/${id}`, { method: 'DELETE' });
-                            const resp = await res.json();
-                            if (resp.success) {
-                                showNotification('Scheme deleted', 'success');
-                                loadAdminData();
-                            } else {
-                                showNotification(resp.message || 'Delete failed', 'error');
-                            }
-                        });
-                    });
-
-                    // Attach view (expand/collapse) handlers for schemes using event delegation
-                    const schemesListEl = document.getElementById('schemesList');
-                    if (schemesListEl) {
-                        schemesListEl.removeEventListener('click', schemesListEl._delegatedClick);
-
-                        const delegatedClickScheme = function(e) {
-                            const btn = e.target.closest('.btn-view-scheme');
-                            if (!btn) return;
-                            const targetId = btn.getAttribute('data-target');
-                            const detailsEl = document.getElementById(targetId);
-                            if (!detailsEl) return;
-
-                            const listItem = btn.closest('.list-item');
-                            if (!listItem) return;
-
-                            const currentlyExpanded = document.querySelector('.list-item.expanded');
-                            if (currentlyExpanded && currentlyExpanded !== listItem) {
-                                currentlyExpanded.classList.remove('expanded');
-                                const prevBtn = currentlyExpanded.querySelector('.btn-view-scheme');
-                                if (prevBtn) prevBtn.textContent = 'જુઓ';
-                                const prevDetails = currentlyExpanded.querySelector('.expandable-details');
-                                if (prevDetails) {
-                                    prevDetails.setAttribute('aria-hidden','true');
-                                    prevDetails.style.display = 'none';
-                                }
-                            }
-
-                            const isExpanded = listItem.classList.toggle('expanded');
-                            detailsEl.setAttribute('aria-hidden', (!isExpanded).toString());
-                            detailsEl.style.display = isExpanded ? 'block' : 'none';
-                            btn.textContent = isExpanded ? 'બંધ કરો' : 'જુઓ';
-                        };
-
-                        schemesListEl._delegatedClick = delegatedClickScheme;
-                        schemesListEl.addEventListener('click', delegatedClickScheme);
+            // Attach view (expand/collapse) handlers using event delegation for diseases
+            const diseasesListEl = document.getElementById('diseasesList');
+            if (diseasesListEl) {
+                // remove any previous delegated listener to avoid duplication
+                diseasesListEl.removeEventListener('click', diseasesListEl._delegatedClick);
+
+                const delegatedClick = function(e) {
+                    const btn = e.target.closest('.btn-view-disease');
+                    if (!btn) return;
+                    const targetId = btn.getAttribute('data-target');
+                    const detailsEl = document.getElementById(targetId);
+                    if (!detailsEl) return;
+
+                    // find parent list-item
+                    const listItem = btn.closest('.list-item');
+                    if (!listItem) return;
+
+                    // collapse any other expanded item
+                    const currentlyExpanded = document.querySelector('.list-item.expanded');
+                    if (currentlyExpanded && currentlyExpanded !== listItem) {
+                        currentlyExpanded.classList.remove('expanded');
+                        const prevBtn = currentlyExpanded.querySelector('.btn-view-disease');
+                        if (prevBtn) prevBtn.textContent = 'જુઓ';
+                        const prevDetails = currentlyExpanded.querySelector('.expandable-details');
+                        if (prevDetails) {
+                            prevDetails.setAttribute('aria-hidden','true');
+                            prevDetails.style.display = 'none';
+                        }
                     }
-                }
+
+                    const isExpanded = listItem.classList.toggle('expanded');
+                    detailsEl.setAttribute('aria-hidden', (!isExpanded).toString());
+                    detailsEl.style.display = isExpanded ? 'block' : 'none';
+                    btn.textContent = isExpanded ? 'બંધ કરો' : 'જુઓ';
+                };
+
+                // store the handler ref so we can remove later if needed
+                diseasesListEl._delegatedClick = delegatedClick;
+                diseasesListEl.addEventListener('click', delegatedClick);
             }
-        } catch (err) {
-            console.error('Error loading additional admin lists:', err);
         }
+    }
+}
 
-    } catch (error) {
-        console.error('Error loading admin data:', error);
-        showNotification('ડેટા લોડ કરવામાં ભૂલ', 'error');
+/**
+ * Load schemes list (with inline expandable details)
+ */
+async function loadSchemesList() {
+    const schemesRes = await fetch('/api/schemes');
+    if (schemesRes.ok) {
+        const schemesData = await schemesRes.json();
+        const schemesList = document.getElementById('schemesList');
+        if (schemesList && schemesData.schemes) {
+            const schemesHtml = schemesData.schemes.map(s => {
+                const desc = s.description || '';
+                // Special-case PM-KISAN exact content
+                let schemeDetails = renderSchemeDetails(desc);
+                const titleLower = String(s.title || '').toLowerCase();
+                if (titleLower.includes('pm-kisan') || titleLower.includes('pm kisan') || titleLower.includes('પીએમ કિસાન')) {
+                    schemeDetails = `
+                        <p>ભારત સરકારની યોજના જેમાં ખેડૂતોને વર્ષમાં ₹6000 આર્થિક સહાય મળે છે</p>
+                        <h4 class="details-heading">ફાયદા:</h4>
+                        <ul class="details-list">
+                            <li>વર્ષમાં ₹6000 (₹2000 ત્રણ હપ્તામાં)</li>
+                            <li>સીધા બેંક ખાતામાં રકમ</li>
+                            <li>કોઈ વ્યાજ નથી, પરત કરવાની જરૂર નથી</li>
+                            <li>ઓનલાઇન અરજી કરી શકાય</li>
+                        </ul>
+                        <h4 class="details-heading">પાત્રતા:</h4>
+                        <ul class="details-list">
+                            <li>ખેદૂત પરિવાર જેની પાસે ખેતીલાયક જમીન છે</li>
+                            <li>2 હેક્ટરથી વધુ જમીન હોય તો પણ યોજના લાગુ</li>
+                            <li>આધાર કાર્ડ અને બેંક ખાતું જરૂરી</li>
+                        </ul>
+                        <h4 class="details-heading">અરજી કેવી રીતે કરવી:</h4>
+                        <ul class="details-list">
+                            <li>નજીકના CSC કેન્દ્ર અથવા pmkisan.gov.in પર અરજી કરો</li>
+                        </ul>
+                    `;
+                }
+
+                return `
+                <div class="list-item" data-id="${s.id}">
+                    <div class="list-main">
+                        <div>
+                            <strong>${escapeHtml(s.title)}</strong>
+                            <div class="muted">${escapeHtml(desc.length > 120 ? desc.slice(0, 120) + '...' : desc)}</div>
+                        </div>
+                        <div class="list-actions">
+                            <button class="btn btn-secondary btn-view-scheme" data-id="${s.id}" data-target="scheme-details-${s.id}">જુઓ</button>
+                            <button class="btn btn-danger btn-delete-scheme" data-id="${s.id}">Delete</button>
+                        </div>
+                    </div>
+
+                    <div id="scheme-details-${s.id}" class="expandable-details" data-id="${s.id}" aria-hidden="true">
+                        <div class="details-inner">
+                            <h4 class="details-heading">${escapeHtml(s.title)}</h4>
+                            ${schemeDetails}
+                        </div>
+                    </div>
+                </div>`;
+            }).join('');
+
+            schemesList.innerHTML = schemesHtml;
+
+            // Attach delete handlers
+            document.querySelectorAll('.btn-delete-scheme').forEach(btn => {
+                btn.addEventListener('click', async (e) => {
+                    const id = btn.getAttribute('data-id');
+                    if (!confirm('Are you sure you want to delete this scheme?')) return;
+                    const res = await fetch(`/api/schemes/${id}`, { method: 'DELETE' });
+                    const resp = await res.json();
+                    if (resp.success) {
+                        showNotification('Scheme deleted', 'success');
+                        loadSchemesList();
+                    } else {
+                        showNotification(resp.message || 'Delete failed', 'error');
+                    }
+                });
+            });
+
+            // Attach view (expand/collapse) handlers for schemes using event delegation
+            const schemesListEl = document.getElementById('schemesList');
+            if (schemesListEl) {
+                schemesListEl.removeEventListener('click', schemesListEl._delegatedClick);
+
+                const delegatedClickScheme = function(e) {
+                    const btn = e.target.closest('.btn-view-scheme');
+                    if (!btn) return;
+                    const targetId = btn.getAttribute('data-target');
+                    const detailsEl = document.getElementById(targetId);
+                    if (!detailsEl) return;
+
+                    const listItem = btn.closest('.list-item');
+                    if (!listItem) return;
+
+                    const currentlyExpanded = document.querySelector('.list-item.expanded');
+                    if (currentlyExpanded && currentlyExpanded !== listItem) {
+                        currentlyExpanded.classList.remove('expanded');
+                        const prevBtn = currentlyExpanded.querySelector('.btn-view-scheme');
+                        if (prevBtn) prevBtn.textContent = 'જુઓ';
+                        const prevDetails = currentlyExpanded.querySelector('.expandable-details');
+                        if (prevDetails) {
+                            prevDetails.setAttribute('aria-hidden','true');
+                            prevDetails.style.display = 'none';
+                        }
+                    }
+
+                    const isExpanded = listItem.classList.toggle('expanded');
+                    detailsEl.setAttribute('aria-hidden', (!isExpanded).toString());
+                    detailsEl.style.display = isExpanded ? 'block' : 'none';
+                    btn.textContent = isExpanded ? 'બંધ કરો' : 'જુઓ';
+                };
+
+                schemesListEl._delegatedClick = delegatedClickScheme;
+                schemesListEl.addEventListener('click', delegatedClickScheme);
+            }
+        }
     }
 }
 
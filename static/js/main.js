@@ -356,15 +356,31 @@ document.addEventListener('DOMContentLoaded', function() {
     function slugify(text) {
         return text.toString().toLowerCase().trim().replace(/\s+/g,'-').replace(/[^a-z0-9\-\u0A80-\u0AFF]/g,'').replace(/\-+/g,'-');
     }
-    async function loadDiseases() {
+    const diseaseSearch = document.querySelector('.disease-search');
+    const diseaseFilter = document.querySelector('.disease-filter');
+    let diseasePage = 1;
+
+    async function loadDiseases(append = false) {
         const container = document.getElementById('diseaseGrid');
         if (!container) return;
-        container.innerHTML = '<div class="loading">લોડ થઈ રહ્યું છે...</div>';
+        if (!append) {
+            diseasePage = 1;
+            container.innerHTML = '<div class="loading">લોડ થઈ રહ્યું છે...</div>';
+        }
         try {
-            const res = await fetch('/api/diseases');
+            // Search and filter on the server so only matching rows are downloaded
+            const params = new URLSearchParams({ page: diseasePage, per_page: 20 });
+            if (diseaseSearch && diseaseSearch.value.trim()) params.set('q', diseaseSearch.value.trim());
+            if (diseaseFilter && diseaseFilter.selectedIndex > 0) params.set('crop', diseaseFilter.value);
+            const res = await fetch(`/api/diseases/search?${params}`);
             const data = await res.json();
             if (!data.success) throw new Error('Failed');
-            container.innerHTML = '';
+            if (!append) container.innerHTML = '';
+            const oldMore = document.getElementById('diseaseLoadMore');
+            if (oldMore) oldMore.remove();
+            if (!append && data.diseases.length === 0) {
+                container.innerHTML = '<p>કોઈ રોગ મળ્યો નથી</p>';
+            }
             data.diseases.forEach(d=>{
                 let symptoms = [], treatment = [], prevention = [];
                 try { symptoms = JSON.parse(d.symptoms || '[]'); } catch(e){}
@@ -387,12 +403,25 @@ document.addEventListener('DOMContentLoaded', function() {
                 container.appendChild(card);
             });
 
-            document.querySelectorAll('.btn-view').forEach(btn=>{
+            container.querySelectorAll('.btn-view:not([data-bound])').forEach(btn=>{
+                btn.setAttribute('data-bound', '1');
                 btn.addEventListener('click', e=>{
                     e.preventDefault();
                     openModal(btn.getAttribute('data-disease'));
                 });
             });
+
+            if (data.has_more) {
+                const more = document.createElement('button');
+                more.id = 'diseaseLoadMore';
+                more.className = 'btn btn-primary';
+                more.textContent = 'વધુ બતાવો';
+                more.addEventListener('click', () => {
+                    diseasePage += 1;
+                    loadDiseases(true);
+                });
+                container.after(more);
+            }
         } catch (err) {
             console.error(err);
             container.innerHTML = '<p>ડીઝીઝ લોડ કરવામાં ભૂલ થઈ</p>';
@@ -400,6 +429,13 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     loadDiseases();
 
+    let diseaseSearchTimer;
+    diseaseSearch && diseaseSearch.addEventListener('input', () => {
+        clearTimeout(diseaseSearchTimer);
+        diseaseSearchTimer = setTimeout(() => loadDiseases(), 300);
+    });
+    diseaseFilter && diseaseFilter.addEventListener('change', () => loadDiseases());
+
     document.querySelectorAll('.btn-view').forEach(btn => {
         btn.addEventListener('click', (e) => {
             e.preventDefault();
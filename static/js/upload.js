@@ -132,7 +132,12 @@ async function handleFormSubmit(e) {
             body: formData
         });
 
-        const data = await response.json();
+        let data = await response.json();
+
+        // Background job: poll until the result is ready
+        if (response.status === 202 && data.status_url) {
+            data = await waitForScanJob(data.status_url);
+        }
 
         if (data.success) {
             // Store result in sessionStorage and redirect
@@ -152,3 +157,16 @@ async function handleFormSubmit(e) {
     }
 }
 
+/**
+ * Poll a background scan job until it finishes
+ */
+async function waitForScanJob(statusUrl) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const response = await fetch(statusUrl);
+        const data = await response.json();
+        if (!data.success || data.status === 'done' || data.status === 'failed') {
+            return data;
+        }
+    }
+}